@@ -5,6 +5,7 @@ matplotlib.use("Agg")
 import os
 import shutil
 import tempfile
+import threading
 from contextlib import asynccontextmanager
 from datetime import datetime
 
@@ -16,9 +17,10 @@ from fastapi.exceptions import RequestValidationError
 from sqlalchemy.orm import Session
 
 # Import floorplan modules
-from floorplan.database import Base, SessionLocal, engine, get_db, Job, GeneratedLayout
+from floorplan.database import Base, SessionLocal, add_missing_columns, engine, get_db, Job, GeneratedLayout
 from floorplan.data_models import OptimizationRequest
-from floorplan.worker import process_optimization_job
+from floorplan.evaluation import kernel_cache_stats, warmup_kernels
+from floorplan.worker import process_optimization_job, watch_interrupted_jobs
 
 # Import user log-in modules
 from users.models import User
@@ -45,6 +47,7 @@ os.makedirs(GENERATED_LAYOUT_FOLDER, exist_ok=True)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
     # Create demo user if not exists -> Loads once
     db = SessionLocal()
     
@@ -57,6 +60,20 @@ async def lifespan(app: FastAPI):
         db.add(User(username=demo_username, password_hash=hashed_pw))
         db.commit()
     db.close()
+
+    # Optionally compile/load the layout optimizer's Numba kernels up front,
+    # so the first /optimize after a deploy doesn't pay the JIT cost
+    if os.environ.get("FLOORPLAN_WARMUP_KERNELS", "").lower() in ("1", "true", "yes"):
+        report = warmup_kernels()
+        print(
+            f"Numba kernels ready in {report['warmup_seconds']}s "
+            f"(compile {report['compile_seconds']}s, "
+            f"cache hits {report['cache_hits']}, misses {report['cache_misses']})"
+        )
+
+    # Optionally restart jobs whose worker died (from their checkpoints), now and as leases lapse
+    if os.environ.get("FLOORPLAN_RESUME_JOBS", "").lower() in ("1", "true", "yes"):
+        threading.Thread(target=watch_interrupted_jobs, args=(SessionLocal,), daemon=True).start()
     yield
 
 
@@ -250,7 +267,7 @@ def get_job_status(job_id: str, db: Session = Depends(get_db)):
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {"status": "ok", "kernels": kernel_cache_stats()}
 
 
 @app.post("/upload-generated-layout")
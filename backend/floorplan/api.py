@@ -1,25 +1,34 @@
 # floorplan/api.py
+import multiprocessing as mp
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from typing import Callable
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from scipy.spatial import cKDTree
 
+from floorplan.cache import GeometryCache, SolutionStore
+from floorplan.checkpoint import JobCheckpoint
 from floorplan.data_models import (
     DiscretizationResult,
+    DiscretizedGraph,
     FloorPlan,
+    Genome,
+    GridPyramid,
     Individual,
+    LatticeGraph,
     OptimizationResult,
     RoomData,
 )
-from floorplan.evaluation import FitnessEvaluator, _propagate_numba
+from floorplan.evaluation import FitnessEvaluator
+from floorplan.operators import _distances_to_numba
 from floorplan.ga import GeneticOptimizer
+from floorplan.parallel import ParallelEvaluator
 
 # New import for headless geometry generation
 from floorplan.geoemetry_postprocessing import process_layout_to_json
-from floorplan.geometry import GeometryProcessor
-from floorplan.graph import GraphBuilder
 
 try:
     from floorplan.rendering import (
@@ -32,6 +41,10 @@ try:
 except ImportError:
     HAS_RENDERING = False
 
+# Discretizations and stitched graphs, shared by every stage, branch and job
+# of this process
+_geometry_cache = GeometryCache.from_env()
+
 
 def _normalize_zone_areas(
     selected_zones_df: pd.DataFrame, total_gfa: float
@@ -59,105 +72,146 @@ def _normalize_zone_areas(
     return normalized_df
 
 
+def _upsample_nodes(
+    nodes: np.ndarray,
+    coarse_disc_results: list[DiscretizationResult],
+    fine_disc_results: list[DiscretizationResult],
+) -> np.ndarray:
+    """
+    Maps global coarse node indices to the nearest fine nodes on the same
+    floor, with one batched query of each floor's cached KD-tree.
+    """
+    nodes = np.asarray(nodes, dtype=np.int64)
+    coarse_starts = np.cumsum([0] + [len(d.grid_positions) for d in coarse_disc_results])
+    fine_starts = np.cumsum([0] + [len(d.grid_positions) for d in fine_disc_results])
+    floors = np.searchsorted(coarse_starts, nodes, side="right") - 1
+
+    fine_nodes = np.empty(len(nodes), dtype=np.int32)
+    for floor_idx in np.unique(floors):
+        mask = floors == floor_idx
+        coarse_disc = coarse_disc_results[floor_idx]
+        fine_disc = fine_disc_results[floor_idx]
+        coarse_coords = coarse_disc.grid_positions[nodes[mask] - coarse_starts[floor_idx]]
+        real_coords = coarse_disc.scaling_info.to_real(coarse_coords)
+        fine_nodes[mask] = (
+            fine_disc.nearest_nodes(fine_disc.scaling_info.to_grid(real_coords))
+            + fine_starts[floor_idx]
+        )
+    return fine_nodes
+
+
+def _map_population(population: list, map_nodes: Callable) -> list[Genome]:
+    """
+    Moves individuals (genomes or dicts) to another grid: map_nodes gets all
+    their centroid nodes in one array and returns the new nodes.
+    """
+    genomes = [
+        ind if isinstance(ind, Genome) else Genome.from_dict(ind, ind.keys())
+        for ind in population
+    ]
+    if not genomes:
+        return []
+
+    mapped_nodes = map_nodes(np.concatenate([g.centroids[:, 0] for g in genomes]))
+    splits = np.cumsum([len(g.centroids) for g in genomes])[:-1]
+
+    mapped = []
+    for genome, nodes in zip(genomes, np.split(mapped_nodes, splits)):
+        centroids = genome.centroids.copy()
+        centroids[:, 0] = nodes
+        mapped.append(Genome(genome.type_names, centroids, genome.offsets.copy()))
+    return mapped
+
+
+def upsample_population(
+    coarse_pop: list,
+    coarse_disc_results: list[DiscretizationResult],
+    fine_disc_results: list[DiscretizationResult],
+) -> list[Genome]:
+    """Maps coarse-grid individuals (genomes or dicts) to fine-grid genomes in one batch."""
+    return _map_population(
+        coarse_pop, lambda nodes: _upsample_nodes(nodes, coarse_disc_results, fine_disc_results)
+    )
+
+
 def upsample_individual(
     coarse_ind: Individual,
     coarse_disc_results: list[DiscretizationResult],
     fine_disc_results: list[DiscretizationResult],
 ) -> Individual:
     """Maps an individual from a coarse grid to the equivalent on a fine grid."""
-    fine_individual = Individual()
+    fine_genome = upsample_population([coarse_ind], coarse_disc_results, fine_disc_results)[0]
+    return Individual(fine_genome.items())
 
-    for type_name, coarse_nodes in coarse_ind.items():
-        if not coarse_nodes:
-            fine_individual[type_name] = []
-            continue
 
-        fine_nodes = []
-        for coarse_node_idx in coarse_nodes:
-            # Determine floor index
-            floor_idx = 0
-            offset = 0
-            for i, disc in enumerate(coarse_disc_results):
-                if coarse_node_idx < offset + len(disc.grid_positions):
-                    floor_idx = i
-                    break
-                offset += len(disc.grid_positions)
-
-            local_coarse_node_idx = coarse_node_idx - offset
-            coarse_disc = coarse_disc_results[floor_idx]
-            fine_disc = fine_disc_results[floor_idx]
-
-            # Coordinate mapping
-            coarse_coord = coarse_disc.grid_positions[local_coarse_node_idx]
-            real_coord = coarse_disc.scaling_info.to_real(coarse_coord)
-            target_fine_coord = fine_disc.scaling_info.to_grid(real_coord)
-
-            fine_tree = cKDTree(fine_disc.grid_positions)
-            _, fine_node_idx = fine_tree.query(target_fine_coord)
-
-            # Add global offset
-            fine_offset = sum(
-                len(fd.grid_positions) for fd in fine_disc_results[:floor_idx]
-            )
-            fine_nodes.append(int(fine_node_idx) + fine_offset)
+def _warm_start_pool(
+    seed: Genome, population: list[Genome], disc_results: list[DiscretizationResult], size: int
+) -> list[Genome]:
+    """
+    The seed plus up to size - 1 distinct members of `population` nearest to
+    it, so a branch's next stage starts from its own basin of the last one.
+    """
+    candidates = [ind for ind in population if ind.type_names == seed.type_names]
+    if size <= 1 or not candidates:
+        return [seed]
 
-        fine_individual[type_name] = fine_nodes
+    packed, offsets = FitnessEvaluator.pack_centroids([ind.centroids for ind in [seed] + candidates])
+    positions = np.ascontiguousarray(
+        np.concatenate([d.grid_positions for d in disc_results]), dtype=np.float64
+    )
+    distances = _distances_to_numba(packed, offsets, len(seed.type_names), positions, 0)[1:]
 
-    return fine_individual
+    pool, seen = [seed], {seed.centroids.tobytes()}
+    # Stable, so equally near members keep the population's best-first order
+    for i in np.argsort(distances, kind="stable"):
+        key = candidates[i].centroids.tobytes()
+        if key not in seen:
+            seen.add(key)
+            pool.append(candidates[i])
+            if len(pool) == size:
+                break
+    return pool
 
 
-def _run_optimization_stage(
+def _pyramid_levels(target_node_counts: list[int]) -> list[int]:
+    """
+    Grid pyramid level of each stage. Node counts grow about 4x per level,
+    so a stage gets the level nearest its target (never below the last).
+    """
+    ratios = np.maximum(np.asarray(target_node_counts, dtype=float) / target_node_counts[0], 1.0)
+    return np.maximum.accumulate(np.round(np.log(ratios) / np.log(4)).astype(int)).tolist()
+
+
+def _discretize_plans(plans: list[FloorPlan], target_node_count: int) -> list[DiscretizationResult]:
+    """Discretizes every floor with a grid of roughly target_node_count nodes (cached)."""
+    return [
+        _geometry_cache.discretize(plan, _geometry_cache.grid_size(plan, target_node_count))
+        for plan in plans
+    ]
+
+
+def _build_stage_evaluator(
     plans: list[FloorPlan],
     room_data: RoomData,
     target_node_count: int,
-    total_gfa: float = 100,
-    pop_size: int = 50,
-    generations: int = 100,
-    cxpb: float = 0.6,
-    mutpb: float = 0.4,
-    swap_pb: float = 0.1,
-    dup_pb: float = 0.05,
-    prune_pb: float = 0.05,
-    tournsize: int = 3,
-    stagnation_limit: int = 15,
-    w_area: float = 1.0,
-    w_adj: float = 1.0,
-    random_walk_decay: float = 0.05,
-    random_walk_scale: float = 10.0,
-    use_local_search: bool = True,
-    num_layouts: int = 3,
-    dynamic_rules: dict | None = None,
-    interactive: bool = False,
-    show_progress: bool = True,
-    render_every: int = 5,
-    initial_population: list[Individual] | None = None,
-    external_progress_callback: Callable | None = None,
-) -> tuple[list[OptimizationResult], list[DiscretizationResult]]:
-    """
-    Runs a single stage of the genetic optimization.
-    """
+    total_gfa: float,
+    w_area: float,
+    w_adj: float,
+    dynamic_rules: dict | None,
+    grid_sizes: list[int] | None,
+    lattice_graph_min_nodes: int,
+) -> tuple[list[DiscretizationResult], RoomData, DiscretizedGraph | LatticeGraph, FitnessEvaluator]:
+    """Discretizes a stage's plans and builds its graph and fitness evaluator."""
     # --- 1. Geometry Discretization ---
-    floor_disc_results: list[DiscretizationResult] = []
-    for plan in plans:
-        temp_poly = GeometryProcessor._create_combined_polygon(plan)
-        if temp_poly.is_empty:
-            raise ValueError(f"Polygon for floor '{plan.name}' is empty.")
-
-        area_per_node = temp_poly.area / target_node_count
-        grid_spacing = np.sqrt(area_per_node)
-        minx, miny, maxx, maxy = temp_poly.bounds
-        width, height = maxx - minx, maxy - miny
-        nx = int(np.ceil(width / grid_spacing))
-        ny = int(np.ceil(height / grid_spacing))
-        effective_n = max(nx, ny, 1)
-
-        floor_disc_results.append(GeometryProcessor.discretize(plan, n=effective_n))
-
-        normalized_zones_df = (
-            _normalize_zone_areas(room_data.selected_zones_df, total_gfa)
-            if room_data.selected_zones_df is not None
-            else None
-        )
+    if grid_sizes is None:
+        grid_sizes = [_geometry_cache.grid_size(plan, target_node_count) for plan in plans]
+    floor_disc_results = [_geometry_cache.discretize(plan, n) for plan, n in zip(plans, grid_sizes)]
+
+    normalized_zones_df = (
+        _normalize_zone_areas(room_data.selected_zones_df, total_gfa)
+        if room_data.selected_zones_df is not None
+        else None
+    )
 
     # Reconstruct room data with normalized areas, keeping the adjacency rules intact
     final_room_data = RoomData(
@@ -165,18 +219,19 @@ def _run_optimization_stage(
     )
 
     # --- 3. Graph Construction ---
-    floor_graphs, floor_connections, all_fixed_nodes = [], [], {}
+    n_nodes = sum(len(d.grid_positions) for d in floor_disc_results)
+    if 0 < lattice_graph_min_nodes <= n_nodes:
+        master_graph = _geometry_cache.lattice_graph(plans, grid_sizes)
+    else:
+        master_graph = _geometry_cache.stitched_graph(plans, grid_sizes)
+    all_fixed_nodes = {}
     node_offset = 0
     for disc_result in floor_disc_results:
-        graph = GraphBuilder.build_for_single_floor(disc_result)
-        floor_graphs.append(graph)
-        floor_connections.append(disc_result.connection_nodes)
         for type_name, nodes in disc_result.fixed_nodes.items():
             all_fixed_nodes.setdefault(type_name, []).extend(
                 [n + node_offset for n in nodes]
             )
-        node_offset += graph.n_nodes
-    master_graph = GraphBuilder.stitch_graphs(floor_graphs, floor_connections)
+        node_offset += len(disc_result.grid_positions)
 
     # --- 4. Evaluator Setup ---
     evaluator = FitnessEvaluator(
@@ -188,74 +243,27 @@ def _run_optimization_stage(
         w_adj=w_adj,
     )
 
-    # --- 5. Optimization Loop ---
-    optimizer = GeneticOptimizer(
-        pop_size=pop_size,
-        generations=generations,
-        cxpb=cxpb,
-        mutpb=mutpb,
-        swap_pb=swap_pb,
-        dup_pb=dup_pb,
-        prune_pb=prune_pb,
-        tournsize=tournsize,
-        stagnation_limit=stagnation_limit,
-        random_walk_decay=random_walk_decay,
-        random_walk_scale=random_walk_scale,
-    )
-
-    fig, ax = (None, None)
-    if interactive and show_progress and HAS_RENDERING:
-        fig, ax = plt.subplots(figsize=(10, 10))
-        plt.ion()
-
-    def progress_callback(gen, total_gen, fitness, best_ind):
-        # 1. Report to External (Worker/DB)
-        if external_progress_callback:
-            external_progress_callback(gen)
+    return floor_disc_results, final_room_data, master_graph, evaluator
 
-        # 2. Existing Interactive/Print Logic
-        if gen % render_every == 0:
-            if interactive and fig and ax:
-                # ... rendering logic ...
-                pass
-            elif show_progress:
-                print(
-                    f"  Stage Progress: Gen {gen}/{total_gen} | Fitness {fitness:.2f}"
-                )
 
-    hall_of_fame = optimizer.run(
-        graph=master_graph,
-        evaluator=evaluator,
-        num_layouts=num_layouts,
-        progress_callback=progress_callback,
-        initial_population=initial_population,
-        use_local_search=use_local_search,
-    )
-
-    if fig:
-        plt.close(fig)
-
-    # --- 6. Results Generation ---
+def _stage_results(
+    hall_of_fame: list[Individual],
+    plans: list[FloorPlan],
+    floor_disc_results: list[DiscretizationResult],
+    final_room_data: RoomData,
+    master_graph: DiscretizedGraph | LatticeGraph,
+    evaluator: FitnessEvaluator,
+    total_gfa: float,
+    interactive: bool,
+    termination: dict,
+    population: list[Individual],
+) -> list[OptimizationResult]:
+    """Renders a stage's scored layouts into OptimizationResults."""
     results: list[OptimizationResult] = []
 
     for i, ind in enumerate(hall_of_fame):
-        initial_centroids = np.array(
-            [
-                [node, evaluator.type_map[t]]
-                for t, nodes in ind.items()
-                for node in nodes
-                if t in evaluator.type_map
-            ],
-            dtype=np.int32,
-        )
-        final_assignment = _propagate_numba(
-            initial_centroids,
-            evaluator.target_counts,
-            master_graph.adj_indices,
-            master_graph.adj_indptr,
-            master_graph.n_nodes,
-            evaluator.n_types,
-        )
+        # Same centroid order the GA scored the genome with
+        final_assignment = evaluator.propagate(ind)
 
         counts = np.bincount(final_assignment, minlength=evaluator.n_types)
         proportions = counts / max(master_graph.n_nodes, 1)
@@ -326,9 +334,186 @@ def _run_optimization_stage(
                 floor_layouts=floor_layouts,
                 area_distribution=area_df,
                 fitness=ind.fitness.values[0],
+                termination=[termination],
+                population=population,
             )
         )
 
+    return results
+
+
+def _replay_stage(
+    genomes: list[Individual],
+    plans: list[FloorPlan],
+    room_data: RoomData,
+    target_node_count: int,
+    total_gfa: float = 100,
+    w_area: float = 1.0,
+    w_adj: float = 1.0,
+    dynamic_rules: dict | None = None,
+    interactive: bool = False,
+    grid_sizes: list[int] | None = None,
+    lattice_graph_min_nodes: int = 0,
+    **ga_settings,
+) -> tuple[list[OptimizationResult], list[DiscretizationResult]]:
+    """
+    Rebuilds the results of a stage that already finished from its saved
+    hall of fame: only those genomes are evaluated and rendered, no GA runs.
+    Takes the same arguments as _run_optimization_stage.
+    """
+    floor_disc_results, final_room_data, master_graph, evaluator = _build_stage_evaluator(
+        plans, room_data, target_node_count, total_gfa, w_area, w_adj,
+        dynamic_rules, grid_sizes, lattice_graph_min_nodes,
+    )
+    genomes = [genome.copy() for genome in genomes]
+    if genomes:
+        for genome, fitness in zip(genomes, evaluator.evaluate_population(genomes)):
+            genome.fitness.values = (float(fitness),)
+    results = _stage_results(
+        genomes, plans, floor_disc_results, final_room_data, master_graph, evaluator,
+        total_gfa, interactive, {}, [],
+    )
+    return results, floor_disc_results
+
+
+def _run_optimization_stage(
+    plans: list[FloorPlan],
+    room_data: RoomData,
+    target_node_count: int,
+    total_gfa: float = 100,
+    pop_size: int = 50,
+    generations: int = 100,
+    cxpb: float = 0.6,
+    mutpb: float = 0.4,
+    swap_pb: float = 0.1,
+    dup_pb: float = 0.05,
+    prune_pb: float = 0.05,
+    tournsize: int = 3,
+    stagnation_limit: int = 15,
+    w_area: float = 1.0,
+    w_adj: float = 1.0,
+    random_walk_decay: float = 0.05,
+    random_walk_scale: float = 10.0,
+    use_local_search: bool = True,
+    local_search_mode: str = "stochastic",
+    local_search_max_steps: int = 5,
+    hof_min_distance: float = 0.0,
+    hof_strategy: str = "fitness",
+    convergence_window: int = 10,
+    min_gain_per_second: float | None = None,
+    min_diversity: float | None = None,
+    time_budget_seconds: float | None = None,
+    max_evaluations: int | None = None,
+    warm_start_radius: int | None = None,
+    use_delta_evaluation: bool = True,
+    cache_max_entries: int = 100_000,
+    cache_max_memory_mb: float | None = None,
+    solution_store: SolutionStore | None = None,
+    parallel_backend: ParallelEvaluator | None = None,
+    n_islands: int = 1,
+    migration_interval: int = 10,
+    migration_size: int = 2,
+    migration_topology: str = "ring",
+    num_layouts: int = 3,
+    dynamic_rules: dict | None = None,
+    interactive: bool = False,
+    show_progress: bool = True,
+    render_every: int = 5,
+    initial_population: list[Individual] | None = None,
+    external_progress_callback: Callable | None = None,
+    checkpoint_callback: Callable | None = None,
+    resume_state: dict | None = None,
+    grid_sizes: list[int] | None = None,
+    lattice_graph_min_nodes: int = 0,
+) -> tuple[list[OptimizationResult], list[DiscretizationResult]]:
+    """
+    Runs a single stage of the genetic optimization. grid_sizes (one per
+    floor, e.g. a GridPyramid level) overrides the sizes derived from
+    target_node_count. Stages with at least lattice_graph_min_nodes nodes
+    (if > 0) run on an implicit LatticeGraph instead of CSR adjacency.
+    """
+    floor_disc_results, final_room_data, master_graph, evaluator = _build_stage_evaluator(
+        plans, room_data, target_node_count, total_gfa, w_area, w_adj,
+        dynamic_rules, grid_sizes, lattice_graph_min_nodes,
+    )
+
+    # --- 5. Optimization Loop ---
+    optimizer = GeneticOptimizer(
+        pop_size=pop_size,
+        generations=generations,
+        cxpb=cxpb,
+        mutpb=mutpb,
+        swap_pb=swap_pb,
+        dup_pb=dup_pb,
+        prune_pb=prune_pb,
+        tournsize=tournsize,
+        stagnation_limit=stagnation_limit,
+        random_walk_decay=random_walk_decay,
+        random_walk_scale=random_walk_scale,
+        use_delta_evaluation=use_delta_evaluation,
+        local_search_mode=local_search_mode,
+        local_search_max_steps=local_search_max_steps,
+        hof_min_distance=hof_min_distance,
+        hof_strategy=hof_strategy,
+        convergence_window=convergence_window,
+        min_gain_per_second=min_gain_per_second,
+        min_diversity=min_diversity,
+        time_budget_seconds=time_budget_seconds,
+        max_evaluations=max_evaluations,
+        warm_start_radius=warm_start_radius,
+        cache_max_entries=cache_max_entries,
+        cache_max_memory_mb=cache_max_memory_mb,
+        parallel_backend=parallel_backend,
+        n_islands=n_islands,
+        migration_interval=migration_interval,
+        migration_size=migration_size,
+        migration_topology=migration_topology,
+    )
+
+    fig, ax = (None, None)
+    if interactive and show_progress and HAS_RENDERING:
+        fig, ax = plt.subplots(figsize=(10, 10))
+        plt.ion()
+
+    def progress_callback(gen, total_gen, fitness, best_ind, cache_stats=None):
+        # 1. Report to External (Worker/DB)
+        if external_progress_callback:
+            external_progress_callback(gen)
+
+        # 2. Existing Interactive/Print Logic
+        if gen % render_every == 0:
+            if interactive and fig and ax:
+                # ... rendering logic ...
+                pass
+            elif show_progress:
+                cache_info = (
+                    f" | Cache {cache_stats['hit_rate']:.0%} hit, {cache_stats['size']} entries"
+                    if cache_stats
+                    else ""
+                )
+                print(
+                    f"  Stage Progress: Gen {gen}/{total_gen} | Fitness {fitness:.2f}{cache_info}"
+                )
+
+    hall_of_fame = optimizer.run(
+        graph=master_graph,
+        evaluator=evaluator,
+        num_layouts=num_layouts,
+        progress_callback=progress_callback,
+        initial_population=initial_population,
+        use_local_search=use_local_search,
+        solution_store=solution_store,
+        checkpoint=checkpoint_callback,
+        resume_from=resume_state,
+    )
+
+    if fig:
+        plt.close(fig)
+
+    results = _stage_results(
+        hall_of_fame, plans, floor_disc_results, final_room_data, master_graph, evaluator,
+        total_gfa, interactive, optimizer.termination, optimizer.final_population,
+    )
     return results, floor_disc_results
 
 
@@ -344,11 +529,337 @@ def run_multi_resolution_optimization(
     interactive: bool = False,
     show_progress: bool = True,
     progress_callback: Callable = None,
+    parallel_workers: int | None = None,
     **kwargs,
 ) -> list[OptimizationResult] | None:
     """
     Orchestrates the multi-resolution optimization strategy with BRANCHING.
+    With parallel_workers > 1, offspring are scored on one process pool that
+    is shared by every stage and branch (unless a parallel_backend is given).
+    local_search_steps optionally sets the steepest-descent budget per stage,
+    like generations and pop_sizes. time_budget_seconds and max_evaluations
+    cap the whole run: each stage gets a share of what is left in proportion
+    to its generations * pop_size, and a stage that runs out of budget
+    returns its best layouts so far. With a JobCheckpoint, progress is saved
+    as it goes and a rerun of the same job resumes from the last save.
+    With branch_workers > 1, the refinement branches run concurrently on a
+    process pool; results keep the coarse layouts' order. warm_start_size
+    and warm_start_radius enable population warm starts, and grid_pyramid
+    runs the refinement stages on one nested grid pyramid (see _refine_branch).
+    """
+    owns_backend = bool(parallel_workers and parallel_workers > 1) and not kwargs.get(
+        "parallel_backend"
+    )
+    if owns_backend:
+        kwargs["parallel_backend"] = ParallelEvaluator(max_workers=parallel_workers)
+    try:
+        return _run_branching_stages(
+            plans, room_data, target_node_counts, generations, pop_sizes, total_gfa,
+            num_layouts, dynamic_rules, interactive, show_progress, progress_callback,
+            **kwargs,
+        )
+    finally:
+        if owns_backend:
+            kwargs["parallel_backend"].shutdown()
+
+
+class _StageBudget:
+    """
+    Time and evaluation budget that is shared out over stages in proportion
+    to their work (generations * pop_size). Unused budget rolls over.
+    """
+
+    def __init__(
+        self, work: float, time_budget_seconds: float | None = None, max_evaluations: int | None = None
+    ):
+        self.work = work
+        self.deadline = (
+            time.perf_counter() + time_budget_seconds if time_budget_seconds is not None else None
+        )
+        self.evaluations = max_evaluations
+        self.spent = 0
+
+    def share(self, work: float) -> dict:
+        """Budget kwargs (time_budget_seconds, max_evaluations) for `work` more units of work."""
+        fraction = work / self.work if self.work > 0 else 1.0
+        self.work -= work
+        return self._fraction(fraction)
+
+    def split(self, n: int, concurrency: int) -> dict:
+        """
+        Budget kwargs for each of n equal parts of the remaining work, run
+        `concurrency` at a time: parts run in ceil(n / concurrency) waves, so
+        each gets that share of the time and 1/n of the evaluations.
+        """
+        budget = self._fraction(1.0 / n)
+        if "time_budget_seconds" in budget:
+            waves = -(-n // max(concurrency, 1))
+            budget["time_budget_seconds"] *= n / waves
+        return budget
+
+    def _fraction(self, fraction: float) -> dict:
+        budget = {}
+        if self.deadline is not None:
+            budget["time_budget_seconds"] = max(self.deadline - time.perf_counter(), 0.0) * fraction
+        if self.evaluations is not None:
+            budget["max_evaluations"] = int(self.evaluations * fraction)
+        return budget
+
+    def charge(self, evaluations: int) -> None:
+        self.spent += evaluations
+        if self.evaluations is not None:
+            self.evaluations = max(self.evaluations - evaluations, 0)
+
+
+def _stage_settings(
+    i: int, generations: list[int], pop_sizes: list[int], local_search_steps: list[int] | None
+) -> dict:
+    """GA settings of stage i; lists shorter than the stage count repeat their last entry."""
+    pick = lambda values: values[i] if i < len(values) else values[-1]
+    settings = {"generations": pick(generations), "pop_size": pick(pop_sizes)}
+    if local_search_steps:
+        settings["local_search_max_steps"] = pick(local_search_steps)
+    return settings
+
+
+def _run_checkpointed_stage(
+    key: str,
+    completed: dict,
+    running: dict | None,
+    save: Callable | None,
+    budget: _StageBudget,
+    **stage_kwargs,
+) -> tuple[list[OptimizationResult], list[DiscretizationResult]]:
+    """
+    Runs one stage of a job: resumed if `running` is its saved GA state, or
+    rebuilt from its saved hall of fame if `completed` already has it.
+    Records the finished stage in `completed`; save(ga_state) is called with
+    the GA's periodic checkpoints and save(None) once the stage is done.
+    """
+    done = completed.get(key)
+    if done is not None:
+        results, disc = _replay_stage(done["genomes"], **stage_kwargs)
+        for result in results:
+            result.termination = [done["termination"]]
+            result.population = done.get("population", [])
+        return results, disc
+
+    results, disc = _run_optimization_stage(
+        **stage_kwargs,
+        checkpoint_callback=(lambda ga_state: save({"key": key, **ga_state})) if save else None,
+        resume_state=running if running is not None and running["key"] == key else None,
+    )
+    if results:
+        budget.charge(results[0].termination[-1].get("evaluations", 0))
+    completed[key] = {
+        "genomes": [result.individual for result in results],
+        "termination": results[0].termination[-1] if results else {},
+        "population": results[0].population if results else [],
+    }
+    if save:
+        save(None)
+    return results, disc
+
+
+def _refine_branch(
+    idx: int,
+    coarse_result: OptimizationResult,
+    coarse_disc: list[DiscretizationResult],
+    target_node_counts: list[int],
+    generations: list[int],
+    pop_sizes: list[int],
+    local_search_steps: list[int] | None,
+    budget: _StageBudget,
+    completed: dict,
+    running: dict | None,
+    save: Callable | None,
+    progress: Callable,
+    warm_start_size: int = 0,
+    warm_start_radius: int = 2,
+    pyramid: GridPyramid | None = None,
+    **stage_kwargs,
+) -> OptimizationResult:
+    """
+    Refines one coarse layout through stages 2..n, upsampling the previous
+    stage's best layout into the next. With warm_start_size > 1, the next
+    stage is instead seeded with the previous stage's warm_start_size
+    layouts nearest the best one, padded with its perturbations within
+    warm_start_radius graph hops. With a grid pyramid, stages run on its
+    levels (see _pyramid_levels) and layouts move between them by its node
+    maps. progress(gens) reports the generations done in this branch so far.
     """
+    print(f"\n[Variation {idx + 1}] Refinement chain...")
+
+    current_individual = coarse_result.individual
+    current_population = coarse_result.population
+    current_disc = coarse_disc
+    termination = coarse_result.termination
+    gens_done = 0
+    levels = _pyramid_levels(target_node_counts) if pyramid is not None else None
+
+    for i in range(1, len(target_node_counts)):
+        target_nodes = target_node_counts[i]
+        settings = _stage_settings(i, generations, pop_sizes, local_search_steps)
+        settings.update(budget.share(settings["generations"] * settings["pop_size"]))
+
+        if pyramid is not None:
+            grid_sizes = pyramid.grid_sizes(levels[i])
+            fine_disc_dry_run = pyramid.levels[levels[i]]
+            map_nodes = lambda nodes, i=i: pyramid.map_nodes(nodes, levels[i - 1], levels[i])
+            n_nodes = sum(len(d.grid_positions) for d in fine_disc_dry_run)
+            print(f"  - Stage {i + 1}: Pyramid level {levels[i]} ({n_nodes} nodes)")
+        else:
+            grid_sizes = None
+            fine_disc_dry_run = _discretize_plans(stage_kwargs["plans"], target_nodes)
+            map_nodes = lambda nodes, coarse=current_disc, fine=fine_disc_dry_run: _upsample_nodes(
+                nodes, coarse, fine
+            )
+            print(f"  - Stage {i + 1}: Upsampling to ~{target_nodes} nodes")
+
+        key = f"branch{idx}/stage{i + 1}"
+        done = completed.get(key)
+        if done is not None and i < len(target_node_counts) - 1:
+            # Only the chain's final stage needs rebuilt results
+            current_individual = done["genomes"][0]
+            current_population = done.get("population", [])
+            current_disc = fine_disc_dry_run
+            termination = termination + [done["termination"]]
+            gens_done += settings["generations"]
+            progress(gens_done)
+            continue
+
+        seed_pop = _map_population(
+            _warm_start_pool(current_individual, current_population, current_disc, warm_start_size),
+            map_nodes,
+        )
+
+        offset = gens_done
+        results, disc = _run_checkpointed_stage(
+            key,
+            completed,
+            running,
+            save,
+            budget,
+            target_node_count=target_nodes,
+            grid_sizes=grid_sizes,
+            num_layouts=1,
+            initial_population=seed_pop,
+            warm_start_radius=warm_start_radius if warm_start_size > 1 else None,
+            show_progress=False,
+            external_progress_callback=lambda gen: progress(offset + gen),
+            **settings,
+            **stage_kwargs,
+        )
+
+        current_individual = results[0].individual
+        current_population = results[0].population
+        current_disc = disc
+        termination = results[0].termination = termination + results[0].termination
+        gens_done += settings["generations"]
+        progress(gens_done)
+
+    return results[0]
+
+
+def _refine_branch_worker(
+    progress_queue, seed: int, budget: dict, branch_kwargs: dict, checkpointing: bool
+) -> tuple:
+    """
+    Process-pool entry point for one branch; returns (result, completed
+    stages, evaluations). Progress goes to the queue as ("progress", idx,
+    gens) and, when checkpointing, each save as ("save", idx, completed,
+    running, evaluations).
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    idx = branch_kwargs["idx"]
+    branch_budget = _StageBudget(**budget)
+    completed = branch_kwargs.pop("completed")
+
+    def save(running):
+        progress_queue.put(("save", idx, dict(completed), running, branch_budget.spent))
+
+    result = _refine_branch(
+        **branch_kwargs,
+        budget=branch_budget,
+        completed=completed,
+        save=save if checkpointing else None,
+        progress=lambda gens: progress_queue.put(("progress", idx, gens)),
+    )
+    return result, completed, branch_budget.spent
+
+
+def _refine_branches_in_parallel(
+    branches: list[dict],
+    budgets: list[dict],
+    max_workers: int,
+    on_progress: Callable,
+    on_done: Callable,
+    on_save: Callable | None = None,
+) -> list[OptimizationResult]:
+    """
+    Runs the branch refinement chains on a spawn-context process pool.
+    on_progress(idx, gens), on_save(idx, completed, running, evaluations)
+    and on_done(idx, completed, evaluations) run in this process as
+    branches report; results come back in branch order.
+    """
+    handlers = {"progress": on_progress, "save": on_save}
+    ctx = mp.get_context("spawn")
+    with ctx.Manager() as manager, ProcessPoolExecutor(max_workers, mp_context=ctx) as pool:
+        progress_queue = manager.Queue()
+        futures = [
+            pool.submit(
+                _refine_branch_worker, progress_queue, random.getrandbits(32), budget, branch,
+                on_save is not None,
+            )
+            for branch, budget in zip(branches, budgets)
+        ]
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            while not progress_queue.empty():
+                kind, *message = progress_queue.get()
+                handlers[kind](*message)
+            for future in finished:
+                _, completed, evaluations = future.result()
+                on_done(futures.index(future), completed, evaluations)
+        return [future.result()[0] for future in futures]
+
+
+def _run_branching_stages(
+    plans: list[FloorPlan],
+    room_data: RoomData,
+    target_node_counts: list[int],
+    generations: list[int],
+    pop_sizes: list[int],
+    total_gfa: float,
+    num_layouts: int,
+    dynamic_rules: dict | None,
+    interactive: bool,
+    show_progress: bool,
+    progress_callback: Callable | None,
+    local_search_steps: list[int] | None = None,
+    time_budget_seconds: float | None = None,
+    max_evaluations: int | None = None,
+    checkpoint: JobCheckpoint | None = None,
+    branch_workers: int | None = None,
+    warm_start_size: int = 0,
+    warm_start_radius: int = 2,
+    grid_pyramid: bool = False,
+    **kwargs,
+) -> list[OptimizationResult] | None:
+
+    # --- Checkpointing: completed stages are replayed, the running one resumed ---
+    state = (checkpoint.load() if checkpoint else None) or {
+        "completed": {},
+        "running": None,
+        "running_branches": [],
+        "run_elapsed_seconds": 0.0,
+        "evaluations_left": max_evaluations,
+    }
+    if state["completed"] or state["running"]:
+        print(f"Resuming job from checkpoint ({len(state['completed'])} stages completed).")
+    run_start = time.perf_counter() - state["run_elapsed_seconds"]
 
     # --- 0. Calculate Total Work for Progress Bar ---
     # Stage 1 runs once.
@@ -359,107 +870,171 @@ def run_multi_resolution_optimization(
         remaining_gens = sum(generations[1:])
         total_generations_expected += remaining_gens * num_layouts
 
-    current_global_gen = 0
+    # Generations done by stage 1 and by each branch
+    gens_done = {"stage1": 0}
 
-    def report_stage_progress(gen_in_stage):
-        """Helper to normalize progress 0.0 -> 1.0"""
+    def report_progress(key, gens):
+        gens_done[key] = gens
         if progress_callback and total_generations_expected > 0:
-            p = (current_global_gen + gen_in_stage) / total_generations_expected
+            p = sum(gens_done.values()) / total_generations_expected
             progress_callback(min(p, 1.0))
 
-    # 1. Run STAGE 1 (Coarse) to find distinct topological starting points
-    print(f"\n--- Stage 1: Coarse Topology Search (~{target_node_counts[0]} nodes) ---")
+    # --- Budgets: each stage gets its work's share of what is left ---
+    def stage_work(i):
+        settings = _stage_settings(i, generations, pop_sizes, local_search_steps)
+        return settings["generations"] * settings["pop_size"]
 
-    # Use the first generation setting
-    gen_0 = generations[0]
-    pop_0 = pop_sizes[0]
+    branch_work = sum(stage_work(i) for i in range(1, len(target_node_counts)))
+    budget = _StageBudget(
+        stage_work(0) + num_layouts * branch_work,
+        time_budget_seconds - state["run_elapsed_seconds"] if time_budget_seconds is not None else None,
+        state["evaluations_left"],
+    )
+
+    def save_checkpoint(running=None, pending_evaluations=0):
+        if checkpoint is None:
+            return
+        state["running"] = running
+        state["run_elapsed_seconds"] = time.perf_counter() - run_start
+        if budget.evaluations is not None:
+            state["evaluations_left"] = max(budget.evaluations - pending_evaluations, 0)
+        checkpoint.save(state)
 
-    results_stage_1, disc_results_1 = _run_optimization_stage(
+    stage_kwargs = dict(
         plans=plans,
         room_data=room_data,
-        target_node_count=target_node_counts[0],
-        generations=gen_0,
-        pop_size=pop_0,
         total_gfa=total_gfa,
-        num_layouts=num_layouts,  # Get k distinct layouts here
         dynamic_rules=dynamic_rules,
         interactive=interactive,
-        show_progress=show_progress,
-        external_progress_callback=report_stage_progress,
         **kwargs,
     )
 
-    current_global_gen += generations[0]
+    # 1. Run STAGE 1 (Coarse) to find distinct topological starting points
+    print(f"\n--- Stage 1: Coarse Topology Search (~{target_node_counts[0]} nodes) ---")
+
+    settings = _stage_settings(0, generations, pop_sizes, local_search_steps)
+    settings.update(budget.share(stage_work(0)))
+    results_stage_1, disc_results_1 = _run_checkpointed_stage(
+        "stage1",
+        state["completed"],
+        state["running"],
+        save_checkpoint if checkpoint else None,
+        budget,
+        target_node_count=target_node_counts[0],
+        num_layouts=num_layouts,  # Get k distinct layouts here
+        show_progress=show_progress,
+        external_progress_callback=lambda gen: report_progress("stage1", gen),
+        **settings,
+        **stage_kwargs,
+    )
+    report_progress("stage1", generations[0])
+
+    # Stage 1 may return fewer distinct layouts than requested
+    budget.work = len(results_stage_1) * branch_work
 
     if len(target_node_counts) == 1:
         if progress_callback:
             progress_callback(1.0)
         return results_stage_1
 
-    # 2. Branching
-    final_branch_results = []
+    # 2. Branching. A grid pyramid's level 0 is stage 1's grid, so it is
+    # built once here and every branch reuses it.
+    pyramid = None
+    if grid_pyramid:
+        pyramid = _geometry_cache.pyramid(
+            plans,
+            [_geometry_cache.grid_size(plan, target_node_counts[0]) for plan in plans],
+            max(_pyramid_levels(target_node_counts)) + 1,
+        )
+
     print(
         f"\n--- Branching: Refining {len(results_stage_1)} distinct variations independently ---"
     )
 
-    for idx, coarse_result in enumerate(results_stage_1):
-        print(f"\n[Variation {idx + 1}] Refinement chain...")
-
-        current_individual = coarse_result.individual
-        current_disc = disc_results_1
-
-        for i in range(1, len(target_node_counts)):
-            target_nodes = target_node_counts[i]
-            # Handle cases where generations list might be shorter than node counts list
-            current_gen = generations[i] if i < len(generations) else generations[-1]
-            current_pop = pop_sizes[i] if i < len(pop_sizes) else pop_sizes[-1]
-
-            print(f"  - Stage {i + 1}: Upsampling to ~{target_nodes} nodes")
-
-            # Upsample logic (omitted for brevity, same as before)
-            fine_disc_dry_run = []  # ... (geometry code) ...
-            for plan in plans:
-                # ... (geometry creation same as existing code) ...
-                temp_poly = GeometryProcessor._create_combined_polygon(plan)
-                area_per_node = temp_poly.area / target_nodes
-                grid_spacing = np.sqrt(area_per_node)
-                minx, miny, maxx, maxy = temp_poly.bounds
-                width, height = maxx - minx, maxy - miny
-                nx = int(np.ceil(width / grid_spacing))
-                ny = int(np.ceil(height / grid_spacing))
-                effective_n = max(nx, ny, 1)
-                fine_disc_dry_run.append(
-                    GeometryProcessor.discretize(plan, n=effective_n)
+    branches = [
+        dict(
+            idx=idx,
+            coarse_result=coarse_result,
+            coarse_disc=disc_results_1,
+            target_node_counts=target_node_counts,
+            generations=generations,
+            pop_sizes=pop_sizes,
+            local_search_steps=local_search_steps,
+            warm_start_size=warm_start_size,
+            warm_start_radius=warm_start_radius,
+            pyramid=pyramid,
+            completed={
+                key: entry for key, entry in state["completed"].items() if key.startswith(f"branch{idx}/")
+            },
+            running=next(
+                (r for r in state.get("running_branches", []) if r["key"].startswith(f"branch{idx}/")),
+                state["running"],
+            ),
+            **stage_kwargs,
+        )
+        for idx, coarse_result in enumerate(results_stage_1)
+    ]
+
+    if branch_workers and branch_workers > 1 and len(branches) > 1:
+        # The offspring pool (if any) can't be shared with other processes
+        for branch in branches:
+            branch["parallel_backend"] = None
+
+        # Stages in progress and evaluations not yet charged, per branch
+        branch_running = {
+            branch["idx"]: branch["running"]
+            for branch in branches
+            if branch["running"] is not None and branch["running"]["key"].startswith(f"branch{branch['idx']}/")
+        }
+        branch_spent = {}
+
+        def save_branches():
+            state["running_branches"] = [r for r in branch_running.values() if r is not None]
+            save_checkpoint(None, sum(branch_spent.values()))
+
+        def on_branch_save(idx, completed, running, evaluations):
+            state["completed"].update(completed)
+            branch_running[idx], branch_spent[idx] = running, evaluations
+            save_branches()
+
+        def on_branch_done(idx, completed, evaluations):
+            state["completed"].update(completed)
+            branch_running.pop(idx, None)
+            branch_spent.pop(idx, None)
+            budget.charge(evaluations)
+            save_branches()
+
+        final_branch_results = _refine_branches_in_parallel(
+            branches,
+            [{"work": branch_work, **budget.split(len(branches), branch_workers)} for _ in branches],
+            branch_workers,
+            on_progress=lambda idx, gens: report_progress(idx, gens),
+            on_done=on_branch_done,
+            on_save=on_branch_save if checkpoint else None,
+        )
+    else:
+        # Sequential branches checkpoint their stage in progress as "running"
+        state["running_branches"] = []
+        final_branch_results = []
+        for branch in branches:
+            idx, completed = branch["idx"], branch.pop("completed")
+            branch_budget = _StageBudget(branch_work, **budget.share(branch_work))
+
+            def save_branch(running, completed=completed, branch_budget=branch_budget):
+                state["completed"].update(completed)
+                # Evaluations of this branch are charged to `budget` when it ends
+                save_checkpoint(running, branch_budget.spent)
+
+            final_branch_results.append(
+                _refine_branch(
+                    **branch,
+                    budget=branch_budget,
+                    completed=completed,
+                    save=save_branch if checkpoint else None,
+                    progress=lambda gens, idx=idx: report_progress(idx, gens),
                 )
-
-            seed_pop = [
-                upsample_individual(current_individual, current_disc, fine_disc_dry_run)
-            ]
-
-            results, disc = _run_optimization_stage(
-                plans=plans,
-                room_data=room_data,
-                target_node_count=target_nodes,
-                generations=current_gen,
-                pop_size=current_pop,
-                total_gfa=total_gfa,
-                num_layouts=1,
-                dynamic_rules=dynamic_rules,
-                initial_population=seed_pop,
-                interactive=interactive,
-                show_progress=False,
-                external_progress_callback=report_stage_progress,  # Pass hook
-                **kwargs,
             )
-
-            current_individual = results[0].individual
-            current_disc = disc
-
-            # Update global counter after this specific stage branch completes
-            current_global_gen += current_gen
-
-            if i == len(target_node_counts) - 1:
-                final_branch_results.append(results[0])
+            budget.charge(branch_budget.spent)
 
     if progress_callback:
         progress_callback(1.0)
@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+
+from floorplan.data_models import (
+    DiscretizationResult,
+    DiscretizedGraph,
+    FloorPlan,
+    Genome,
+    GridPyramid,
+    Individual,
+    LatticeGraph,
+)
+from floorplan.evaluation import OBJECTIVE_VERSION, FitnessEvaluator
+from floorplan.geometry import GeometryProcessor
+from floorplan.graph import GraphBuilder
+
+# Rough footprint of one entry (dict slot, int key, fitness tuple), used to
+# translate a memory cap into an entry cap.
+_ENTRY_BYTES = 200
+
+
+def zobrist_keys(type_idx: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """
+    Pseudo-random 64-bit key per (type, node) pair (splitmix64 finaliser).
+    Keys are a pure function of their inputs, so hashes built from them are
+    stable across processes and runs.
+    """
+    with np.errstate(over="ignore"):
+        z = (type_idx.astype(np.uint64) << np.uint64(32)) ^ nodes.astype(np.uint64)
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class FitnessCache:
+    """
+    Bounded LRU cache of fitness values keyed by an O(genome) Zobrist-style
+    hash of an individual's centroids.
+
+    The hash is the wrapping sum of per-(type, node) keys, so like a sorted
+    key it ignores centroid order within a type but counts duplicates.
+    """
+
+    def __init__(
+        self,
+        type_names: list[str],
+        max_entries: int = 100_000,
+        max_memory_mb: float | None = None,
+    ):
+        self.type_map = {name: i for i, name in enumerate(type_names)}
+        self.max_entries = max_entries
+        if max_memory_mb is not None:
+            self.max_entries = min(
+                max_entries, int(max_memory_mb * 1024 * 1024 / _ENTRY_BYTES)
+            )
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, individual: Individual | Genome) -> int:
+        if isinstance(individual, Genome):
+            keys = zobrist_keys(individual.centroids[:, 1], individual.centroids[:, 0])
+            return int(keys.sum(dtype=np.uint64))
+        type_idx, nodes = [], []
+        for type_name, centroids in individual.items():
+            if type_name in self.type_map:
+                type_idx.extend([self.type_map[type_name]] * len(centroids))
+                nodes.extend(centroids)
+        keys = zobrist_keys(np.asarray(type_idx), np.asarray(nodes))
+        return int(keys.sum(dtype=np.uint64))
+
+    def get(self, key: int) -> tuple | None:
+        fitness = self._entries.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return fitness
+
+    def put(self, key: int, fitness: tuple) -> None:
+        self._entries[key] = fitness
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def items(self):
+        return self._entries.items()
+
+    def preload(self, entries: dict[int, tuple]) -> None:
+        """Seeds the cache (e.g. from a SolutionStore) without touching stats."""
+        for key, fitness in entries.items():
+            if len(self._entries) >= self.max_entries:
+                break
+            self._entries[key] = fitness
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _array_bytes(value) -> int:
+    """Total size of the numpy arrays in a (nested) cached value."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if is_dataclass(value):
+        return sum(_array_bytes(getattr(value, f.name)) for f in fields(value))
+    if isinstance(value, dict):
+        return sum(_array_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_array_bytes(v) for v in value)
+    return 0
+
+
+class GeometryCache:
+    """
+    LRU cache of per-floor grid sizes and DiscretizationResults, keyed by the
+    plan's content hash and the grid size, and of stitched multi-floor graphs
+    (CSR or implicit-lattice) keyed by all their floors' keys. Stages and
+    branches of a job (and jobs on the same plans) share the entries, so
+    callers must not mutate them. Jobs run on concurrent threads, so the
+    entries are guarded by a lock; values are built outside it, and two
+    threads missing on the same key may both build it.
+    """
+
+    def __init__(self, max_entries: int = 32, max_memory_mb: float | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_memory_mb * 1024 * 1024 if max_memory_mb is not None else None
+        self._entries: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "GeometryCache":
+        """
+        Sized by $FLOORPLAN_GEOMETRY_CACHE_SIZE (default 32 entries; 0
+        disables caching) and $FLOORPLAN_GEOMETRY_CACHE_MB (default 1024 MB
+        of arrays).
+        """
+        return cls(
+            int(os.environ.get("FLOORPLAN_GEOMETRY_CACHE_SIZE", "32")),
+            float(os.environ.get("FLOORPLAN_GEOMETRY_CACHE_MB", "1024")),
+        )
+
+    @staticmethod
+    def plan_key(plan: FloorPlan) -> str:
+        return hashlib.sha256(plan.model_dump_json().encode()).hexdigest()
+
+    def _get_or_build(self, key: tuple, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = build()
+        size = _array_bytes(value)
+        if self.max_entries <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return value
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+        return value
+
+    def grid_size(self, plan: FloorPlan, target_node_count: int) -> int:
+        return self._get_or_build(
+            ("grid_size", self.plan_key(plan), target_node_count),
+            lambda: GeometryProcessor.grid_size(plan, target_node_count),
+        )
+
+    def discretize(self, plan: FloorPlan, n: int) -> DiscretizationResult:
+        return self._get_or_build(
+            ("discretization", self.plan_key(plan), n),
+            lambda: GeometryProcessor.discretize(plan, n=n),
+        )
+
+    def stitched_graph(self, plans: list[FloorPlan], grid_sizes: list[int]) -> DiscretizedGraph:
+        """The graph of all floors, each discretized at its grid size, stitched at the connections."""
+
+        def build():
+            discs = [self.discretize(plan, n) for plan, n in zip(plans, grid_sizes)]
+            return GraphBuilder.stitch_graphs(
+                [GraphBuilder.build_for_single_floor(d) for d in discs],
+                [d.connection_nodes for d in discs],
+                [plan.name for plan in plans],
+            )
+
+        key = tuple(zip((self.plan_key(plan) for plan in plans), grid_sizes))
+        return self._get_or_build(("graph", key), build)
+
+    def lattice_graph(self, plans: list[FloorPlan], grid_sizes: list[int]) -> LatticeGraph:
+        """stitched_graph as an implicit LatticeGraph."""
+
+        def build():
+            discs = [self.discretize(plan, n) for plan, n in zip(plans, grid_sizes)]
+            return GraphBuilder.build_lattice(discs, [plan.name for plan in plans])
+
+        key = tuple(zip((self.plan_key(plan) for plan in plans), grid_sizes))
+        return self._get_or_build(("lattice", key), build)
+
+    def pyramid(self, plans: list[FloorPlan], base_sizes: list[int], n_levels: int) -> GridPyramid:
+        """The floors' nested grid pyramid (see GeometryProcessor.build_pyramid)."""
+        key = tuple(zip((self.plan_key(plan) for plan in plans), base_sizes))
+        return self._get_or_build(
+            ("pyramid", key, n_levels),
+            lambda: GeometryProcessor.build_pyramid(plans, base_sizes, n_levels, discretize=self.discretize),
+        )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# --- Cross-Job Persistence ---
+
+
+def problem_fingerprint(evaluator: FitnessEvaluator) -> str:
+    """
+    Hash of everything that determines a genome's fitness: the objective
+    version, the discretized graph, fixed nodes, target counts, adjacency
+    rules and dynamic rules. Jobs that differ only in e.g. the prompt
+    wording share a fingerprint.
+    """
+    h = hashlib.sha256()
+    for array in (
+        evaluator.grid_coords,
+        evaluator.adj_indices,
+        evaluator.adj_indptr,
+        evaluator.cell_raster,
+        evaluator.node_cells,
+        evaluator.node_floor,
+        evaluator.target_counts,
+        evaluator.rules_matrix,
+        evaluator.comp_weights,
+        evaluator.rect_weights,
+        evaluator.floor_cost_present,
+        evaluator.floor_cost_absent,
+    ):
+        h.update(np.ascontiguousarray(array).tobytes())
+    h.update(
+        json.dumps(
+            {
+                "objective_version": OBJECTIVE_VERSION,
+                "types": evaluator.type_names,
+                "fixed": {t: sorted(n) for t, n in sorted(evaluator.fixed_nodes.items())},
+                "weights": [evaluator.w_area, evaluator.w_adj],
+            }
+        ).encode()
+    )
+    return h.hexdigest()
+
+
+def _to_signed(key: int) -> int:
+    """Maps an unsigned 64-bit key into SQLite's signed INTEGER range."""
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+
+def _to_unsigned(key: int) -> int:
+    return key + (1 << 64) if key < 0 else key
+
+
+class SolutionStore:
+    """
+    Local SQLite store of evaluated genomes and final elites, shared across
+    jobs. Fitness entries are keyed by problem fingerprint; elites also by a
+    lineage key (the seed population of a refinement stage), so independent
+    branches of one job do not seed each other.
+    """
+
+    def __init__(self, path: str = "solution_cache.db", max_entries_per_problem: int = 200_000):
+        self.path = path
+        self.max_entries_per_problem = max_entries_per_problem
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fitness_entries ("
+                " fingerprint TEXT NOT NULL, genome_key INTEGER NOT NULL, fitness REAL NOT NULL,"
+                " PRIMARY KEY (fingerprint, genome_key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS elites ("
+                " fingerprint TEXT NOT NULL, lineage TEXT NOT NULL, rank INTEGER NOT NULL,"
+                " genome TEXT NOT NULL, fitness REAL NOT NULL,"
+                " PRIMARY KEY (fingerprint, lineage, rank))"
+            )
+
+    @classmethod
+    def from_env(cls) -> "SolutionStore | None":
+        """Store at $FLOORPLAN_SOLUTION_CACHE (default next to floorplan.db); '' disables it."""
+        path = os.environ.get("FLOORPLAN_SOLUTION_CACHE", "solution_cache.db")
+        return cls(path) if path else None
+
+    def load_fitness(self, fingerprint: str, limit: int) -> dict[int, tuple]:
+        with closing(sqlite3.connect(self.path)) as conn:
+            rows = conn.execute(
+                "SELECT genome_key, fitness FROM fitness_entries WHERE fingerprint = ?"
+                " ORDER BY rowid DESC LIMIT ?",
+                (fingerprint, limit),
+            ).fetchall()
+        return {_to_unsigned(key): (fitness,) for key, fitness in rows}
+
+    def save_fitness(self, fingerprint: str, entries) -> None:
+        rows = [(fingerprint, _to_signed(key), fit[0]) for key, fit in entries]
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO fitness_entries VALUES (?, ?, ?)", rows
+            )
+            # Keep only the most recent entries per problem
+            conn.execute(
+                "DELETE FROM fitness_entries WHERE fingerprint = ? AND rowid NOT IN ("
+                " SELECT rowid FROM fitness_entries WHERE fingerprint = ?"
+                " ORDER BY rowid DESC LIMIT ?)",
+                (fingerprint, fingerprint, self.max_entries_per_problem),
+            )
+
+    def load_elites(self, fingerprint: str, lineage: str) -> list[tuple[dict, float]]:
+        with closing(sqlite3.connect(self.path)) as conn:
+            rows = conn.execute(
+                "SELECT genome, fitness FROM elites"
+                " WHERE fingerprint = ? AND lineage = ? ORDER BY rank",
+                (fingerprint, lineage),
+            ).fetchall()
+        return [(json.loads(genome), fitness) for genome, fitness in rows]
+
+    def save_elites(self, fingerprint: str, lineage: str, individuals: list[Individual]) -> None:
+        rows = [
+            (fingerprint, lineage, rank, json.dumps({t: [int(n) for n in nodes] for t, nodes in ind.items()}), ind.fitness.values[0])
+            for rank, ind in enumerate(individuals)
+        ]
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "DELETE FROM elites WHERE fingerprint = ? AND lineage = ?",
+                (fingerprint, lineage),
+            )
+            conn.executemany("INSERT INTO elites VALUES (?, ?, ?, ?, ?)", rows)
@@ -0,0 +1,150 @@
+import json
+import os
+
+import numpy as np
+
+from floorplan.data_models import Genome
+
+
+class JobCheckpoint:
+    """
+    Resumable state of one optimization job, kept in a compressed .npz file
+    that is replaced atomically on every save. The state is a dict:
+
+      completed: {stage key: {"genomes": [Genome], "termination": dict,
+                              optionally "population": [Genome]}}
+      running:   None, or the GA state of the stage in progress
+                 ("key", "generation", "population", "random_state",
+                 "numpy_random_state", "evaluations", "elapsed_seconds")
+      running_branches: GA states of the stages in progress in branches
+                 refined in parallel (optional)
+      run_elapsed_seconds, evaluations_left: the job's budget spent so far
+
+    Genomes are stored as packed centroid/offset/fitness arrays and the rest
+    as JSON, so loading a checkpoint never unpickles anything.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def for_job(cls, job_id: str) -> "JobCheckpoint | None":
+        """Checkpoint in $FLOORPLAN_CHECKPOINT_DIR (default 'checkpoints'); '' disables it."""
+        directory = os.environ.get("FLOORPLAN_CHECKPOINT_DIR", "checkpoints")
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, f"{job_id}.npz"))
+
+    def save(self, state: dict) -> None:
+        arrays = {}
+
+        def pack(name: str, genomes: list[Genome]) -> dict:
+            offsets = np.zeros(len(genomes) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(g.centroids) for g in genomes])
+            arrays[f"{name}.centroids"] = (
+                np.concatenate([g.centroids for g in genomes]) if genomes else np.empty((0, 2), dtype=np.int32)
+            )
+            arrays[f"{name}.offsets"] = offsets
+            arrays[f"{name}.fitness"] = np.array(
+                [g.fitness.values[0] if g.fitness.valid else np.nan for g in genomes], dtype=np.float64
+            )
+            return {"array": name, "type_names": list(genomes[0].type_names) if genomes else []}
+
+        completed = {}
+        for i, (key, entry) in enumerate(state["completed"].items()):
+            completed[key] = {
+                "genomes": pack(f"completed{i}", entry["genomes"]),
+                "termination": entry["termination"],
+            }
+            if entry.get("population"):
+                completed[key]["population"] = pack(f"completed{i}.population", entry["population"])
+
+        def pack_running(name: str, running: dict | None) -> dict | None:
+            if running is None:
+                return None
+            rng_name, keys, pos, has_gauss, cached_gauss = running["numpy_random_state"]
+            arrays[f"{name}.numpy_random_keys"] = np.asarray(keys, dtype=np.uint32)
+            return {
+                **running,
+                "population": pack(name, running["population"]),
+                "numpy_random_state": [rng_name, int(pos), int(has_gauss), float(cached_gauss)],
+            }
+
+        arrays["meta"] = np.array(
+            json.dumps(
+                {
+                    "completed": completed,
+                    "running": pack_running("running", state.get("running")),
+                    "running_branches": [
+                        pack_running(f"running_branches{i}", running)
+                        for i, running in enumerate(state.get("running_branches", []))
+                    ],
+                    "run_elapsed_seconds": state.get("run_elapsed_seconds", 0.0),
+                    "evaluations_left": state.get("evaluations_left"),
+                }
+            )
+        )
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> dict | None:
+        """The last saved state, or None if there is none (or it is unreadable)."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+
+                def unpack(group: dict) -> list[Genome]:
+                    name, type_names = group["array"], tuple(group["type_names"])
+                    centroids = data[f"{name}.centroids"]
+                    offsets, fitness = data[f"{name}.offsets"], data[f"{name}.fitness"]
+                    genomes = []
+                    for p in range(len(offsets) - 1):
+                        rows = centroids[offsets[p] : offsets[p + 1]]
+                        genome = Genome.from_segments(
+                            type_names, [rows[rows[:, 1] == t, 0] for t in range(len(type_names))]
+                        )
+                        if not np.isnan(fitness[p]):
+                            genome.fitness.values = (float(fitness[p]),)
+                        genomes.append(genome)
+                    return genomes
+
+                def unpack_running(running: dict | None) -> dict | None:
+                    if running is None:
+                        return None
+                    version, internal, gauss = running["random_state"]
+                    name, pos, has_gauss, cached_gauss = running["numpy_random_state"]
+                    keys = data[f"{running['population']['array']}.numpy_random_keys"]
+                    return {
+                        **running,
+                        "population": unpack(running["population"]),
+                        "random_state": (version, tuple(internal), gauss),
+                        "numpy_random_state": (name, keys, pos, has_gauss, cached_gauss),
+                    }
+
+                state = {
+                    "completed": {
+                        key: {
+                            **entry,
+                            **{name: unpack(entry[name]) for name in ("genomes", "population") if name in entry},
+                        }
+                        for key, entry in meta["completed"].items()
+                    },
+                    "running": unpack_running(meta["running"]),
+                    "running_branches": [unpack_running(r) for r in meta.get("running_branches", [])],
+                    "run_elapsed_seconds": meta["run_elapsed_seconds"],
+                    "evaluations_left": meta["evaluations_left"],
+                }
+            return state
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
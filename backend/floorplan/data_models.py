@@ -1,11 +1,13 @@
 # floorplan/data_models.py
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Literal
 
 import numpy as np
 import pandas as pd
 from deap import base, creator
 from pydantic import BaseModel, Field
+from scipy.spatial import cKDTree
 from shapely.geometry import Polygon
 
 # --- 1. GA Individual Definition ---
@@ -17,6 +19,91 @@ if not hasattr(creator, "Individual"):
 
 Individual = creator.Individual
 
+
+class Genome:
+    """
+    Array-backed GA individual. Row i of `centroids` is [node, type_idx] and
+    rows are grouped by type, so type t owns rows offsets[t]:offsets[t + 1].
+    `centroids` is exactly the seed array the propagation kernels take.
+
+    Read-only mapping access (items(), genome[type_name], ...) adapts it to
+    code written for dict-of-lists individuals, e.g. result/JSON output.
+    """
+
+    __slots__ = ("type_names", "centroids", "offsets", "fitness")
+
+    def __init__(self, type_names: tuple[str, ...], centroids: np.ndarray, offsets: np.ndarray):
+        self.type_names = type_names
+        self.centroids = centroids
+        self.offsets = offsets
+        self.fitness = creator.FitnessMin()
+
+    @classmethod
+    def from_segments(cls, type_names: tuple[str, ...], segments: list) -> "Genome":
+        """Builds a genome from one node sequence per type (in type_names order)."""
+        lengths = [len(s) for s in segments]
+        offsets = np.zeros(len(type_names) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+        centroids = np.empty((offsets[-1], 2), dtype=np.int32)
+        if offsets[-1]:
+            centroids[:, 0] = np.concatenate([np.asarray(s, dtype=np.int32) for s in segments])
+            centroids[:, 1] = np.repeat(np.arange(len(type_names), dtype=np.int32), lengths)
+        return cls(type_names, centroids, offsets)
+
+    @classmethod
+    def from_dict(cls, individual: dict, type_names) -> "Genome":
+        """Converts a dict-of-lists individual; types outside type_names are dropped."""
+        type_names = tuple(type_names)
+        genome = cls.from_segments(type_names, [individual.get(t, []) for t in type_names])
+        fitness = getattr(individual, "fitness", None)
+        if fitness is not None and fitness.valid:
+            genome.fitness.values = fitness.values
+        return genome
+
+    def segment(self, type_idx: int) -> np.ndarray:
+        """View of one type's centroid nodes."""
+        return self.centroids[self.offsets[type_idx] : self.offsets[type_idx + 1], 0]
+
+    def copy(self) -> "Genome":
+        clone = Genome(self.type_names, self.centroids.copy(), self.offsets.copy())
+        if self.fitness.valid:
+            clone.fitness.values = self.fitness.values
+        return clone
+
+    def __deepcopy__(self, memo) -> "Genome":
+        # toolbox.clone() is copy.deepcopy()
+        return self.copy()
+
+    # --- dict-of-lists adapter ---
+
+    def keys(self):
+        return iter(self.type_names)
+
+    def __iter__(self):
+        return iter(self.type_names)
+
+    def __len__(self) -> int:
+        return len(self.type_names)
+
+    def __contains__(self, type_name) -> bool:
+        return type_name in self.type_names
+
+    def __getitem__(self, type_name: str) -> list[int]:
+        return self.segment(self.type_names.index(type_name)).tolist()
+
+    def get(self, type_name: str, default=None):
+        return self[type_name] if type_name in self.type_names else default
+
+    def items(self):
+        return [(t, self.segment(i).tolist()) for i, t in enumerate(self.type_names)]
+
+    def to_dict(self) -> dict[str, list[int]]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"Genome({self.to_dict()})"
+
+
 # --- 2. API Input Models (Pydantic) ---
 # Used for Validation and Request Body
 
@@ -55,6 +142,19 @@ class GlobalParameters(BaseModel):
     target_node_counts: list[int] = Field(default=[50, 300, 500])
     generations: list[int] = Field(default=[100, 100, 100])
     pop_sizes: list[int] = Field(default=[20, 50, 20])
+    # Optional hard budgets for the whole run, split across stages
+    time_budget_seconds: float | None = Field(default=None, gt=0)
+    max_evaluations: int | None = Field(default=None, gt=0)
+    # Warm start: seed each refinement stage with this many upsampled layouts
+    # of the previous stage, padded with perturbations of the best one
+    warm_start_size: int = Field(default=0, ge=0)
+    warm_start_radius: int = Field(default=2, ge=0)
+    # Refine on a nested grid pyramid (~4x nodes per level) instead of
+    # rediscretizing at every target_node_counts entry
+    grid_pyramid: bool = False
+    # Stages with at least this many nodes use an implicit LatticeGraph
+    # instead of CSR adjacency (0: never)
+    lattice_graph_min_nodes: int = Field(default=0, ge=0)
     text_prompt: str | None = ""
     # Toggle for interactive vs headless mode (default headless for API)
     interactive: bool = False
@@ -114,15 +214,99 @@ class FloorGeometry:
 
 @dataclass
 class DiscretizedGraph:
-    """Holds the complete, node-and-edge representation of the floor plan graph."""
+    """
+    Node-and-edge representation of the floor plan graph. Adjacency is held
+    only as CSR arrays (node i's neighbours are adj_indices[adj_indptr[i]:
+    adj_indptr[i + 1]], ascending), as int32 with float32 positions.
+    grid_coords is the float64 copy of the positions shared by the kernels.
+    """
 
     grid_positions: np.ndarray
     adj_indices: np.ndarray
     adj_indptr: np.ndarray
-    adjacency_list: dict[int, list[int]]
-    adjacency_edges_np: np.ndarray
     n_nodes: int
     floor_node_ranges: np.ndarray  # Shape (n_floors, 2) -> [start_idx, end_idx]
+    grid_coords: np.ndarray = field(init=False, repr=False, compare=False)
+    # Built on first access of adjacency_list only
+    _adjacency_list: dict[int, list[int]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        self.grid_positions = np.ascontiguousarray(self.grid_positions, dtype=np.float32).reshape(-1, 2)
+        self.grid_coords = self.grid_positions.astype(np.float64)
+        self.adj_indices = np.ascontiguousarray(self.adj_indices, dtype=np.int32)
+        self.adj_indptr = np.ascontiguousarray(self.adj_indptr, dtype=np.int32)
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """View of a node's neighbours."""
+        return self.adj_indices[self.adj_indptr[node] : self.adj_indptr[node + 1]]
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.adj_indptr)
+
+    @cached_property
+    def adjacency_edges_np(self) -> np.ndarray:
+        """(2, n_edges) int32 undirected edges (u, v), u < v, in CSR order; built on first access."""
+        rows = np.repeat(np.arange(self.n_nodes, dtype=np.int32), self.degrees())
+        upper = rows < self.adj_indices
+        return np.vstack([rows[upper], self.adj_indices[upper]])
+
+    @property
+    def adjacency_list(self) -> dict[int, list[int]]:
+        """Dict-of-lists adjacency for legacy callers; prefer neighbors()."""
+        if self._adjacency_list is None:
+            indices, bounds = self.adj_indices.tolist(), self.adj_indptr.tolist()
+            self._adjacency_list = {
+                i: indices[bounds[i] : bounds[i + 1]] for i in range(self.n_nodes)
+            }
+        return self._adjacency_list
+
+
+@dataclass
+class LatticeGraph:
+    """
+    Implicit 4-neighbour lattice graph for very large floors. Each node owns
+    one cell of the flattened cell_raster (-1 outside the floors; floors are
+    stacked row-wise and padded with -1), and its lattice neighbours are the
+    non-negative cells at node_cells[i] -/+ raster_width and -/+ 1. Only the
+    inter-floor connection edges are explicit, as CSR arrays (link_indices,
+    link_indptr) laid out like DiscretizedGraph's.
+    """
+
+    grid_positions: np.ndarray
+    cell_raster: np.ndarray
+    raster_width: int
+    node_cells: np.ndarray
+    link_indices: np.ndarray
+    link_indptr: np.ndarray
+    n_nodes: int
+    floor_node_ranges: np.ndarray  # Shape (n_floors, 2) -> [start_idx, end_idx]
+    grid_coords: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.grid_positions = np.ascontiguousarray(self.grid_positions, dtype=np.float32).reshape(-1, 2)
+        self.grid_coords = self.grid_positions.astype(np.float64)
+        self.cell_raster = np.ascontiguousarray(self.cell_raster, dtype=np.int32).ravel()
+        self.raster_width = int(self.raster_width)
+        self.node_cells = np.ascontiguousarray(self.node_cells, dtype=np.int32)
+        self.link_indices = np.ascontiguousarray(self.link_indices, dtype=np.int32)
+        self.link_indptr = np.ascontiguousarray(self.link_indptr, dtype=np.int32)
+
+    def _lattice_neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """(len(nodes), 4) raster reads, -1 where a side has no node."""
+        steps = np.array([-self.raster_width, -1, 1, self.raster_width])
+        return self.cell_raster[self.node_cells[nodes][:, None] + steps]
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """A node's neighbours, ascending (the order of the equivalent CSR graph)."""
+        lattice = self._lattice_neighbors(np.array([node]))[0]
+        links = self.link_indices[self.link_indptr[node] : self.link_indptr[node + 1]]
+        return np.sort(np.concatenate([lattice[lattice >= 0], links]))
+
+    def degrees(self) -> np.ndarray:
+        lattice = (self._lattice_neighbors(np.arange(self.n_nodes)) >= 0).sum(axis=1)
+        return lattice + np.diff(self.link_indptr)
 
 
 @dataclass
@@ -139,6 +323,10 @@ class OptimizationResult:
     floor_layouts: list[FloorLayout] = field(default_factory=list)
 
     svg_render: str | None = None
+    # One ConvergenceMonitor summary per stage that led to this layout
+    termination: list[dict] = field(default_factory=list)
+    # Final population of the stage that produced this layout, best first
+    population: list[Genome] = field(default_factory=list)
 
 
 @dataclass
@@ -170,3 +358,44 @@ class DiscretizationResult:
     fixed_nodes: dict[str, list[int]]
     connection_nodes: dict[str, int]  # {connection_id: node_idx}
     scaling_info: ScalingInfo
+    # Built on the first nearest_nodes() call, then reused by every upsampling
+    _tree: cKDTree | None = field(default=None, init=False, repr=False, compare=False)
+
+    def nearest_nodes(self, grid_coords: np.ndarray) -> np.ndarray:
+        """Indices of the grid nodes nearest to each of the (k, 2) grid coordinates."""
+        if self._tree is None:
+            self._tree = cKDTree(self.grid_positions)
+        return self._tree.query(np.asarray(grid_coords, dtype=float).reshape(-1, 2))[1]
+
+
+@dataclass
+class GridPyramid:
+    """
+    Nested discretizations of every floor at grid sizes base_sizes * 2**level,
+    so each cell of level l + 1 lies inside one cell of level l. Node maps use
+    the stitched graph's numbering (floors stacked in order):
+
+      parents[l]:  level l + 1 node -> level l node whose cell contains it
+      children[l]: level l node -> representative level l + 1 node
+
+    Where a polygon edge leaves a cell with no node on the other level, the
+    nearest node stands in.
+    """
+
+    base_sizes: list[int]
+    levels: list[list[DiscretizationResult]]  # [level][floor]
+    parents: list[np.ndarray]
+    children: list[np.ndarray]
+
+    def grid_sizes(self, level: int) -> list[int]:
+        return [n * 2**level for n in self.base_sizes]
+
+    def map_nodes(self, nodes: np.ndarray, from_level: int, to_level: int) -> np.ndarray:
+        """Maps nodes between any two levels with one gather per level in between."""
+        nodes = np.asarray(nodes, dtype=np.int32)
+        for level in range(from_level, to_level):
+            nodes = self.children[level][nodes]
+        for level in range(from_level - 1, to_level - 1, -1):
+            nodes = self.parents[level][nodes]
+        return nodes
+
@@ -2,7 +2,7 @@
 import datetime
 import uuid
 
-from sqlalchemy import JSON, Column, DateTime, String, Float, Text, create_engine
+from sqlalchemy import JSON, Column, DateTime, String, Float, Text, create_engine, inspect, text
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 # 1. Setup SQLite Engine
@@ -41,6 +41,21 @@ class Job(Base):
     # Capture exception traces if something breaks
     error_message = Column(Text, nullable=True)
 
+    # "host:pid:boot-token" of the process running (or last to run) the job
+    owner = Column(String, nullable=True)
+    # Renewed by the owner while it runs the job; once past, the owner is presumed dead
+    lease_expires = Column(DateTime, nullable=True)
+
+
+def add_missing_columns(bind) -> None:
+    """create_all() doesn't alter existing tables; adds columns newer than the database."""
+    existing = {column["name"] for column in inspect(bind).get_columns(Job.__tablename__)}
+    with bind.begin() as connection:
+        if "owner" not in existing:
+            connection.execute(text("ALTER TABLE jobs ADD COLUMN owner VARCHAR"))
+        if "lease_expires" not in existing:
+            connection.execute(text("ALTER TABLE jobs ADD COLUMN lease_expires DATETIME"))
+
 
 # 3. Define Job Model
 class GeneratedLayout(Base):
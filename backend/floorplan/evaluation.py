@@ -1,41 +1,135 @@
+import time
+from dataclasses import dataclass
+
 import numba
 import numpy as np
 import pandas as pd
-from numba import types as numba_types
-from numba.typed import List as NumbaTypedList
 
-from floorplan.data_models import DiscretizedGraph, Individual, RoomData
+from floorplan.data_models import DiscretizedGraph, Genome, Individual, LatticeGraph, RoomData
+from floorplan.operators import (
+    OPERATOR_SIGNATURES,
+    _crossover_batch_numba,
+    _distances_to_numba,
+    _mutate_batch_numba,
+    _perturb_batch_numba,
+)
 
+# Version of the fitness function. Bump it whenever a kernel change alters
+# the fitness of an unchanged problem, so that fitness values SolutionStore
+# persisted under the old objective stop being reused.
+OBJECTIVE_VERSION = 1
 
-@numba.jit(nopython=True, fastmath=True)
-def _propagate_numba(
+
+@dataclass
+class PropagationWorkspace:
+    """
+    Scratch buffers for _propagate_into_numba, allocated once per graph and
+    reused across calls. best_cost and winner_type are returned to their
+    neutral values (+inf / -1) by the kernel after every wavefront.
+    """
+
+    node_assignments: np.ndarray
+    best_cost: np.ndarray
+    winner_type: np.ndarray
+    wavefront: np.ndarray
+    next_wavefront: np.ndarray
+    current_counts: np.ndarray
+
+    @classmethod
+    def allocate(cls, n_nodes: int, n_types: int) -> "PropagationWorkspace":
+        return cls(
+            node_assignments=np.full(n_nodes, -1, dtype=np.int32),
+            best_cost=np.full(n_nodes, np.inf, dtype=np.float32),
+            winner_type=np.full(n_nodes, -1, dtype=np.int32),
+            wavefront=np.empty(n_nodes, dtype=np.int32),
+            next_wavefront=np.empty(n_nodes, dtype=np.int32),
+            current_counts=np.zeros(n_types, dtype=np.int32),
+        )
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _propagate_into_numba(
     initial_centroids: np.ndarray,
     target_counts: np.ndarray,
     adj_indices: np.ndarray,
     adj_indptr: np.ndarray,
-    n_nodes: int,
-    n_types: int,
-) -> np.ndarray:
+    node_assignments: np.ndarray,
+    best_cost: np.ndarray,
+    winner_type: np.ndarray,
+    wavefront: np.ndarray,
+    next_wavefront: np.ndarray,
+    current_counts: np.ndarray,
+) -> None:
     """
-    Expands from initial centroids to assign a type to every node in the graph.
+    Expands from initial centroids to assign a type to every node in the graph,
+    writing the result into node_assignments.
+
+    Only nodes adjacent to the current wavefront are visited, so one call costs
+    O(n_nodes + edges) and allocates nothing. Each new wavefront is sorted by
+    node index, which keeps the tie-breaking order of the dense formulation.
     """
-    node_assignments = np.full(n_nodes, -1, dtype=np.int32)
-    current_counts = np.zeros(n_types, dtype=np.int32)
-    MIN_PRIORITY_FLOOR = 1e-6
-    wavefront = NumbaTypedList.empty_list(numba_types.int32)
+    n_front = _seed_wavefront_numba(initial_centroids, node_assignments, current_counts, wavefront)
+    _grow_wavefront_numba(
+        wavefront,
+        next_wavefront,
+        n_front,
+        target_counts,
+        adj_indices,
+        adj_indptr,
+        node_assignments,
+        best_cost,
+        winner_type,
+        current_counts,
+    )
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _seed_wavefront_numba(
+    initial_centroids: np.ndarray,
+    node_assignments: np.ndarray,
+    current_counts: np.ndarray,
+    wavefront: np.ndarray,
+) -> int:
+    """
+    Clears node_assignments, assigns each centroid's node (first centroid
+    wins) and writes them to wavefront. Returns the wavefront size.
+    """
+    node_assignments[:] = -1
+    current_counts[:] = 0
 
+    n_front = 0
     for i in range(initial_centroids.shape[0]):
         node_idx, type_idx = initial_centroids[i, 0], initial_centroids[i, 1]
         if node_assignments[node_idx] == -1:
             node_assignments[node_idx] = type_idx
             current_counts[type_idx] += 1
-            wavefront.append(node_idx)
+            wavefront[n_front] = node_idx
+            n_front += 1
+    return n_front
+
 
-    next_wavefront = NumbaTypedList.empty_list(numba_types.int32)
-    while len(wavefront) > 0:
-        best_cost_for_target = np.full(n_nodes, np.inf, dtype=np.float32)
-        winner_type_for_target = np.full(n_nodes, -1, dtype=np.int32)
-        for source_node in wavefront:
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _grow_wavefront_numba(
+    wavefront: np.ndarray,
+    next_wavefront: np.ndarray,
+    n_front: int,
+    target_counts: np.ndarray,
+    adj_indices: np.ndarray,
+    adj_indptr: np.ndarray,
+    node_assignments: np.ndarray,
+    best_cost: np.ndarray,
+    winner_type: np.ndarray,
+    current_counts: np.ndarray,
+) -> None:
+    """
+    Grows the already-assigned sources in wavefront[:n_front] into the
+    unassigned (-1) nodes until no unassigned node is reachable.
+    """
+    MIN_PRIORITY_FLOOR = 1e-6
+    while n_front > 0:
+        n_next = 0
+        for w in range(n_front):
+            source_node = wavefront[w]
             source_type = node_assignments[source_node]
             target_count = target_counts[source_type]
             if current_counts[source_type] >= target_count:
@@ -49,141 +143,994 @@ def _propagate_numba(
             for i in range(start, end):
                 target_node = adj_indices[i]
                 if node_assignments[target_node] == -1:
-                    if cost < best_cost_for_target[target_node]:
-                        best_cost_for_target[target_node] = cost
-                        winner_type_for_target[target_node] = source_type
-
-        next_wavefront.clear()
-        for i in range(n_nodes):
-            target_node = np.int32(i)
-            winner_type = winner_type_for_target[target_node]
-            if winner_type != -1:
-                node_assignments[target_node] = winner_type
-                current_counts[winner_type] += 1
-                next_wavefront.append(target_node)
+                    if winner_type[target_node] == -1:
+                        next_wavefront[n_next] = target_node
+                        n_next += 1
+                    if cost < best_cost[target_node]:
+                        best_cost[target_node] = cost
+                        winner_type[target_node] = source_type
+
+        next_wavefront[:n_next].sort()
+        for w in range(n_next):
+            target_node = next_wavefront[w]
+            winner = winner_type[target_node]
+            node_assignments[target_node] = winner
+            current_counts[winner] += 1
+            best_cost[target_node] = np.inf
+            winner_type[target_node] = -1
+
         wavefront, next_wavefront = next_wavefront, wavefront
+        n_front = n_next
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _propagate_numba(
+    initial_centroids: np.ndarray,
+    target_counts: np.ndarray,
+    adj_indices: np.ndarray,
+    adj_indptr: np.ndarray,
+    n_nodes: int,
+    n_types: int,
+) -> np.ndarray:
+    """
+    Allocating convenience wrapper around _propagate_into_numba for one-off
+    calls (e.g. rendering the final layouts).
+    """
+    node_assignments = np.empty(n_nodes, dtype=np.int32)
+    _propagate_into_numba(
+        initial_centroids,
+        target_counts,
+        adj_indices,
+        adj_indptr,
+        node_assignments,
+        np.full(n_nodes, np.inf, dtype=np.float32),
+        np.full(n_nodes, -1, dtype=np.int32),
+        np.empty(n_nodes, dtype=np.int32),
+        np.empty(n_nodes, dtype=np.int32),
+        np.zeros(n_types, dtype=np.int32),
+    )
     return node_assignments
 
 
-@numba.jit(nopython=True, fastmath=True)
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _finalize_penalty_numba(
+    counts: np.ndarray,
+    floor_counts: np.ndarray,
+    bbox: np.ndarray,
+    adj_penalty: float,
+    compactness_reward: float,
+    target_counts: np.ndarray,
+    rect_weights: np.ndarray,
+    floor_cost_present: np.ndarray,
+    floor_cost_absent: np.ndarray,
+    w_area: float,
+    w_adj: float,
+) -> float:
+    """Combines per-type tallies into the final weighted penalty."""
+    area_penalty = 0.0
+    rect_penalty = 0.0
+    for t in range(counts.shape[0]):
+        area_penalty += (counts[t] - target_counts[t]) ** 2
+        # Rectangularity (bounding box fill rate); bbox rows are [min_x, max_x, min_y, max_y]
+        if rect_weights[t] != 0.0 and counts[t] > 0:
+            width = bbox[t, 1] - bbox[t, 0] + 1
+            height = bbox[t, 3] - bbox[t, 2] + 1
+            fill_ratio = counts[t] / (width * height)
+            rect_penalty += rect_weights[t] * (1.0 - fill_ratio)
+
+    count_penalty = 0.0
+    for f in range(floor_counts.shape[0]):
+        for t in range(floor_counts.shape[1]):
+            if floor_counts[f, t] > 0:
+                count_penalty += floor_cost_present[t]
+            else:
+                count_penalty += floor_cost_absent[t]
+
+    return (
+        (w_area * area_penalty)
+        + (w_adj * adj_penalty)
+        - compactness_reward
+        + rect_penalty
+        + count_penalty
+    )
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _node_tallies_numba(
+    node_assignment: np.ndarray,
+    grid_coords: np.ndarray,
+    node_floor: np.ndarray,
+    n_floors: int,
+    n_types: int,
+    rect_weights: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-type counts, per-floor counts and bounding boxes of an assignment."""
+    counts = np.zeros(n_types, dtype=np.int32)
+    floor_counts = np.zeros((n_floors, n_types), dtype=np.int32)
+    bbox = np.empty((n_types, 4), dtype=np.int32)
+    for t in range(n_types):
+        bbox[t, 0] = 999999
+        bbox[t, 1] = -999999
+        bbox[t, 2] = 999999
+        bbox[t, 3] = -999999
+
+    for i in range(node_assignment.shape[0]):
+        t_idx = node_assignment[i]
+        if t_idx != -1:
+            counts[t_idx] += 1
+            floor_counts[node_floor[i], t_idx] += 1
+            if rect_weights[t_idx] != 0.0:
+                x = np.int32(grid_coords[i, 0])
+                y = np.int32(grid_coords[i, 1])
+                if x < bbox[t_idx, 0]: bbox[t_idx, 0] = x
+                if x > bbox[t_idx, 1]: bbox[t_idx, 1] = x
+                if y < bbox[t_idx, 2]: bbox[t_idx, 2] = y
+                if y > bbox[t_idx, 3]: bbox[t_idx, 3] = y
+    return counts, floor_counts, bbox
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
 def _calculate_penalties_numba(
     node_assignment: np.ndarray,
     edges_u: np.ndarray,
     edges_v: np.ndarray,
-    grid_coords: np.ndarray,  # NEW: Need coordinates for shape analysis
+    grid_coords: np.ndarray,
+    node_floor: np.ndarray,
+    n_floors: int,
     rules_matrix: np.ndarray,
     target_counts: np.ndarray,
-    compactness_rules: np.ndarray,
-    rectangularity_rules: np.ndarray,  # NEW
-    per_floor_rules: np.ndarray,
-    floor_node_ranges: np.ndarray,
+    comp_weights: np.ndarray,
+    rect_weights: np.ndarray,
+    floor_cost_present: np.ndarray,
+    floor_cost_absent: np.ndarray,
     w_area: float,
     w_adj: float,
 ) -> float:
-    """Calculates all penalties in a single, fast Numba loop."""
-    n_types = target_counts.shape[0]
-
-    # 1. Area Penalty
-    counts = np.zeros(n_types, dtype=np.int32)
-    for i in range(node_assignment.shape[0]):
-        type_idx = node_assignment[i]
-        if type_idx != -1:
-            counts[type_idx] += 1
-    
-    area_penalty = 0.0
-    for i in range(n_types):
-        area_penalty += (counts[i] - target_counts[i]) ** 2
+    """
+    Calculates all penalties in one fused pass over the nodes (area, per-floor
+    counts, bounding boxes) and one over the edges (adjacency, compactness).
+    All rule arrays are dense per-type vectors precomputed by FitnessEvaluator.
+    """
+    counts, floor_counts, bbox = _node_tallies_numba(
+        node_assignment, grid_coords, node_floor, n_floors, target_counts.shape[0], rect_weights
+    )
 
-    # 2. Adjacency & Basic Compactness (Clustering)
     adj_penalty = 0.0
     compactness_reward = 0.0
-    
-    # Map compactness weights for fast lookup
-    comp_weights = np.zeros(n_types, dtype=np.float64)
-    for i in range(compactness_rules.shape[0]):
-        t_idx = np.int32(compactness_rules[i, 0])
-        comp_weights[t_idx] = compactness_rules[i, 1]
-
     for i in range(edges_u.shape[0]):
-        u, v = edges_u[i], edges_v[i]
-        type_u, type_v = node_assignment[u], node_assignment[v]
+        type_u, type_v = node_assignment[edges_u[i]], node_assignment[edges_v[i]]
         if type_u != -1 and type_v != -1:
             if type_u == type_v:
                 compactness_reward += comp_weights[type_u]
             else:
                 adj_penalty += rules_matrix[type_u, type_v]
 
-    # 3. Rectangularity (Bounding Box Fill Rate)
-    rect_penalty = 0.0
-    if rectangularity_rules.shape[0] > 0:
-        # Shape: (n_types, 4) -> [min_x, max_x, min_y, max_y]
-        bbox_tracker = np.empty((n_types, 4), dtype=np.int32)
-        # Init with inverted values
-        for t in range(n_types):
-            bbox_tracker[t, 0] = 999999
-            bbox_tracker[t, 1] = -999999
-            bbox_tracker[t, 2] = 999999
-            bbox_tracker[t, 3] = -999999
-            
-        for i in range(node_assignment.shape[0]):
-            t_idx = node_assignment[i]
-            if t_idx != -1:
-                x = np.int32(grid_coords[i, 0])
-                y = np.int32(grid_coords[i, 1])
-                
-                if x < bbox_tracker[t_idx, 0]: bbox_tracker[t_idx, 0] = x
-                if x > bbox_tracker[t_idx, 1]: bbox_tracker[t_idx, 1] = x
-                if y < bbox_tracker[t_idx, 2]: bbox_tracker[t_idx, 2] = y
-                if y > bbox_tracker[t_idx, 3]: bbox_tracker[t_idx, 3] = y
-
-        for i in range(rectangularity_rules.shape[0]):
-            t_idx = np.int32(rectangularity_rules[i, 0])
-            weight = rectangularity_rules[i, 1]
-            
-            if counts[t_idx] > 0:
-                width = bbox_tracker[t_idx, 1] - bbox_tracker[t_idx, 0] + 1
-                height = bbox_tracker[t_idx, 3] - bbox_tracker[t_idx, 2] + 1
-                bbox_area = width * height
-                
-                fill_ratio = counts[t_idx] / bbox_area
-                rect_penalty += weight * (1.0 - fill_ratio)
-
-    # 4. Per Floor Count Penalty
-    count_penalty = 0.0
-    if per_floor_rules.shape[0] > 0:
-        num_floors = floor_node_ranges.shape[0]
-        counts_per_floor = np.zeros((num_floors, n_types), dtype=np.int32)
-        
-        for i in range(node_assignment.shape[0]):
-            node_type = node_assignment[i]
-            if node_type != -1:
-                for floor_idx in range(num_floors):
-                    if floor_node_ranges[floor_idx, 0] <= i <= floor_node_ranges[floor_idx, 1]:
-                        counts_per_floor[floor_idx, node_type] += 1
-                        break
-                        
-        for i in range(per_floor_rules.shape[0]):
-            type_idx = np.int32(per_floor_rules[i, 0])
-            target = np.int32(per_floor_rules[i, 1])
-            weight = per_floor_rules[i, 2]
-            for floor_idx in range(num_floors):
-                actual = counts_per_floor[floor_idx, type_idx]
-                zone_exists = 1 if actual > 0 else 0
-                count_penalty += weight * (zone_exists - target) ** 2
+    return _finalize_penalty_numba(
+        counts,
+        floor_counts,
+        bbox,
+        adj_penalty,
+        compactness_reward,
+        target_counts,
+        rect_weights,
+        floor_cost_present,
+        floor_cost_absent,
+        w_area,
+        w_adj,
+    )
 
-    return (
-        (w_area * area_penalty)
-        + (w_adj * adj_penalty)
-        - compactness_reward
-        + rect_penalty 
-        + count_penalty
+
+@numba.jit(nopython=True, parallel=True, fastmath=True, cache=True)
+def _evaluate_population_numba(
+    packed_centroids: np.ndarray,
+    offsets: np.ndarray,
+    target_counts: np.ndarray,
+    adj_indices: np.ndarray,
+    adj_indptr: np.ndarray,
+    n_nodes: int,
+    n_types: int,
+    edges_u: np.ndarray,
+    edges_v: np.ndarray,
+    grid_coords: np.ndarray,
+    node_floor: np.ndarray,
+    n_floors: int,
+    rules_matrix: np.ndarray,
+    comp_weights: np.ndarray,
+    rect_weights: np.ndarray,
+    floor_cost_present: np.ndarray,
+    floor_cost_absent: np.ndarray,
+    w_area: float,
+    w_adj: float,
+    n_chunks: int,
+) -> np.ndarray:
+    """
+    Propagates and scores a whole population in one call.
+    Individual p owns rows offsets[p]:offsets[p + 1] of packed_centroids.
+    Individuals are strided across n_chunks parallel chunks (normally the
+    thread count), each with its own propagation workspace.
+    """
+    n_individuals = offsets.shape[0] - 1
+    fitness = np.empty(n_individuals, dtype=np.float64)
+    n_chunks = max(1, min(n_chunks, n_individuals))
+    for c in numba.prange(n_chunks):
+        node_assignment = np.empty(n_nodes, dtype=np.int32)
+        best_cost = np.full(n_nodes, np.inf, dtype=np.float32)
+        winner_type = np.full(n_nodes, -1, dtype=np.int32)
+        wavefront = np.empty(n_nodes, dtype=np.int32)
+        next_wavefront = np.empty(n_nodes, dtype=np.int32)
+        current_counts = np.zeros(n_types, dtype=np.int32)
+        for p in range(c, n_individuals, n_chunks):
+            _propagate_into_numba(
+                packed_centroids[offsets[p] : offsets[p + 1]],
+                target_counts,
+                adj_indices,
+                adj_indptr,
+                node_assignment,
+                best_cost,
+                winner_type,
+                wavefront,
+                next_wavefront,
+                current_counts,
+            )
+            fitness[p] = _calculate_penalties_numba(
+                node_assignment,
+                edges_u,
+                edges_v,
+                grid_coords,
+                node_floor,
+                n_floors,
+                rules_matrix,
+                target_counts,
+                comp_weights,
+                rect_weights,
+                floor_cost_present,
+                floor_cost_absent,
+                w_area,
+                w_adj,
+            )
+    return fitness
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _tally_nodes_numba(
+    nodes: np.ndarray,
+    n: int,
+    sign: int,
+    with_counts: bool,
+    node_assignment: np.ndarray,
+    node_floor: np.ndarray,
+    grid_coords: np.ndarray,
+    counts: np.ndarray,
+    floor_counts: np.ndarray,
+    col_hist: np.ndarray,
+    row_hist: np.ndarray,
+) -> None:
+    """Adds (sign=1) or removes (sign=-1) the node-level tallies of nodes[:n]."""
+    track_bbox = col_hist.shape[1] > 0
+    for r in range(n):
+        u = nodes[r]
+        t = node_assignment[u]
+        if t == -1:
+            continue
+        if with_counts:
+            counts[t] += sign
+        floor_counts[node_floor[u], t] += sign
+        if track_bbox:
+            col_hist[t, np.int32(grid_coords[u, 0])] += sign
+            row_hist[t, np.int32(grid_coords[u, 1])] += sign
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _region_edge_sums_numba(
+    region: np.ndarray,
+    n_region: int,
+    mark: np.ndarray,
+    stamp: int,
+    sign: float,
+    node_assignment: np.ndarray,
+    adj_indices: np.ndarray,
+    adj_indptr: np.ndarray,
+    rules_matrix: np.ndarray,
+    comp_weights: np.ndarray,
+    edge_sums: np.ndarray,
+) -> None:
+    """
+    Adds sign times the adjacency penalty / compactness reward of every edge
+    touching the region (nodes with mark == stamp), counting each edge once.
+    """
+    for r in range(n_region):
+        u = region[r]
+        type_u = node_assignment[u]
+        if type_u == -1:
+            continue
+        for i in range(adj_indptr[u], adj_indptr[u + 1]):
+            v = adj_indices[i]
+            if mark[v] == stamp and v < u:
+                continue
+            type_v = node_assignment[v]
+            if type_v == -1:
+                continue
+            if type_u == type_v:
+                edge_sums[1] += sign * comp_weights[type_u]
+            else:
+                edge_sums[0] += sign * rules_matrix[type_u, type_v]
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _build_tallies_numba(
+    node_assignment: np.ndarray,
+    edges_u: np.ndarray,
+    edges_v: np.ndarray,
+    node_floor: np.ndarray,
+    grid_coords: np.ndarray,
+    rules_matrix: np.ndarray,
+    comp_weights: np.ndarray,
+    counts: np.ndarray,
+    floor_counts: np.ndarray,
+    col_hist: np.ndarray,
+    row_hist: np.ndarray,
+    edge_sums: np.ndarray,
+) -> None:
+    """Recomputes every tally of a DeltaState from scratch."""
+    counts[:] = 0
+    floor_counts[:, :] = 0
+    col_hist[:, :] = 0
+    row_hist[:, :] = 0
+    edge_sums[:] = 0.0
+    all_nodes = np.arange(node_assignment.shape[0]).astype(np.int32)
+    _tally_nodes_numba(
+        all_nodes, all_nodes.shape[0], 1, True, node_assignment, node_floor,
+        grid_coords, counts, floor_counts, col_hist, row_hist,
+    )
+    for i in range(edges_u.shape[0]):
+        type_u, type_v = node_assignment[edges_u[i]], node_assignment[edges_v[i]]
+        if type_u != -1 and type_v != -1:
+            if type_u == type_v:
+                edge_sums[1] += comp_weights[type_u]
+            else:
+                edge_sums[0] += rules_matrix[type_u, type_v]
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _penalty_from_tallies_numba(
+    counts: np.ndarray,
+    floor_counts: np.ndarray,
+    col_hist: np.ndarray,
+    row_hist: np.ndarray,
+    edge_sums: np.ndarray,
+    target_counts: np.ndarray,
+    rect_weights: np.ndarray,
+    floor_cost_present: np.ndarray,
+    floor_cost_absent: np.ndarray,
+    w_area: float,
+    w_adj: float,
+) -> float:
+    """Same objective as _calculate_penalties_numba, read off running tallies."""
+    n_types = counts.shape[0]
+    bbox = np.zeros((n_types, 4), dtype=np.int32)
+    for t in range(n_types):
+        if rect_weights[t] == 0.0 or counts[t] == 0:
+            continue
+        while col_hist[t, bbox[t, 0]] == 0:
+            bbox[t, 0] += 1
+        bbox[t, 1] = col_hist.shape[1] - 1
+        while col_hist[t, bbox[t, 1]] == 0:
+            bbox[t, 1] -= 1
+        while row_hist[t, bbox[t, 2]] == 0:
+            bbox[t, 2] += 1
+        bbox[t, 3] = row_hist.shape[1] - 1
+        while row_hist[t, bbox[t, 3]] == 0:
+            bbox[t, 3] -= 1
+
+    return _finalize_penalty_numba(
+        counts,
+        floor_counts,
+        bbox,
+        edge_sums[0],
+        edge_sums[1],
+        target_counts,
+        rect_weights,
+        floor_cost_present,
+        floor_cost_absent,
+        w_area,
+        w_adj,
+    )
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _delta_move_numba(
+    seed_idx: int,
+    new_node: int,
+    seeds: np.ndarray,
+    target_counts: np.ndarray,
+    adj_indices: np.ndarray,
+    adj_indptr: np.ndarray,
+    node_floor: np.ndarray,
+    grid_coords: np.ndarray,
+    rules_matrix: np.ndarray,
+    comp_weights: np.ndarray,
+    node_assignment: np.ndarray,
+    counts: np.ndarray,
+    floor_counts: np.ndarray,
+    col_hist: np.ndarray,
+    row_hist: np.ndarray,
+    edge_sums: np.ndarray,
+    region: np.ndarray,
+    undo_assignment: np.ndarray,
+    mark: np.ndarray,
+    stamp: int,
+    moved_assignment: np.ndarray,
+    best_cost: np.ndarray,
+    winner_type: np.ndarray,
+    wavefront: np.ndarray,
+    next_wavefront: np.ndarray,
+    moved_counts: np.ndarray,
+) -> int:
+    """
+    Moves seed seed_idx to new_node and updates the assignment and tallies to
+    exactly those of a full evaluation. Wavefront priorities depend on global
+    type counts, so any move can reassign nodes far from it: the moved seeds
+    are re-propagated in full, and only the tallies of the nodes whose type
+    changed (the region, with mark == stamp) are patched. Returns the region
+    size; undo_assignment[:n] holds the region's previous types.
+    """
+    seeds[seed_idx, 0] = new_node
+    _propagate_into_numba(
+        seeds, target_counts, adj_indices, adj_indptr, moved_assignment,
+        best_cost, winner_type, wavefront, next_wavefront, moved_counts,
+    )
+
+    n_region = 0
+    for u in range(node_assignment.shape[0]):
+        if moved_assignment[u] != node_assignment[u]:
+            mark[u] = stamp
+            region[n_region] = u
+            n_region += 1
+
+    # Swap the region's contribution from its old types to its new ones
+    _region_edge_sums_numba(
+        region, n_region, mark, stamp, -1.0, node_assignment,
+        adj_indices, adj_indptr, rules_matrix, comp_weights, edge_sums,
+    )
+    _tally_nodes_numba(
+        region, n_region, -1, True, node_assignment, node_floor,
+        grid_coords, counts, floor_counts, col_hist, row_hist,
+    )
+    for r in range(n_region):
+        u = region[r]
+        undo_assignment[r] = node_assignment[u]
+        node_assignment[u] = moved_assignment[u]
+    _tally_nodes_numba(
+        region, n_region, 1, True, node_assignment, node_floor,
+        grid_coords, counts, floor_counts, col_hist, row_hist,
+    )
+    _region_edge_sums_numba(
+        region, n_region, mark, stamp, 1.0, node_assignment,
+        adj_indices, adj_indptr, rules_matrix, comp_weights, edge_sums,
+    )
+    return n_region
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _delta_revert_numba(
+    region: np.ndarray,
+    n_region: int,
+    undo_assignment: np.ndarray,
+    node_assignment: np.ndarray,
+    node_floor: np.ndarray,
+    grid_coords: np.ndarray,
+    counts: np.ndarray,
+    floor_counts: np.ndarray,
+    col_hist: np.ndarray,
+    row_hist: np.ndarray,
+) -> None:
+    """Restores the node-level tallies and assignment of a local delta move."""
+    _tally_nodes_numba(
+        region, n_region, -1, True, node_assignment, node_floor,
+        grid_coords, counts, floor_counts, col_hist, row_hist,
+    )
+    for r in range(n_region):
+        node_assignment[region[r]] = undo_assignment[r]
+    _tally_nodes_numba(
+        region, n_region, 1, True, node_assignment, node_floor,
+        grid_coords, counts, floor_counts, col_hist, row_hist,
     )
 
 
+@numba.jit(nopython=True, parallel=True, fastmath=True, cache=True)
+def _score_moves_numba(
+    move_seed: np.ndarray,
+    move_node: np.ndarray,
+    seeds: np.ndarray,
+    node_assignment: np.ndarray,
+    counts: np.ndarray,
+    floor_counts: np.ndarray,
+    col_hist: np.ndarray,
+    row_hist: np.ndarray,
+    edge_sums: np.ndarray,
+    target_counts: np.ndarray,
+    adj_indices: np.ndarray,
+    adj_indptr: np.ndarray,
+    node_floor: np.ndarray,
+    grid_coords: np.ndarray,
+    rules_matrix: np.ndarray,
+    comp_weights: np.ndarray,
+    rect_weights: np.ndarray,
+    floor_cost_present: np.ndarray,
+    floor_cost_absent: np.ndarray,
+    w_area: float,
+    w_adj: float,
+    n_chunks: int,
+) -> np.ndarray:
+    """
+    Exact fitness after each candidate move (seeds[move_seed[m]] ->
+    move_node[m]), all starting from the same base assignment and tallies.
+    Moves are split across n_chunks threads, each with private copies of the
+    base state that every move is applied to and reverted from.
+    """
+    n_moves = len(move_seed)
+    n_nodes = len(node_assignment)
+    scores = np.empty(n_moves, dtype=np.float64)
+    n_chunks = max(1, min(n_chunks, n_moves))
+
+    for c in numba.prange(n_chunks):
+        c_seeds = seeds.copy()
+        assignment = node_assignment.copy()
+        c_counts = counts.copy()
+        c_floor_counts = floor_counts.copy()
+        c_col_hist = col_hist.copy()
+        c_row_hist = row_hist.copy()
+        c_edge_sums = edge_sums.copy()
+        region = np.empty(n_nodes, dtype=np.int32)
+        undo_assignment = np.empty(n_nodes, dtype=np.int32)
+        mark = np.zeros(n_nodes, dtype=np.int64)
+        best_cost = np.full(n_nodes, np.inf, dtype=np.float32)
+        winner_type = np.full(n_nodes, -1, dtype=np.int32)
+        wavefront = np.empty(n_nodes, dtype=np.int32)
+        next_wavefront = np.empty(n_nodes, dtype=np.int32)
+        moved_assignment = np.empty(n_nodes, dtype=np.int32)
+        moved_counts = np.zeros(len(target_counts), dtype=np.int32)
+        stamp = 0
+
+        for m in range(c, n_moves, n_chunks):
+            seed_idx = move_seed[m]
+            old_node = c_seeds[seed_idx, 0]
+            saved_adj, saved_comp = c_edge_sums[0], c_edge_sums[1]
+            stamp += 1
+            n_region = _delta_move_numba(
+                seed_idx, move_node[m], c_seeds, target_counts, adj_indices,
+                adj_indptr, node_floor, grid_coords, rules_matrix, comp_weights,
+                assignment, c_counts, c_floor_counts, c_col_hist, c_row_hist,
+                c_edge_sums, region, undo_assignment, mark, stamp, moved_assignment,
+                best_cost, winner_type, wavefront, next_wavefront, moved_counts,
+            )
+            scores[m] = _penalty_from_tallies_numba(
+                c_counts, c_floor_counts, c_col_hist, c_row_hist, c_edge_sums,
+                target_counts, rect_weights, floor_cost_present,
+                floor_cost_absent, w_area, w_adj,
+            )
+            _delta_revert_numba(
+                region, n_region, undo_assignment, assignment, node_floor,
+                grid_coords, c_counts, c_floor_counts, c_col_hist, c_row_hist,
+            )
+            c_edge_sums[0], c_edge_sums[1] = saved_adj, saved_comp
+            c_seeds[seed_idx, 0] = old_node
+
+    return scores
+
+
+# --- Implicit Lattice Kernels ---
+# Counterparts of the propagation / penalty kernels for a LatticeGraph:
+# (link_indices, link_indptr, cell_raster, node_cells, raster_width) replace
+# adj_indices/adj_indptr (and the edge lists), and each node's neighbours are
+# read off the raster. Node u's k-th neighbour is the raster cell at
+# node_cells[u] + (-raster_width, -1, 1, raster_width)[k] for k < 4 (skipped
+# when -1) and link_indices[link_indptr[u] + k - 4] after that.
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _grow_wavefront_lattice_numba(
+    wavefront: np.ndarray,
+    next_wavefront: np.ndarray,
+    n_front: int,
+    target_counts: np.ndarray,
+    link_indices: np.ndarray,
+    link_indptr: np.ndarray,
+    cell_raster: np.ndarray,
+    node_cells: np.ndarray,
+    raster_width: int,
+    node_assignments: np.ndarray,
+    best_cost: np.ndarray,
+    winner_type: np.ndarray,
+    current_counts: np.ndarray,
+) -> None:
+    """_grow_wavefront_numba over a LatticeGraph."""
+    MIN_PRIORITY_FLOOR = 1e-6
+    steps = (-raster_width, -1, 1, raster_width)
+    while n_front > 0:
+        n_next = 0
+        for w in range(n_front):
+            source_node = wavefront[w]
+            source_type = node_assignments[source_node]
+            target_count = target_counts[source_type]
+            if current_counts[source_type] >= target_count:
+                priority = MIN_PRIORITY_FLOOR
+            else:
+                rem_pct = (target_count - current_counts[source_type]) / target_count
+                priority = rem_pct + MIN_PRIORITY_FLOOR
+
+            cost = 1.0 - priority
+            cell = node_cells[source_node]
+            first = link_indptr[source_node]
+            for k in range(4 + link_indptr[source_node + 1] - first):
+                if k < 4:
+                    target_node = cell_raster[cell + steps[k]]
+                    if target_node == -1:
+                        continue
+                else:
+                    target_node = link_indices[first + k - 4]
+                if node_assignments[target_node] == -1:
+                    if winner_type[target_node] == -1:
+                        next_wavefront[n_next] = target_node
+                        n_next += 1
+                    if cost < best_cost[target_node]:
+                        best_cost[target_node] = cost
+                        winner_type[target_node] = source_type
+
+        next_wavefront[:n_next].sort()
+        for w in range(n_next):
+            target_node = next_wavefront[w]
+            winner = winner_type[target_node]
+            node_assignments[target_node] = winner
+            current_counts[winner] += 1
+            best_cost[target_node] = np.inf
+            winner_type[target_node] = -1
+
+        wavefront, next_wavefront = next_wavefront, wavefront
+        n_front = n_next
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _propagate_lattice_into_numba(
+    initial_centroids: np.ndarray,
+    target_counts: np.ndarray,
+    link_indices: np.ndarray,
+    link_indptr: np.ndarray,
+    cell_raster: np.ndarray,
+    node_cells: np.ndarray,
+    raster_width: int,
+    node_assignments: np.ndarray,
+    best_cost: np.ndarray,
+    winner_type: np.ndarray,
+    wavefront: np.ndarray,
+    next_wavefront: np.ndarray,
+    current_counts: np.ndarray,
+) -> None:
+    """_propagate_into_numba over a LatticeGraph; the results are identical."""
+    n_front = _seed_wavefront_numba(initial_centroids, node_assignments, current_counts, wavefront)
+    _grow_wavefront_lattice_numba(
+        wavefront,
+        next_wavefront,
+        n_front,
+        target_counts,
+        link_indices,
+        link_indptr,
+        cell_raster,
+        node_cells,
+        raster_width,
+        node_assignments,
+        best_cost,
+        winner_type,
+        current_counts,
+    )
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _propagate_lattice_numba(
+    initial_centroids: np.ndarray,
+    target_counts: np.ndarray,
+    link_indices: np.ndarray,
+    link_indptr: np.ndarray,
+    cell_raster: np.ndarray,
+    node_cells: np.ndarray,
+    raster_width: int,
+    n_nodes: int,
+    n_types: int,
+) -> np.ndarray:
+    """Allocating wrapper around _propagate_lattice_into_numba."""
+    node_assignments = np.empty(n_nodes, dtype=np.int32)
+    _propagate_lattice_into_numba(
+        initial_centroids,
+        target_counts,
+        link_indices,
+        link_indptr,
+        cell_raster,
+        node_cells,
+        raster_width,
+        node_assignments,
+        np.full(n_nodes, np.inf, dtype=np.float32),
+        np.full(n_nodes, -1, dtype=np.int32),
+        np.empty(n_nodes, dtype=np.int32),
+        np.empty(n_nodes, dtype=np.int32),
+        np.zeros(n_types, dtype=np.int32),
+    )
+    return node_assignments
+
+
+@numba.jit(nopython=True, fastmath=True, cache=True)
+def _calculate_penalties_lattice_numba(
+    node_assignment: np.ndarray,
+    link_indices: np.ndarray,
+    link_indptr: np.ndarray,
+    cell_raster: np.ndarray,
+    node_cells: np.ndarray,
+    raster_width: int,
+    grid_coords: np.ndarray,
+    node_floor: np.ndarray,
+    n_floors: int,
+    rules_matrix: np.ndarray,
+    target_counts: np.ndarray,
+    comp_weights: np.ndarray,
+    rect_weights: np.ndarray,
+    floor_cost_present: np.ndarray,
+    floor_cost_absent: np.ndarray,
+    w_area: float,
+    w_adj: float,
+) -> float:
+    """
+    _calculate_penalties_numba over a LatticeGraph. Each edge (u, v), u < v,
+    is visited from u in the same order as the CSR edge list; the -width and
+    -1 cells always hold smaller nodes, so only the +1 / +width cells are read.
+    """
+    counts, floor_counts, bbox = _node_tallies_numba(
+        node_assignment, grid_coords, node_floor, n_floors, target_counts.shape[0], rect_weights
+    )
+
+    adj_penalty = 0.0
+    compactness_reward = 0.0
+    steps = (-raster_width, -1, 1, raster_width)
+    for u in range(node_assignment.shape[0]):
+        type_u = node_assignment[u]
+        if type_u == -1:
+            continue
+        cell = node_cells[u]
+        first = link_indptr[u]
+        for k in range(2, 4 + link_indptr[u + 1] - first):
+            if k < 4:
+                v = cell_raster[cell + steps[k]]
+            else:
+                v = link_indices[first + k - 4]
+            if v <= u:  # also skips empty cells (-1)
+                continue
+            type_v = node_assignment[v]
+            if type_v != -1:
+                if type_u == type_v:
+                    compactness_reward += comp_weights[type_u]
+                else:
+                    adj_penalty += rules_matrix[type_u, type_v]
+
+    return _finalize_penalty_numba(
+        counts,
+        floor_counts,
+        bbox,
+        adj_penalty,
+        compactness_reward,
+        target_counts,
+        rect_weights,
+        floor_cost_present,
+        floor_cost_absent,
+        w_area,
+        w_adj,
+    )
+
+
+@numba.jit(nopython=True, parallel=True, fastmath=True, cache=True)
+def _evaluate_population_lattice_numba(
+    packed_centroids: np.ndarray,
+    offsets: np.ndarray,
+    target_counts: np.ndarray,
+    link_indices: np.ndarray,
+    link_indptr: np.ndarray,
+    cell_raster: np.ndarray,
+    node_cells: np.ndarray,
+    raster_width: int,
+    n_nodes: int,
+    n_types: int,
+    grid_coords: np.ndarray,
+    node_floor: np.ndarray,
+    n_floors: int,
+    rules_matrix: np.ndarray,
+    comp_weights: np.ndarray,
+    rect_weights: np.ndarray,
+    floor_cost_present: np.ndarray,
+    floor_cost_absent: np.ndarray,
+    w_area: float,
+    w_adj: float,
+    n_chunks: int,
+) -> np.ndarray:
+    """_evaluate_population_numba over a LatticeGraph."""
+    n_individuals = offsets.shape[0] - 1
+    fitness = np.empty(n_individuals, dtype=np.float64)
+    n_chunks = max(1, min(n_chunks, n_individuals))
+    for c in numba.prange(n_chunks):
+        node_assignment = np.empty(n_nodes, dtype=np.int32)
+        best_cost = np.full(n_nodes, np.inf, dtype=np.float32)
+        winner_type = np.full(n_nodes, -1, dtype=np.int32)
+        wavefront = np.empty(n_nodes, dtype=np.int32)
+        next_wavefront = np.empty(n_nodes, dtype=np.int32)
+        current_counts = np.zeros(n_types, dtype=np.int32)
+        for p in range(c, n_individuals, n_chunks):
+            _propagate_lattice_into_numba(
+                packed_centroids[offsets[p] : offsets[p + 1]],
+                target_counts,
+                link_indices,
+                link_indptr,
+                cell_raster,
+                node_cells,
+                raster_width,
+                node_assignment,
+                best_cost,
+                winner_type,
+                wavefront,
+                next_wavefront,
+                current_counts,
+            )
+            fitness[p] = _calculate_penalties_lattice_numba(
+                node_assignment,
+                link_indices,
+                link_indptr,
+                cell_raster,
+                node_cells,
+                raster_width,
+                grid_coords,
+                node_floor,
+                n_floors,
+                rules_matrix,
+                target_counts,
+                comp_weights,
+                rect_weights,
+                floor_cost_present,
+                floor_cost_absent,
+                w_area,
+                w_adj,
+            )
+    return fitness
+
+
+# --- Explicit Kernel Signatures ---
+# Entry-point kernels and the canonical argument types FitnessEvaluator passes
+# them. compile_kernels() builds these ahead of the first job; together with
+# cache=True the machine code is persisted to __pycache__ (or NUMBA_CACHE_DIR).
+_i32 = numba.types.int32[::1]
+_i32_2d = numba.types.int32[:, ::1]
+_i64 = numba.types.int64[::1]
+_f32 = numba.types.float32[::1]
+_f64 = numba.types.float64[::1]
+_f64_2d = numba.types.float64[:, ::1]
+_int = numba.types.int64
+_float = numba.types.float64
+_void = numba.types.void
+
+KERNEL_SIGNATURES = {
+    _propagate_into_numba: [
+        _void(_i32_2d, _i64, _i32, _i32, _i32, _f32, _i32, _i32, _i32, _i32),
+    ],
+    _propagate_numba: [
+        _i32(_i32_2d, _i64, _i32, _i32, _int, _int),
+    ],
+    _calculate_penalties_numba: [
+        _float(_i32, _i32, _i32, _f64_2d, _i32, _int, _f64_2d, _i64, _f64, _f64, _f64, _f64, _float, _float),
+    ],
+    _evaluate_population_numba: [
+        _f64(
+            _i32_2d, _i64, _i64, _i32, _i32, _int, _int, _i32, _i32, _f64_2d,
+            _i32, _int, _f64_2d, _f64, _f64, _f64, _f64, _float, _float, _int,
+        ),
+    ],
+    _build_tallies_numba: [
+        _void(_i32, _i32, _i32, _i32, _f64_2d, _f64_2d, _f64, _i32, _i32_2d, _i32_2d, _i32_2d, _f64),
+    ],
+    _penalty_from_tallies_numba: [
+        _float(_i32, _i32_2d, _i32_2d, _i32_2d, _f64, _i64, _f64, _f64, _f64, _float, _float),
+    ],
+    _delta_move_numba: [
+        _int(
+            _int, _int, _i32_2d, _i64, _i32, _i32, _i32, _f64_2d, _f64_2d, _f64,
+            _i32, _i32, _i32_2d, _i32_2d, _i32_2d, _f64, _i32, _i32, _i64, _int,
+            _i32, _f32, _i32, _i32, _i32, _i32,
+        ),
+    ],
+    _delta_revert_numba: [
+        _void(_i32, _int, _i32, _i32, _i32, _f64_2d, _i32, _i32_2d, _i32_2d, _i32_2d),
+    ],
+    _score_moves_numba: [
+        _f64(
+            _i64, _i32, _i32_2d, _i32, _i32, _i32_2d, _i32_2d, _i32_2d, _f64, _i64,
+            _i32, _i32, _i32, _f64_2d, _f64_2d, _f64, _f64, _f64, _f64, _float,
+            _float, _int,
+        ),
+    ],
+    _propagate_lattice_into_numba: [
+        _void(_i32_2d, _i64, _i32, _i32, _i32, _i32, _int, _i32, _f32, _i32, _i32, _i32, _i32),
+    ],
+    _propagate_lattice_numba: [
+        _i32(_i32_2d, _i64, _i32, _i32, _i32, _i32, _int, _int, _int),
+    ],
+    _calculate_penalties_lattice_numba: [
+        _float(
+            _i32, _i32, _i32, _i32, _i32, _int, _f64_2d, _i32, _int, _f64_2d, _i64, _f64, _f64,
+            _f64, _f64, _float, _float,
+        ),
+    ],
+    _evaluate_population_lattice_numba: [
+        _f64(
+            _i32_2d, _i64, _i64, _i32, _i32, _i32, _i32, _int, _int, _int, _f64_2d, _i32,
+            _int, _f64_2d, _f64, _f64, _f64, _f64, _float, _float, _int,
+        ),
+    ],
+    # Batched GA variation operators
+    **OPERATOR_SIGNATURES,
+}
+
+
+def kernel_cache_stats() -> dict[str, dict]:
+    """Per-kernel count of compiled signatures and on-disk cache hits/misses."""
+    report = {}
+    for kernel in KERNEL_SIGNATURES:
+        stats = kernel.stats
+        report[kernel.py_func.__name__] = {
+            "compiled_signatures": len(kernel.signatures),
+            "cache_hits": sum(stats.cache_hits.values()),
+            "cache_misses": sum(stats.cache_misses.values()),
+        }
+    return report
+
+
+def compile_kernels() -> dict[str, dict]:
+    """
+    Compiles every kernel for its explicit signatures, loading from the
+    persistent cache where possible. Returns kernel_cache_stats() extended with
+    the wall time spent per kernel.
+    """
+    timings = {}
+    for kernel, signatures in KERNEL_SIGNATURES.items():
+        start = time.perf_counter()
+        for signature in signatures:
+            kernel.compile(signature)
+        timings[kernel.py_func.__name__] = time.perf_counter() - start
+
+    report = kernel_cache_stats()
+    for name, seconds in timings.items():
+        report[name]["compile_seconds"] = round(seconds, 3)
+    return report
+
+
+@dataclass
+class DeltaState:
+    """
+    Incremental evaluation state of one individual: its seeds, the node
+    assignment and the running tallies every penalty term is read from.
+    """
+
+    seeds: np.ndarray
+    node_assignment: np.ndarray
+    counts: np.ndarray
+    floor_counts: np.ndarray
+    col_hist: np.ndarray  # (n_types, width), empty without rectangularity rules
+    row_hist: np.ndarray  # (n_types, height)
+    edge_sums: np.ndarray  # [adjacency penalty, compactness reward]
+    region: np.ndarray  # nodes whose type the pending move changed
+    undo_assignment: np.ndarray
+    mark: np.ndarray
+    moved_assignment: np.ndarray  # scratch for the moved seeds' full propagation
+    stamp: int = 0
+    pending: tuple | None = None
+
+
 class FitnessEvaluator:
     def __init__(
         self,
-        graph: DiscretizedGraph,
+        graph: DiscretizedGraph | LatticeGraph,
         room_data: RoomData,
         fixed_nodes: dict[str, list[int]],
         dynamic_rules: dict,
@@ -191,10 +1138,14 @@ class FitnessEvaluator:
         w_adj: float = 1.0,
     ):
         self.graph = graph
-        self.w_area = w_area
-        self.w_adj = w_adj
+        self.delta_state: DeltaState | None = None
+        self.w_area = float(w_area)
+        self.w_adj = float(w_adj)
         self.fixed_nodes = fixed_nodes
+        # Aliases the workspace buffer; valid until the next evaluate() call.
         self.last_node_assignment: np.ndarray | None = None
+        # Fitness evaluations requested so far, full or delta (one per move scored)
+        self.n_evaluations = 0
 
         active_room_df = self._prepare_room_df(
             room_data.room_df, room_data.selected_zones_df
@@ -203,10 +1154,31 @@ class FitnessEvaluator:
         self.type_map = {name: i for i, name in enumerate(self.type_names)}
         self.n_types = len(self.type_names)
 
-        self.target_counts = self._calculate_target_counts(
-            active_room_df, graph.n_nodes
+        self.target_counts = np.ascontiguousarray(
+            self._calculate_target_counts(active_room_df, graph.n_nodes), dtype=np.int64
         )
 
+        # Graph arrays in the exact dtypes/layouts of the kernels' explicit signatures.
+        # For a LatticeGraph, adj_indices/adj_indptr hold only its links and
+        # the lattice kernels read the rest off the raster; for CSR graphs the
+        # raster is empty (the operators' random walks accept either).
+        self.lattice = isinstance(graph, LatticeGraph)
+        if self.lattice:
+            self.adj_indices = graph.link_indices
+            self.adj_indptr = graph.link_indptr
+            self.cell_raster = graph.cell_raster
+            self.node_cells = graph.node_cells
+            self.raster_width = graph.raster_width
+            self.edges_u = self.edges_v = np.empty(0, dtype=np.int32)
+        else:
+            self.adj_indices = np.ascontiguousarray(graph.adj_indices, dtype=np.int32)
+            self.adj_indptr = np.ascontiguousarray(graph.adj_indptr, dtype=np.int32)
+            self.cell_raster = self.node_cells = np.empty(0, dtype=np.int32)
+            self.raster_width = 0
+            # Rows of the graph's cached edge array, shared by its evaluators
+            self.edges_u, self.edges_v = graph.adjacency_edges_np
+        self.grid_coords = graph.grid_coords
+
         rules_filled = room_data.rules_df.loc[self.type_names, self.type_names].fillna(0)
         symmetric_df = rules_filled + rules_filled.T
         np.fill_diagonal(symmetric_df.values, np.diag(rules_filled.values))
@@ -222,6 +1194,41 @@ class FitnessEvaluator:
             dynamic_rules.get("count_per_floor", [])
         )
 
+        # Dense per-type rule vectors and the node->floor index, built once so
+        # the kernels never have to search rule lists or floor ranges.
+        self.comp_weights = np.zeros(self.n_types, dtype=np.float64)
+        for t_idx, weight in self.compactness_rules.reshape(-1, 2):
+            self.comp_weights[int(t_idx)] = weight
+        self.rect_weights = np.zeros(self.n_types, dtype=np.float64)
+        for t_idx, weight in self.rectangularity_rules.reshape(-1, 2):
+            self.rect_weights[int(t_idx)] += weight
+        self.floor_cost_present, self.floor_cost_absent = self._prepare_floor_costs(
+            self.per_floor_rules
+        )
+        self.n_floors = len(graph.floor_node_ranges)
+        self.node_floor = self._build_node_floor_index(graph)
+
+        self.workspace = PropagationWorkspace.allocate(graph.n_nodes, self.n_types)
+
+    def _prepare_floor_costs(self, per_floor_rules: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Per-type penalty a floor incurs when a zone is present / absent on it."""
+        present = np.zeros(self.n_types, dtype=np.float64)
+        absent = np.zeros(self.n_types, dtype=np.float64)
+        for t_idx, target, weight in per_floor_rules.reshape(-1, 3):
+            target = int(target)
+            present[int(t_idx)] += weight * (1 - target) ** 2
+            absent[int(t_idx)] += weight * (0 - target) ** 2
+        return present, absent
+
+    @staticmethod
+    def _build_node_floor_index(graph: DiscretizedGraph | LatticeGraph) -> np.ndarray:
+        return (
+            np.searchsorted(
+                graph.floor_node_ranges[:, 0], np.arange(graph.n_nodes), side="right"
+            )
+            - 1
+        ).astype(np.int32)
+
     def _prepare_per_floor_rules(self, rules: list[dict]) -> np.ndarray:
         if not rules: return np.empty((0, 3), dtype=np.float64)
         rule_list = []
@@ -281,7 +1288,11 @@ class FitnessEvaluator:
                 rule_list.append([self.type_map[type_name], weight])
         return np.array(rule_list, dtype=np.float64)
 
-    def evaluate(self, individual: Individual) -> tuple[float]:
+    def _pack_individual(self, individual: Individual) -> np.ndarray:
+        """Flattens an individual into an (n_centroids, 2) array of [node, type]."""
+        if isinstance(individual, Genome):
+            # Already in kernel layout (the GA builds genomes over self.type_names)
+            return individual.centroids
         initial_centroids_list = []
         for type_name, centroids in individual.items():
             if type_name in self.type_map:
@@ -289,17 +1300,92 @@ class FitnessEvaluator:
                 for node_idx in centroids:
                     initial_centroids_list.append([node_idx, type_idx])
 
-        initial_centroids = np.array(initial_centroids_list, dtype=np.int32)
+        return np.array(initial_centroids_list, dtype=np.int32).reshape(-1, 2)
 
-        node_assignment = _propagate_numba(
-            initial_centroids=initial_centroids,
-            target_counts=self.target_counts,
-            adj_indices=self.graph.adj_indices,
-            adj_indptr=self.graph.adj_indptr,
-            n_nodes=self.graph.n_nodes,
-            n_types=self.n_types,
+    def pack_population(
+        self, individuals: list[Individual]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Packs a population into one centroid array plus offsets, so that
+        individual p owns rows offsets[p]:offsets[p + 1].
+        """
+        return self.pack_centroids([self._pack_individual(ind) for ind in individuals])
+
+    @staticmethod
+    def pack_centroids(centroids: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        """pack_population() of already packed (n_i, 2) centroid arrays."""
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        if centroids:
+            offsets[1:] = np.cumsum([len(c) for c in centroids])
+            packed_centroids = np.concatenate(centroids)
+        else:
+            packed_centroids = np.empty((0, 2), dtype=np.int32)
+        return np.ascontiguousarray(packed_centroids, dtype=np.int32), offsets
+
+    def _propagate_into(self, initial_centroids: np.ndarray, node_assignments: np.ndarray) -> None:
+        """Propagates into node_assignments, using the workspace's scratch buffers."""
+        ws = self.workspace
+        if self.lattice:
+            _propagate_lattice_into_numba(
+                initial_centroids,
+                self.target_counts,
+                self.adj_indices,
+                self.adj_indptr,
+                self.cell_raster,
+                self.node_cells,
+                self.raster_width,
+                node_assignments,
+                ws.best_cost,
+                ws.winner_type,
+                ws.wavefront,
+                ws.next_wavefront,
+                ws.current_counts,
+            )
+        else:
+            _propagate_into_numba(
+                initial_centroids,
+                self.target_counts,
+                self.adj_indices,
+                self.adj_indptr,
+                node_assignments,
+                ws.best_cost,
+                ws.winner_type,
+                ws.wavefront,
+                ws.next_wavefront,
+                ws.current_counts,
+            )
+
+    def propagate(self, individual: Individual) -> np.ndarray:
+        """A fresh node -> type assignment of an individual (e.g. for rendering)."""
+        initial_centroids = self._pack_individual(individual)
+        if self.lattice:
+            return _propagate_lattice_numba(
+                initial_centroids,
+                self.target_counts,
+                self.adj_indices,
+                self.adj_indptr,
+                self.cell_raster,
+                self.node_cells,
+                self.raster_width,
+                self.graph.n_nodes,
+                self.n_types,
+            )
+        return _propagate_numba(
+            initial_centroids,
+            self.target_counts,
+            self.adj_indices,
+            self.adj_indptr,
+            self.graph.n_nodes,
+            self.n_types,
         )
 
+    def evaluate(self, individual: Individual) -> tuple[float]:
+        self.n_evaluations += 1
+        initial_centroids = self._pack_individual(individual)
+
+        node_assignment = self.workspace.node_assignments
+        self._propagate_into(initial_centroids, node_assignment)
+
         self.last_node_assignment = node_assignment
         
         rules = np.asarray(self.rectangularity_rules)
@@ -307,19 +1393,378 @@ class FitnessEvaluator:
         # If empty, skip JIT and use neutral penalty
         if rules.size == 0:
             return (0.0, )
+        elif self.lattice:
+            penalty = _calculate_penalties_lattice_numba(
+                node_assignment=node_assignment,
+                link_indices=self.adj_indices,
+                link_indptr=self.adj_indptr,
+                cell_raster=self.cell_raster,
+                node_cells=self.node_cells,
+                raster_width=self.raster_width,
+                grid_coords=self.grid_coords,
+                node_floor=self.node_floor,
+                n_floors=self.n_floors,
+                rules_matrix=self.rules_matrix,
+                target_counts=self.target_counts,
+                comp_weights=self.comp_weights,
+                rect_weights=self.rect_weights,
+                floor_cost_present=self.floor_cost_present,
+                floor_cost_absent=self.floor_cost_absent,
+                w_area=self.w_area,
+                w_adj=self.w_adj,
+            )
+            return (penalty,)
         else:
             penalty = _calculate_penalties_numba(
                 node_assignment=node_assignment,
-                edges_u=self.graph.adjacency_edges_np[0],
-                edges_v=self.graph.adjacency_edges_np[1],
-                grid_coords=self.graph.grid_positions, 
+                edges_u=self.edges_u,
+                edges_v=self.edges_v,
+                grid_coords=self.grid_coords,
+                node_floor=self.node_floor,
+                n_floors=self.n_floors,
                 rules_matrix=self.rules_matrix,
                 target_counts=self.target_counts,
-                compactness_rules=self.compactness_rules,
-                rectangularity_rules=self.rectangularity_rules, 
-                per_floor_rules=self.per_floor_rules,
-                floor_node_ranges=self.graph.floor_node_ranges,
+                comp_weights=self.comp_weights,
+                rect_weights=self.rect_weights,
+                floor_cost_present=self.floor_cost_present,
+                floor_cost_absent=self.floor_cost_absent,
                 w_area=self.w_area,
                 w_adj=self.w_adj,
             )
             return (penalty,)
+
+    def evaluate_population(self, individuals: list[Individual]) -> np.ndarray:
+        """
+        Scores a list of individuals in a single parallel JIT call and
+        returns their fitness values in input order.
+        """
+        # Same neutral-penalty shortcut as evaluate()
+        self.n_evaluations += len(individuals)
+        if len(individuals) == 0 or self.rectangularity_rules.size == 0:
+            return np.zeros(len(individuals), dtype=np.float64)
+
+        packed_centroids, offsets = self.pack_population(individuals)
+        kernel = _evaluate_population_lattice_numba if self.lattice else _evaluate_population_numba
+        return kernel(
+            packed_centroids=packed_centroids,
+            offsets=offsets,
+            n_chunks=numba.get_num_threads(),
+            **self.population_kernel_args(),
+        )
+
+    def population_kernel_args(self) -> dict:
+        """
+        The problem-side arguments of _evaluate_population_numba (or, for a
+        LatticeGraph, _evaluate_population_lattice_numba): everything but the
+        packed population, e.g. for publishing to worker processes.
+        """
+        if self.lattice:
+            return {
+                "target_counts": self.target_counts,
+                "link_indices": self.adj_indices,
+                "link_indptr": self.adj_indptr,
+                "cell_raster": self.cell_raster,
+                "node_cells": self.node_cells,
+                "raster_width": self.raster_width,
+                "n_nodes": self.graph.n_nodes,
+                "n_types": self.n_types,
+                "grid_coords": self.grid_coords,
+                "node_floor": self.node_floor,
+                "n_floors": self.n_floors,
+                "rules_matrix": self.rules_matrix,
+                "comp_weights": self.comp_weights,
+                "rect_weights": self.rect_weights,
+                "floor_cost_present": self.floor_cost_present,
+                "floor_cost_absent": self.floor_cost_absent,
+                "w_area": self.w_area,
+                "w_adj": self.w_adj,
+            }
+        return {
+            "target_counts": self.target_counts,
+            "adj_indices": self.adj_indices,
+            "adj_indptr": self.adj_indptr,
+            "n_nodes": self.graph.n_nodes,
+            "n_types": self.n_types,
+            "edges_u": self.edges_u,
+            "edges_v": self.edges_v,
+            "grid_coords": self.grid_coords,
+            "node_floor": self.node_floor,
+            "n_floors": self.n_floors,
+            "rules_matrix": self.rules_matrix,
+            "comp_weights": self.comp_weights,
+            "rect_weights": self.rect_weights,
+            "floor_cost_present": self.floor_cost_present,
+            "floor_cost_absent": self.floor_cost_absent,
+            "w_area": self.w_area,
+            "w_adj": self.w_adj,
+        }
+
+    # --- Delta Evaluation (single-centroid moves) ---
+
+    @property
+    def supports_delta(self) -> bool:
+        """Delta evaluation walks explicit CSR adjacency, so LatticeGraphs are scored in full."""
+        return not self.lattice
+
+    def seed_offsets(self, individual: Individual) -> dict[str, int]:
+        """Row of each type's first centroid in the packed seed array."""
+        if isinstance(individual, Genome):
+            return {t: int(individual.offsets[i]) for i, t in enumerate(individual.type_names)}
+        offsets, row = {}, 0
+        for type_name, centroids in individual.items():
+            if type_name in self.type_map:
+                offsets[type_name] = row
+                row += len(centroids)
+        return offsets
+
+    def _allocate_delta_state(self) -> DeltaState:
+        n_nodes = self.graph.n_nodes
+        if self.rectangularity_rules.size and n_nodes:
+            width, height = (self.graph.grid_positions.max(axis=0)).astype(int) + 1
+        else:
+            width, height = 0, 0
+
+        return DeltaState(
+            seeds=np.empty((0, 2), dtype=np.int32),
+            node_assignment=np.full(n_nodes, -1, dtype=np.int32),
+            counts=np.zeros(self.n_types, dtype=np.int32),
+            floor_counts=np.zeros((self.n_floors, self.n_types), dtype=np.int32),
+            col_hist=np.zeros((self.n_types, width), dtype=np.int32),
+            row_hist=np.zeros((self.n_types, height), dtype=np.int32),
+            edge_sums=np.zeros(2, dtype=np.float64),
+            region=np.empty(n_nodes, dtype=np.int32),
+            undo_assignment=np.empty(n_nodes, dtype=np.int32),
+            mark=np.zeros(n_nodes, dtype=np.int64),
+            moved_assignment=np.empty(n_nodes, dtype=np.int32),
+        )
+
+    def _rebuild_delta_state(self) -> None:
+        state = self.delta_state
+        self._propagate_into(state.seeds, state.node_assignment)
+        _build_tallies_numba(
+            state.node_assignment,
+            self.edges_u,
+            self.edges_v,
+            self.node_floor,
+            self.grid_coords,
+            self.rules_matrix,
+            self.comp_weights,
+            state.counts,
+            state.floor_counts,
+            state.col_hist,
+            state.row_hist,
+            state.edge_sums,
+        )
+
+    def _delta_fitness(self) -> float:
+        # Same neutral-penalty shortcut as evaluate()
+        if self.rectangularity_rules.size == 0:
+            return 0.0
+        state = self.delta_state
+        return _penalty_from_tallies_numba(
+            state.counts,
+            state.floor_counts,
+            state.col_hist,
+            state.row_hist,
+            state.edge_sums,
+            self.target_counts,
+            self.rect_weights,
+            self.floor_cost_present,
+            self.floor_cost_absent,
+            self.w_area,
+            self.w_adj,
+        )
+
+    def begin_delta(self, individual: Individual) -> float:
+        """
+        Fully evaluates an individual and keeps its assignment and tallies as
+        the base state for subsequent delta_move() calls. Returns its fitness.
+        """
+        if not self.supports_delta:
+            raise TypeError(
+                "Delta evaluation needs a DiscretizedGraph with CSR adjacency; "
+                "score individuals on a LatticeGraph with evaluate() instead."
+            )
+        if self.delta_state is None:
+            self.delta_state = self._allocate_delta_state()
+        self.n_evaluations += 1
+        self.delta_state.seeds = self._pack_individual(individual).copy()
+        self.delta_state.pending = None
+        self._rebuild_delta_state()
+        return self._delta_fitness()
+
+    def delta_move(self, seed_idx: int, new_node: int) -> float:
+        """
+        Tentatively moves one centroid (a row of the packed seed array, see
+        seed_offsets) and returns the resulting fitness, equal to evaluate()
+        of the moved individual. The penalty tallies are patched only where
+        node types changed. Must be followed by accept_delta() or
+        reject_delta().
+        """
+        state, ws = self.delta_state, self.workspace
+        self.n_evaluations += 1
+        state.stamp += 1
+        saved_sums = state.edge_sums.copy()
+        old_node = int(state.seeds[seed_idx, 0])
+
+        n_region = _delta_move_numba(
+            seed_idx,
+            new_node,
+            state.seeds,
+            self.target_counts,
+            self.adj_indices,
+            self.adj_indptr,
+            self.node_floor,
+            self.grid_coords,
+            self.rules_matrix,
+            self.comp_weights,
+            state.node_assignment,
+            state.counts,
+            state.floor_counts,
+            state.col_hist,
+            state.row_hist,
+            state.edge_sums,
+            state.region,
+            state.undo_assignment,
+            state.mark,
+            state.stamp,
+            state.moved_assignment,
+            ws.best_cost,
+            ws.winner_type,
+            ws.wavefront,
+            ws.next_wavefront,
+            ws.current_counts,
+        )
+        state.pending = (seed_idx, old_node, saved_sums, n_region)
+        return self._delta_fitness()
+
+    def score_moves(self, move_seed: np.ndarray, move_node: np.ndarray) -> np.ndarray:
+        """
+        Exactly scores many candidate moves (seed row move_seed[m] to node
+        move_node[m]) against the begin_delta() base state in one parallel
+        call, leaving the base state untouched.
+        """
+        self.n_evaluations += len(move_seed)
+        # Same neutral-penalty shortcut as evaluate()
+        if self.rectangularity_rules.size == 0:
+            return np.zeros(len(move_seed), dtype=np.float64)
+        state = self.delta_state
+        return _score_moves_numba(
+            np.ascontiguousarray(move_seed, dtype=np.int64),
+            np.ascontiguousarray(move_node, dtype=np.int32),
+            state.seeds,
+            state.node_assignment,
+            state.counts,
+            state.floor_counts,
+            state.col_hist,
+            state.row_hist,
+            state.edge_sums,
+            self.target_counts,
+            self.adj_indices,
+            self.adj_indptr,
+            self.node_floor,
+            self.grid_coords,
+            self.rules_matrix,
+            self.comp_weights,
+            self.rect_weights,
+            self.floor_cost_present,
+            self.floor_cost_absent,
+            self.w_area,
+            self.w_adj,
+            numba.get_num_threads(),
+        )
+
+    def accept_delta(self) -> None:
+        """Keeps the pending delta_move() as the new base state."""
+        self.delta_state.pending = None
+
+    def reject_delta(self) -> None:
+        """Restores the base state from before the pending delta_move()."""
+        state = self.delta_state
+        seed_idx, old_node, saved_sums, n_region = state.pending
+        _delta_revert_numba(
+            state.region,
+            n_region,
+            state.undo_assignment,
+            state.node_assignment,
+            self.node_floor,
+            self.grid_coords,
+            state.counts,
+            state.floor_counts,
+            state.col_hist,
+            state.row_hist,
+        )
+        state.edge_sums[:] = saved_sums
+        state.seeds[seed_idx, 0] = old_node
+        state.pending = None
+
+
+def warmup_kernels() -> dict:
+    """
+    Compiles (or loads from cache) all kernels, then runs every evaluation path
+    once on a tiny synthetic plan so the first real job pays no JIT or
+    threading-layer start-up cost. Returns a timing and cache-hit report.
+    """
+    from floorplan.data_models import FloorPlan
+    from floorplan.geometry import GeometryProcessor
+    from floorplan.graph import GraphBuilder
+
+    start = time.perf_counter()
+    kernels = compile_kernels()
+    compile_seconds = time.perf_counter() - start
+
+    plan = FloorPlan(name="warmup", boundary=[(0, 0), (0, 4), (4, 4), (4, 0)])
+    graph = GraphBuilder.build_for_single_floor(GeometryProcessor.discretize(plan, n=4))
+    types = ["a", "b"]
+    room_data = RoomData(
+        room_df=pd.DataFrame({"short": types}),
+        rules_df=pd.DataFrame(0.0, index=types, columns=types),
+        selected_zones_df=pd.DataFrame({"short": types, "area": [0.5, 0.5]}),
+    )
+    evaluator = FitnessEvaluator(
+        graph=graph,
+        room_data=room_data,
+        fixed_nodes={},
+        dynamic_rules={
+            "rectangularity": [{"zone": "a", "weight": 1.0}],
+            "count_per_floor": [{"zone": "b", "target": 1, "weight": 1.0}],
+        },
+    )
+    individual = Individual({"a": [0], "b": [graph.n_nodes - 1]})
+    evaluator.evaluate(individual)
+    evaluator.evaluate_population([individual, individual])
+    evaluator.begin_delta(individual)
+    evaluator.delta_move(0, int(graph.adj_indices[graph.adj_indptr[0]]))
+    evaluator.reject_delta()
+    evaluator.score_moves(np.zeros(2, dtype=np.int64), graph.adj_indices[:2].astype(np.int32))
+
+    packed, offsets = evaluator.pack_population([individual, individual])
+    packed, offsets, _ = _crossover_batch_numba(packed, offsets, evaluator.n_types, 1.0, 0)
+    _mutate_batch_numba(
+        packed, offsets, evaluator.n_types, np.ones(evaluator.n_types, dtype=np.bool_),
+        1.0, 1.0, 1.0, 1.0, 1.0, evaluator.adj_indices, evaluator.adj_indptr,
+        evaluator.cell_raster, evaluator.node_cells, evaluator.raster_width, 0,
+    )
+    _perturb_batch_numba(
+        packed, np.ones(evaluator.n_types, dtype=np.bool_), 1, evaluator.adj_indices,
+        evaluator.adj_indptr, evaluator.cell_raster, evaluator.node_cells, evaluator.raster_width, 0,
+    )
+    _distances_to_numba(packed, offsets, evaluator.n_types, graph.grid_positions, 0)
+
+    lattice_evaluator = FitnessEvaluator(
+        graph=GraphBuilder.build_lattice([GeometryProcessor.discretize(plan, n=4)]),
+        room_data=room_data,
+        fixed_nodes={},
+        dynamic_rules={"rectangularity": [{"zone": "a", "weight": 1.0}]},
+    )
+    lattice_evaluator.evaluate(individual)
+    lattice_evaluator.evaluate_population([individual, individual])
+    lattice_evaluator.propagate(individual)
+
+    return {
+        "compile_seconds": round(compile_seconds, 3),
+        "warmup_seconds": round(time.perf_counter() - start, 3),
+        "cache_hits": sum(k["cache_hits"] for k in kernels.values()),
+        "cache_misses": sum(k["cache_misses"] for k in kernels.values()),
+        "kernels": kernels,
+    }
@@ -1,10 +1,24 @@
+import hashlib
+import multiprocessing as mp
 import random
+import time
+import traceback
+
+import numba
 import numpy as np
 from deap import base, tools
-from scipy.spatial.distance import cdist
 
-from floorplan.data_models import Individual, DiscretizedGraph, creator
+from floorplan.cache import FitnessCache, SolutionStore, problem_fingerprint
+from floorplan.data_models import DiscretizedGraph, Genome, Individual, LatticeGraph
 from floorplan.evaluation import FitnessEvaluator
+from floorplan.operators import (
+    _crossover_batch_numba,
+    _distances_to_numba,
+    _mutate_batch_numba,
+    _perturb_batch_numba,
+)
+from floorplan.parallel import ParallelEvaluator
+from floorplan.termination import ConvergenceMonitor
 
 
 class GeneticOptimizer:
@@ -27,6 +41,25 @@ class GeneticOptimizer:
         min_improvement: float = 1e-6,
         random_walk_decay: float = 0.05,
         random_walk_scale: float = 10.0,
+        use_delta_evaluation: bool = True,
+        cache_max_entries: int = 100_000,
+        cache_max_memory_mb: float | None = None,
+        parallel_backend: ParallelEvaluator | None = None,
+        n_islands: int = 1,
+        migration_interval: int = 10,
+        migration_size: int = 2,
+        migration_topology: str = "ring",
+        local_search_mode: str = "stochastic",
+        local_search_max_steps: int = 5,
+        hof_min_distance: float = 0.0,
+        hof_strategy: str = "fitness",
+        convergence_window: int = 10,
+        min_gain_per_second: float | None = None,
+        min_diversity: float | None = None,
+        time_budget_seconds: float | None = None,
+        max_evaluations: int | None = None,
+        checkpoint_interval: int = 10,
+        warm_start_radius: int | None = None,
     ):
         self.POP_SIZE = pop_size
         self.GENERATIONS = generations
@@ -40,146 +73,283 @@ class GeneticOptimizer:
         self.MIN_IMPROVEMENT = min_improvement
         self.RW_DECAY = random_walk_decay
         self.RW_SCALE = random_walk_scale
+        self.USE_DELTA = use_delta_evaluation
+        if local_search_mode not in ("stochastic", "steepest"):
+            raise ValueError(f"Unknown local search mode '{local_search_mode}'.")
+        self.LS_MODE = local_search_mode
+        # Exact evaluations per offspring in steepest-descent mode
+        self.LS_MAX_STEPS = local_search_max_steps
+
+        if hof_strategy not in ("fitness", "maxmin"):
+            raise ValueError(f"Unknown hall-of-fame strategy '{hof_strategy}'.")
+        self.HOF_MIN_DISTANCE = hof_min_distance
+        self.HOF_STRATEGY = hof_strategy
+
+        self.CONVERGENCE_WINDOW = convergence_window
+        self.MIN_GAIN_PER_SECOND = min_gain_per_second
+        self.MIN_DIVERSITY = min_diversity
+        # Hard per-run budgets; the run returns the best population so far
+        self.TIME_BUDGET = time_budget_seconds
+        self.MAX_EVALUATIONS = max_evaluations
+        # Generations between checkpoints when run() is given a checkpoint hook
+        self.CHECKPOINT_INTERVAL = max(checkpoint_interval, 1)
+        # Seeded runs fill the population with perturbations of the first
+        # seed within this many graph hops (None: with random individuals)
+        self.WARM_START_RADIUS = warm_start_radius
+
+        self.CACHE_MAX_ENTRIES = cache_max_entries
+        self.CACHE_MAX_MEMORY_MB = cache_max_memory_mb
+        # Optional process pool for batched evaluation; owned by the caller
+        self.parallel_backend = parallel_backend
+
+        if migration_topology not in ("ring", "random"):
+            raise ValueError(f"Unknown migration topology '{migration_topology}'.")
+        self.N_ISLANDS = n_islands
+        self.MIGRATION_INTERVAL = max(migration_interval, 1)
+        self.MIGRATION_SIZE = migration_size
+        self.MIGRATION_TOPOLOGY = migration_topology
 
         self.toolbox = base.Toolbox()
-        self.fitness_cache: dict[tuple, tuple] = {}
+        self.type_names: tuple[str, ...] = ()
+        self.movable_types: np.ndarray | None = None
+        self.fitness_cache: FitnessCache | None = None
+        # Summary of the last run's termination (see ConvergenceMonitor.summary)
+        self.termination: dict = {}
+        # Final population of the last run, best first
+        self.final_population: list[Genome] = []
 
     def _register_deap_tools(
         self, graph: DiscretizedGraph, evaluator: FitnessEvaluator
     ) -> None:
         """Sets up the DEAP toolbox with problem-specific functions."""
-        def _rand_dict() -> dict[str, list[int]]:
-            d = {}
-            for t in evaluator.type_names:
+        type_names = self.type_names = tuple(evaluator.type_names)
+
+        def _rand_genome() -> Genome:
+            segments = []
+            for t in type_names:
                 if t in evaluator.fixed_nodes:
-                    d[t] = list(evaluator.fixed_nodes[t])
+                    segments.append(evaluator.fixed_nodes[t])
                 else:
-                    d[t] = [random.randrange(graph.n_nodes)]
-            return d
+                    segments.append([random.randrange(graph.n_nodes)])
+            return Genome.from_segments(type_names, segments)
 
-        self.toolbox.register("individual", tools.initIterate, creator.Individual, _rand_dict)
+        self.toolbox.register("individual", _rand_genome)
         self.toolbox.register("population", tools.initRepeat, list, self.toolbox.individual)
         self.toolbox.register("evaluate", evaluator.evaluate)
-        self.toolbox.register("mate", self._crossover_individuals)
-        self.toolbox.register("mutate", self._mutate_individual, graph=graph, evaluator=evaluator)
+        if self.parallel_backend is not None:
+            self.parallel_backend.publish(evaluator)
+            self.toolbox.register(
+                "evaluate_population", self.parallel_backend.evaluate_population, evaluator
+            )
+        else:
+            self.toolbox.register("evaluate_population", evaluator.evaluate_population)
+        self.movable_types = np.array([t not in evaluator.fixed_nodes for t in type_names])
+        self.toolbox.register("vary", self._vary_population, evaluator=evaluator)
+        self.toolbox.register("perturb", self._perturbed_copies, evaluator=evaluator)
         self.toolbox.register("select", tools.selTournament, tournsize=self.TOUR_SIZE)
 
-    @staticmethod
-    def _crossover_individuals(ind1: Individual, ind2: Individual) -> tuple[Individual, Individual]:
-        child1_data, child2_data = {}, {}
-        all_types = ind1.keys() | ind2.keys()
-        for t in all_types:
-            nodes1 = list(ind1.get(t, []))
-            nodes2 = list(ind2.get(t, []))
-            split = len(nodes1) // 2
-            child1_data[t] = nodes1[:split] + nodes2[split:]
-            child2_data[t] = nodes2[:split] + nodes1[split:]
-        return creator.Individual(child1_data), creator.Individual(child2_data)
-
-    def _mutate_individual(self, individual: Individual, graph: DiscretizedGraph, evaluator: FitnessEvaluator) -> tuple[Individual]:
-        new_ind_data = {t: list(nodes) for t, nodes in individual.items()}
-        movable_types = [t for t in evaluator.type_names if t not in evaluator.fixed_nodes]
-
-        # --- Re-implemented Advanced Random Walk ---
-        for t in movable_types:
-            if t not in new_ind_data: continue
-            for i, c_node in enumerate(new_ind_data[t]):
-                steps = int(np.random.exponential(scale=self.RW_DECAY * self.RW_SCALE))
-                current = c_node
-                for _ in range(steps):
-                    neighbors = graph.adjacency_list.get(current, [])
-                    if not neighbors: break
-                    current = random.choice(neighbors)
-                new_ind_data[t][i] = current
-        
-        # Other mutations
-        if len(movable_types) >= 2 and random.random() < self.SWAP_PB:
-            t1, t2 = random.sample(movable_types, 2)
-            new_ind_data[t1], new_ind_data[t2] = new_ind_data.get(t2, []), new_ind_data.get(t1, [])
-        if movable_types and random.random() < self.DUP_PB:
-            t_to_dup = random.choice(movable_types)
-            if new_ind_data.get(t_to_dup):
-                new_ind_data[t_to_dup].append(random.choice(new_ind_data[t_to_dup]))
-        prunable = [t for t in movable_types if len(new_ind_data.get(t, [])) > 1]
-        if prunable and random.random() < self.PRUNE_PB:
-            t_to_prune = random.choice(prunable)
-            idx_to_remove = random.randrange(len(new_ind_data[t_to_prune]))
-            new_ind_data[t_to_prune].pop(idx_to_remove)
-
-        return (creator.Individual(new_ind_data),)
-
-    def _local_search(self, individual: Individual, graph: DiscretizedGraph, evaluator: FitnessEvaluator) -> Individual:
+    def _vary_population(self, parents: list[Genome], evaluator: FitnessEvaluator) -> list[Genome]:
+        """
+        Applies crossover and mutation to a whole batch of parents in two
+        Numba calls. Children that neither operator touched keep their
+        parent's fitness.
+        """
+        packed, offsets = evaluator.pack_population(parents)
+        packed, offsets, crossed = _crossover_batch_numba(
+            packed, offsets, evaluator.n_types, self.CXPB, random.getrandbits(32)
+        )
+        packed, offsets, type_offsets, mutated = _mutate_batch_numba(
+            packed, offsets, evaluator.n_types, self.movable_types, self.MUTPB,
+            self.RW_DECAY * self.RW_SCALE, self.SWAP_PB, self.DUP_PB, self.PRUNE_PB,
+            evaluator.adj_indices, evaluator.adj_indptr, evaluator.cell_raster,
+            evaluator.node_cells, evaluator.raster_width, random.getrandbits(32),
+        )
+
+        offspring = []
+        for p, parent in enumerate(parents):
+            child = Genome(self.type_names, packed[offsets[p] : offsets[p + 1]], type_offsets[p])
+            if not (crossed[p] or mutated[p]):
+                child.fitness.values = parent.fitness.values
+            offspring.append(child)
+        return offspring
+
+    def _perturbed_copies(self, seed: Genome, n: int, evaluator: FitnessEvaluator) -> list[Genome]:
+        """n copies of seed, each movable centroid moved up to WARM_START_RADIUS hops."""
+        if n <= 0:
+            return []
+        packed, offsets = evaluator.pack_population([seed] * n)
+        packed = _perturb_batch_numba(
+            packed, self.movable_types, self.WARM_START_RADIUS, evaluator.adj_indices,
+            evaluator.adj_indptr, evaluator.cell_raster, evaluator.node_cells,
+            evaluator.raster_width, random.getrandbits(32),
+        )
+        return [
+            Genome(self.type_names, packed[offsets[p] : offsets[p + 1]], seed.offsets.copy())
+            for p in range(n)
+        ]
+
+    def _local_search(
+        self, individual: Genome, graph: DiscretizedGraph | LatticeGraph, evaluator: FitnessEvaluator
+    ) -> Genome:
         """
         Performs a fast, stochastic hill-climbing search on an individual.
+        With delta evaluation, each trial move only re-scores the nodes whose
+        type changed; on a LatticeGraph every trial is evaluated in full.
         """
         current_ind = self.toolbox.clone(individual)
-        current_fitness = self._evaluate_with_cache(current_ind)[0]
         num_trials = 2 * len(evaluator.type_names)
+        offsets = current_ind.offsets
 
         movable_types = [
-            t for t in evaluator.type_names if t not in evaluator.fixed_nodes and current_ind.get(t)
+            i for i, t in enumerate(current_ind.type_names)
+            if t not in evaluator.fixed_nodes and offsets[i + 1] > offsets[i]
         ]
         if not movable_types:
             return current_ind
 
+        use_delta = self._use_delta and not isinstance(graph, LatticeGraph)
+        if use_delta:
+            current_fitness = evaluator.begin_delta(current_ind)
+        else:
+            current_fitness = self._evaluate_with_cache(current_ind)[0]
+
         for _ in range(num_trials):
             type_to_move = random.choice(movable_types)
-            if not current_ind[type_to_move]: continue
-            
-            centroid_idx_in_list = random.randrange(len(current_ind[type_to_move]))
-            original_node = current_ind[type_to_move][centroid_idx_in_list]
+            # Row of the moved centroid, shared with the delta evaluator's seed array
+            row = random.randrange(offsets[type_to_move], offsets[type_to_move + 1])
+            original_node = int(current_ind.centroids[row, 0])
             
-            neighbors = graph.adjacency_list.get(original_node, [])
-            if not neighbors: continue
-            neighbor_node = random.choice(neighbors)
+            neighbors = graph.neighbors(original_node)
+            if len(neighbors) == 0: continue
+            neighbor_node = int(neighbors[random.randrange(len(neighbors))])
             
-            current_ind[type_to_move][centroid_idx_in_list] = neighbor_node
-            trial_fitness = self._evaluate_with_cache(current_ind)[0]
+            current_ind.centroids[row, 0] = neighbor_node
+            if use_delta:
+                trial_fitness = evaluator.delta_move(row, neighbor_node)
+            else:
+                trial_fitness = self._evaluate_with_cache(current_ind)[0]
 
             if trial_fitness < current_fitness:
                 current_fitness = trial_fitness
+                if use_delta:
+                    evaluator.accept_delta()
             else:
-                current_ind[type_to_move][centroid_idx_in_list] = original_node
+                current_ind.centroids[row, 0] = original_node
+                if use_delta:
+                    evaluator.reject_delta()
         
         del current_ind.fitness.values
         return current_ind
 
-    def _evaluate_with_cache(self, individual: Individual) -> tuple:
-        h = tuple(sorted((t, tuple(sorted(nodes))) for t, nodes in individual.items()))
-        if h not in self.fitness_cache:
-            self.fitness_cache[h] = self.toolbox.evaluate(individual)
-        return self.fitness_cache[h]
+    def _steepest_descent(
+        self, individual: Genome, graph: DiscretizedGraph | LatticeGraph, evaluator: FitnessEvaluator
+    ) -> Genome:
+        """
+        Scores every (movable centroid, neighbour) move of an individual in
+        one parallel delta-evaluation call and applies the best one while it
+        improves, repeating until a local optimum or LS_MAX_STEPS moves. Delta
+        scores are exact, so the returned individual keeps its fitness.
+        Delta evaluation needs CSR adjacency, so a LatticeGraph gets the
+        stochastic _local_search() instead.
+        """
+        if isinstance(graph, LatticeGraph):
+            return self._local_search(individual, graph, evaluator)
+        current_ind = self.toolbox.clone(individual)
+        centroids = current_ind.centroids
+        rows = np.flatnonzero(self.movable_types[centroids[:, 1]])
+        if len(rows) == 0:
+            del current_ind.fitness.values
+            return current_ind
+
+        adj_indices, adj_indptr = evaluator.adj_indices, evaluator.adj_indptr
+        current_fitness = evaluator.begin_delta(current_ind)
+        budget = self.LS_MAX_STEPS
+        improved = True
+        while improved and budget > 0:
+            nodes = centroids[rows, 0]
+            starts = adj_indptr[nodes].astype(np.int64)
+            degrees = adj_indptr[nodes + 1] - starts
+            # Enumerate every neighbour of every movable centroid
+            move_seed = np.repeat(rows, degrees)
+            first = np.repeat(starts - (np.cumsum(degrees) - degrees), degrees)
+            move_node = adj_indices[first + np.arange(len(move_seed))]
+
+            scores = evaluator.score_moves(move_seed, move_node)
+            m = int(np.argmin(scores))
+            improved = scores[m] < current_fitness - self.MIN_IMPROVEMENT
+            if improved:
+                row, node = int(move_seed[m]), int(move_node[m])
+                current_fitness = evaluator.delta_move(row, node)
+                evaluator.accept_delta()
+                centroids[row, 0] = node
+                budget -= 1
+
+        current_ind.fitness.values = (current_fitness,)
+        return current_ind
+
+    def _evaluate_with_cache(self, individual: Genome) -> tuple:
+        h = self.fitness_cache.key(individual)
+        fitness = self.fitness_cache.get(h)
+        if fitness is None:
+            fitness = self.toolbox.evaluate(individual)
+            self.fitness_cache.put(h, fitness)
+        return fitness
 
-    def _select_distinct_hof(self, population: list[Individual], graph: DiscretizedGraph, k: int) -> list[Individual]:
-        # ... (This method is unchanged) ...
+    def _evaluate_population_with_cache(self, individuals: list[Genome]) -> None:
+        """
+        Assigns fitness to every individual, scoring all cache misses in a
+        single batched call instead of one JIT call per individual.
+        """
+        keys = [self.fitness_cache.key(ind) for ind in individuals]
+        known: dict[int, tuple] = {}
+        misses: dict[int, Genome] = {}
+        for h, ind in zip(keys, individuals):
+            if h in known or h in misses:
+                continue
+            fitness = self.fitness_cache.get(h)
+            if fitness is None:
+                misses[h] = ind
+            else:
+                known[h] = fitness
+
+        if misses:
+            fitnesses = self.toolbox.evaluate_population(list(misses.values()))
+            for h, fit in zip(misses.keys(), fitnesses):
+                known[h] = (float(fit),)
+                self.fitness_cache.put(h, known[h])
+
+        for h, ind in zip(keys, individuals):
+            ind.fitness.values = known[h]
+
+    def _select_distinct_hof(self, population: list[Genome], evaluator: FitnessEvaluator, k: int) -> list[Genome]:
+        """
+        Picks up to k layouts, starting from the fittest, whose genome distance
+        to every layout already picked exceeds HOF_MIN_DISTANCE. "fitness" takes
+        the next fittest such candidate; "maxmin" takes the one farthest from
+        the current selection (ties broken by fitness). Each pick costs one
+        parallel one-to-all distance call, so selection is O(k * population).
+        """
         if not population: return []
         population.sort(key=lambda x: x.fitness.values[0])
-        hall_of_fame = [population[0]]
-        dist_threshold = 0
-        for cand in population[1:]:
-            if len(hall_of_fame) >= k: break
-            min_dist = float('inf')
-            for hof_member in hall_of_fame:
-                dist = self._calculate_individual_distance(cand, hof_member, graph)
-                if dist < min_dist: min_dist = dist
-            if min_dist > dist_threshold: hall_of_fame.append(cand)
-        return hall_of_fame
+        packed, offsets = evaluator.pack_population(population)
+        positions = evaluator.graph.grid_positions
+        n_types = len(population[0].type_names)
 
-    @staticmethod
-    def _calculate_individual_distance(ind1: Individual, ind2: Individual, graph: DiscretizedGraph) -> float:
-        # ... (This method is unchanged) ...
-        all_types = set(ind1.keys()) | set(ind2.keys())
-        total_dist = 0
-        for type_name in all_types:
-            nodes1, nodes2 = ind1.get(type_name, []), ind2.get(type_name, [])
-            if not nodes1 or not nodes2:
-                total_dist += 10 * abs(len(nodes1) - len(nodes2))
-                continue
-            coords1, coords2 = graph.grid_positions[nodes1], graph.grid_positions[nodes2]
-            A, B = (coords1, coords2) if len(coords1) < len(coords2) else (coords2, coords1)
-            distances = cdist(A, B)
-            total_dist += np.mean(np.min(distances, axis=1))
-        return total_dist / len(all_types) if all_types else 0
+        selected = [0]
+        min_dist = np.full(len(population), np.inf)
+        while len(selected) < k:
+            min_dist = np.minimum(
+                min_dist, _distances_to_numba(packed, offsets, n_types, positions, selected[-1])
+            )
+            eligible = np.flatnonzero(min_dist > self.HOF_MIN_DISTANCE)
+            if len(eligible) == 0:
+                break
+            if self.HOF_STRATEGY == "maxmin":
+                # argmax returns the first (fittest) of equally distant candidates
+                selected.append(int(eligible[np.argmax(min_dist[eligible])]))
+            else:
+                selected.append(int(eligible[0]))
+        return [population[i] for i in selected]
 
     def run(
         self,
@@ -189,66 +359,466 @@ class GeneticOptimizer:
         progress_callback: callable = None,
         initial_population: list[Individual] | None = None,
         use_local_search: bool = True,
-    ) -> list[Individual]:
-        
-        self.fitness_cache.clear()
+        solution_store: SolutionStore | None = None,
+        checkpoint: callable = None,
+        resume_from: dict | None = None,
+    ) -> list[Genome]:
+        """
+        Evolves a population and returns up to num_layouts distinct layouts.
+        With `checkpoint`, a single-population run passes its state (see
+        _checkpoint_state) to it every CHECKPOINT_INTERVAL generations;
+        `resume_from` continues from such a state instead of seeding.
+        """
+        self._prepare_run(graph, evaluator)
+
+        if solution_store is not None:
+            fingerprint = problem_fingerprint(evaluator)
+            lineage = self._population_lineage(initial_population)
+            self.fitness_cache.preload(
+                solution_store.load_fitness(fingerprint, self.fitness_cache.max_entries)
+            )
+            elites = self._restore_elites(
+                solution_store.load_elites(fingerprint, lineage), graph, evaluator
+            )
+            if elites:
+                print(f"Seeding population with {len(elites)} cached elites.")
+                initial_population = elites + list(initial_population or [])
+
+        if self.N_ISLANDS > 1:
+            pop = self._run_islands(
+                graph, evaluator, progress_callback, initial_population, use_local_search
+            )
+        else:
+            pop = self._run_single_population(
+                graph, evaluator, progress_callback, initial_population, use_local_search,
+                checkpoint, resume_from,
+            )
+
+        self.final_population = sorted(pop, key=lambda x: x.fitness.values[0])
+        hof = self._select_distinct_hof(pop, evaluator, k=num_layouts)
+        if solution_store is not None:
+            solution_store.save_fitness(fingerprint, self.fitness_cache.items())
+            solution_store.save_elites(fingerprint, lineage, hof)
+        return hof
+
+    def _prepare_run(self, graph: DiscretizedGraph, evaluator: FitnessEvaluator, log: bool = True) -> None:
+        self._evaluations_start = evaluator.n_evaluations
+        self.fitness_cache = FitnessCache(
+            evaluator.type_names,
+            max_entries=self.CACHE_MAX_ENTRIES,
+            max_memory_mb=self.CACHE_MAX_MEMORY_MB,
+        )
+        # Local search settings of this run; USE_DELTA and LS_MODE keep the configured ones
+        self._use_delta, self._ls_mode = self.USE_DELTA, self.LS_MODE
+        if not evaluator.supports_delta and (self._use_delta or self._ls_mode == "steepest"):
+            # Implicit-lattice graphs: stochastic local search on full evaluations
+            self._use_delta, self._ls_mode = False, "stochastic"
+            if log:
+                print("Implicit-lattice graph: using stochastic local search with full evaluations.")
         self._register_deap_tools(graph, evaluator)
 
+    def _evaluations_spent(self, evaluator: FitnessEvaluator) -> int:
+        """Evaluations this run has charged: full and delta, not fitness-cache hits."""
+        return evaluator.n_evaluations - self._evaluations_start
+
+    def _seed_population(self, initial_population: list[Individual] | None) -> list[Genome]:
         if initial_population:
-            pop = initial_population
-            if len(pop) < self.POP_SIZE: pop.extend(self.toolbox.population(n=self.POP_SIZE - len(pop)))
+            # Seeds may be dict-of-lists individuals (e.g. upsampled or cached)
+            pop = [
+                ind if isinstance(ind, Genome) and ind.type_names == self.type_names
+                else Genome.from_dict(ind, self.type_names)
+                for ind in initial_population
+            ]
+            if len(pop) < self.POP_SIZE and self.WARM_START_RADIUS is not None:
+                pop.extend(self.toolbox.perturb(pop[0], self.POP_SIZE - len(pop)))
+            elif len(pop) < self.POP_SIZE: pop.extend(self.toolbox.population(n=self.POP_SIZE - len(pop)))
             elif len(pop) > self.POP_SIZE: pop = pop[:self.POP_SIZE]
         else:
             pop = self.toolbox.population(n=self.POP_SIZE)
 
-        for ind in pop:
-            if not ind.fitness.valid:
-                 ind.fitness.values = self._evaluate_with_cache(ind)
-
-        last_best_fitness = float("inf")
-        stagnation_counter = 0
+        self._evaluate_population_with_cache([ind for ind in pop if not ind.fitness.valid])
+        return pop
 
-        for gen in range(self.GENERATIONS):
-            parents = self.toolbox.select(pop, len(pop))
-            offspring = [self.toolbox.clone(ind) for ind in parents]
+    def _next_generation(
+        self,
+        pop: list[Genome],
+        graph: DiscretizedGraph,
+        evaluator: FitnessEvaluator,
+        use_local_search: bool,
+    ) -> list[Genome]:
+        """One (mu + lambda) generation; the returned population is sorted by fitness."""
+        parents = self.toolbox.select(pop, len(pop))
+        offspring = self.toolbox.vary(parents)
 
-            for i in range(1, len(offspring), 2):
-                if random.random() < self.CXPB:
-                    offspring[i-1], offspring[i] = self.toolbox.mate(offspring[i-1], offspring[i])
-                    del offspring[i-1].fitness.values, offspring[i].fitness.values
-            
+        # --- Re-implemented Memetic Step ---
+        if use_local_search:
+            improve = self._steepest_descent if self._ls_mode == "steepest" else self._local_search
             for i in range(len(offspring)):
-                if random.random() < self.MUTPB:
-                    (offspring[i],) = self.toolbox.mutate(offspring[i])
-                    del offspring[i].fitness.values
-
-            # --- Re-implemented Memetic Step ---
-            if use_local_search:
-                for i in range(len(offspring)):
-                    if not offspring[i].fitness.valid:
-                        offspring[i] = self._local_search(offspring[i], graph, evaluator)
-                        # Fitness is already deleted by local search
-            
-            invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-            for ind in invalid_ind:
-                ind.fitness.values = self._evaluate_with_cache(ind)
+                if not offspring[i].fitness.valid:
+                    offspring[i] = improve(offspring[i], graph, evaluator)
+        
+        invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
+        self._evaluate_population_with_cache(invalid_ind)
+
+        combined = pop + offspring
+        combined.sort(key=lambda x: x.fitness.values[0])
+        return combined[:self.POP_SIZE]
+
+    def _run_single_population(
+        self,
+        graph: DiscretizedGraph,
+        evaluator: FitnessEvaluator,
+        progress_callback: callable,
+        initial_population: list[Individual] | None,
+        use_local_search: bool,
+        checkpoint: callable = None,
+        resume_from: dict | None = None,
+    ) -> list[Genome]:
+        monitor = self._convergence_monitor()
+        if resume_from is not None:
+            pop = [
+                ind if ind.type_names == self.type_names else Genome.from_dict(ind, self.type_names)
+                for ind in resume_from["population"]
+            ]
+            random.setstate(resume_from["random_state"])
+            np.random.set_state(resume_from["numpy_random_state"])
+            start_gen = resume_from["generation"]
+            monitor.resume(start_gen, resume_from["evaluations"], resume_from["elapsed_seconds"])
+            print(f"Resuming from checkpoint at generation {start_gen}.")
+        else:
+            pop = self._seed_population(initial_population)
+            start_gen = 0
+        # Baseline: the seeded (or resumed) population counts as generation zero
+        self._update_monitor(
+            monitor, sorted(pop, key=lambda x: x.fitness.values[0]), evaluator, 0,
+            self._evaluations_spent(evaluator),
+        )
 
-            combined = pop + offspring
-            combined.sort(key=lambda x: x.fitness.values[0])
-            pop = combined[:self.POP_SIZE]
+        for gen in range(start_gen, self.GENERATIONS):
+            if monitor.check_budget(self._evaluations_spent(evaluator)):
+                print(f"\nStopping at generation {gen} due to {monitor.reason.replace('_', ' ')}.")
+                break
+            pop = self._next_generation(pop, graph, evaluator, use_local_search)
 
             best_fitness = pop[0].fitness.values[0]
-            if last_best_fitness - best_fitness < self.MIN_IMPROVEMENT:
-                stagnation_counter += 1
-            else:
-                stagnation_counter = 0
-            last_best_fitness = best_fitness
-            
+            reason = self._update_monitor(monitor, pop, evaluator, evaluations=self._evaluations_spent(evaluator))
+
             if progress_callback:
-                progress_callback(gen, self.GENERATIONS, best_fitness, pop[0])
+                progress_callback(
+                    gen, self.GENERATIONS, best_fitness, pop[0],
+                    cache_stats=self.fitness_cache.stats(),
+                )
 
-            if self.STAGNATION_LIMIT is not None and stagnation_counter >= self.STAGNATION_LIMIT:
-                print(f"\nStopping early at generation {gen} due to stagnation.")
+            if reason:
+                print(f"\nStopping early at generation {gen} due to {reason.replace('_', ' ')}.")
                 break
 
-        return self._select_distinct_hof(pop, graph, k=num_layouts)
+            if checkpoint is not None and (gen + 1) % self.CHECKPOINT_INTERVAL == 0:
+                checkpoint(self._checkpoint_state(gen + 1, pop, monitor))
+
+        self.termination = monitor.summary()
+        return pop
+
+    @staticmethod
+    def _checkpoint_state(generation: int, pop: list[Genome], monitor: ConvergenceMonitor) -> dict:
+        """Everything needed to continue a single-population run at `generation`."""
+        return {
+            "generation": generation,
+            "population": pop,
+            "random_state": random.getstate(),
+            "numpy_random_state": np.random.get_state(),
+            "evaluations": monitor.evaluations,
+            "elapsed_seconds": monitor.elapsed_seconds(),
+        }
+
+    def _convergence_monitor(self) -> ConvergenceMonitor:
+        return ConvergenceMonitor(
+            window=self.CONVERGENCE_WINDOW,
+            min_gain_per_second=self.MIN_GAIN_PER_SECOND,
+            min_diversity=self.MIN_DIVERSITY,
+            min_improvement=self.MIN_IMPROVEMENT,
+            stagnation_limit=self.STAGNATION_LIMIT,
+            time_budget_seconds=self.TIME_BUDGET,
+            max_evaluations=self.MAX_EVALUATIONS,
+        )
+
+    def _update_monitor(
+        self,
+        monitor: ConvergenceMonitor,
+        pop: list[Genome],
+        evaluator: FitnessEvaluator,
+        n_generations: int = 1,
+        evaluations: int | None = None,
+    ) -> str | None:
+        """Feeds a fitness-sorted population's convergence signals to the monitor."""
+        signals = self._population_signals(pop, evaluator)
+        return monitor.update(
+            pop[0].fitness.values[0], None, signals["diversity"], n_generations, evaluations,
+            fitness_variance=signals["variance"],
+        )
+
+    def _population_signals(self, pop: list[Genome], evaluator: FitnessEvaluator) -> dict:
+        """
+        Size, fitness mean and variance, and diversity (mean distance to the
+        best individual) of a fitness-sorted population.
+        """
+        packed, offsets = evaluator.pack_population(pop)
+        distances = _distances_to_numba(
+            packed, offsets, len(self.type_names), evaluator.graph.grid_positions, 0
+        )
+        fitnesses = np.array([ind.fitness.values[0] for ind in pop])
+        return {
+            "size": len(pop),
+            "mean": float(fitnesses.mean()),
+            "variance": float(fitnesses.var()),
+            "diversity": float(distances.mean()),
+        }
+
+    # --- Island Model ---
+
+    def _island_optimizer_kwargs(self) -> dict:
+        """Settings for the single-population optimizer running on each island."""
+        return dict(
+            pop_size=max(-(-self.POP_SIZE // self.N_ISLANDS), 2),
+            generations=self.GENERATIONS,
+            cxpb=self.CXPB,
+            mutpb=self.MUTPB,
+            swap_pb=self.SWAP_PB,
+            dup_pb=self.DUP_PB,
+            prune_pb=self.PRUNE_PB,
+            tournsize=self.TOUR_SIZE,
+            stagnation_limit=None,
+            min_improvement=self.MIN_IMPROVEMENT,
+            random_walk_decay=self.RW_DECAY,
+            random_walk_scale=self.RW_SCALE,
+            use_delta_evaluation=self.USE_DELTA,
+            local_search_mode=self.LS_MODE,
+            local_search_max_steps=self.LS_MAX_STEPS,
+            warm_start_radius=self.WARM_START_RADIUS,
+            cache_max_entries=self.CACHE_MAX_ENTRIES,
+            cache_max_memory_mb=self.CACHE_MAX_MEMORY_MB,
+        )
+
+    def _island_budget(self, monitor: ConvergenceMonitor) -> dict:
+        """
+        Each island's share of what is left of the run's budgets for one
+        migration round: an evaluation count and an absolute time.time()
+        deadline (None when unbounded).
+        """
+        evaluations = deadline = None
+        if self.MAX_EVALUATIONS is not None:
+            evaluations = -(-max(self.MAX_EVALUATIONS - monitor.evaluations, 0) // self.N_ISLANDS)
+        if self.TIME_BUDGET is not None:
+            # Like check_budget, only this process's time counts
+            elapsed = time.perf_counter() - monitor.start_time
+            deadline = time.time() + max(self.TIME_BUDGET - elapsed, 0.0)
+        return {"evaluations": evaluations, "deadline": deadline}
+
+    def _migration_targets(self) -> list[int]:
+        """Destination island of each island's emigrants for one migration."""
+        n = self.N_ISLANDS
+        if self.MIGRATION_TOPOLOGY == "ring":
+            return [(i + 1) % n for i in range(n)]
+        return [random.choice([j for j in range(n) if j != i]) for i in range(n)]
+
+    def _run_islands(
+        self,
+        graph: DiscretizedGraph,
+        evaluator: FitnessEvaluator,
+        progress_callback: callable,
+        initial_population: list[Individual] | None,
+        use_local_search: bool,
+    ) -> list[Genome]:
+        """
+        Evolves N_ISLANDS sub-populations in worker processes, exchanging the
+        top MIGRATION_SIZE individuals every MIGRATION_INTERVAL generations.
+        Migration is synchronous and island seeds are drawn from `random`, so
+        a fixed seed reproduces the run. Returns the merged final populations.
+        """
+        ctx = mp.get_context("spawn")
+        kwargs = self._island_optimizer_kwargs()
+        monitor = self._convergence_monitor()
+        islands = []
+        try:
+            for _ in range(self.N_ISLANDS):
+                parent_conn, child_conn = ctx.Pipe()
+                process = ctx.Process(
+                    target=_island_worker,
+                    args=(
+                        child_conn, kwargs, graph, evaluator, random.getrandbits(32),
+                        initial_population, use_local_search, self.MIGRATION_SIZE, self.N_ISLANDS,
+                    ),
+                    daemon=True,
+                )
+                process.start()
+                child_conn.close()
+                islands.append((process, parent_conn))
+
+            immigrants = [[] for _ in islands]
+            gen = 0
+            while gen < self.GENERATIONS and not monitor.check_budget():
+                n_gens = min(self.MIGRATION_INTERVAL, self.GENERATIONS - gen)
+                budget = self._island_budget(monitor)
+                for (_, conn), incoming in zip(islands, immigrants):
+                    conn.send(("evolve", incoming, n_gens, budget))
+                replies = [_receive(conn) for _, conn in islands]
+                ran = max(r[3] for r in replies)
+                gen += ran
+
+                immigrants = [[] for _ in islands]
+                for src, dst in enumerate(self._migration_targets()):
+                    immigrants[dst].extend(replies[src][0])
+
+                elites = sorted((ind for r in replies for ind in r[0]), key=lambda x: x.fitness.values[0])
+                best_ind = elites[0]
+                best_fitness = best_ind.fitness.values[0]
+                cache_stats = _merge_cache_stats([r[1] for r in replies])
+                signals = _merge_population_signals([r[4] for r in replies])
+                reason = monitor.update(
+                    best_fitness, None, signals["diversity"], ran, sum(r[2] for r in replies),
+                    fitness_variance=signals["variance"],
+                )
+
+                if progress_callback:
+                    progress_callback(
+                        gen - 1, self.GENERATIONS, best_fitness, best_ind, cache_stats=cache_stats
+                    )
+
+                if reason:
+                    print(f"\nStopping early at generation {gen - 1} due to {reason.replace('_', ' ')}.")
+                    break
+                if ran < n_gens:
+                    # Every island ran out of its share of the budget
+                    monitor.check_budget()
+                    break
+
+            self.termination = monitor.summary()
+            merged = []
+            for _, conn in islands:
+                conn.send(("finish",))
+                pop, cache_items = _receive(conn)
+                merged.extend(pop)
+                # So that run() persists what the islands evaluated
+                for key, fitness in cache_items:
+                    self.fitness_cache.put(key, fitness)
+            return merged
+        finally:
+            for process, conn in islands:
+                conn.close()
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def _population_lineage(self, initial_population: list[Individual] | None) -> str:
+        """Identifies a seeded stage by its seed genomes ('' for a random start)."""
+        if not initial_population:
+            return ""
+        keys = sorted(self.fitness_cache.key(ind) for ind in initial_population)
+        return hashlib.sha256(str(keys).encode()).hexdigest()
+
+    def _restore_elites(
+        self, stored: list[tuple[dict, float]], graph: DiscretizedGraph, evaluator: FitnessEvaluator
+    ) -> list[Genome]:
+        """Rebuilds cached elites, dropping any that no longer fit this problem."""
+        elites = []
+        for genome, fitness in stored:
+            if not set(genome) <= set(evaluator.type_names):
+                continue
+            if any(not 0 <= n < graph.n_nodes for nodes in genome.values() for n in nodes):
+                continue
+            ind = Genome.from_dict(genome, evaluator.type_names)
+            ind.fitness.values = (fitness,)
+            elites.append(ind)
+        return elites[: self.POP_SIZE]
+
+
+def _receive(conn):
+    message = conn.recv()
+    if isinstance(message, tuple) and message and message[0] == "error":
+        raise RuntimeError(f"Island worker failed:\n{message[1]}")
+    return message
+
+
+def _merge_cache_stats(stats: list[dict]) -> dict:
+    merged = {key: sum(s[key] for s in stats) for key in ("size", "hits", "misses", "evictions")}
+    lookups = merged["hits"] + merged["misses"]
+    merged["hit_rate"] = merged["hits"] / lookups if lookups else 0.0
+    return merged
+
+
+def _merge_population_signals(signals: list[dict]) -> dict:
+    """Population signals of the union of the islands' populations."""
+    sizes = np.array([s["size"] for s in signals], dtype=np.float64)
+    means = np.array([s["mean"] for s in signals])
+    weights = sizes / sizes.sum()
+    mean = float(weights @ means)
+    return {
+        "size": int(sizes.sum()),
+        "mean": mean,
+        # Within-island variance plus the variance of the island means
+        "variance": float(weights @ (np.array([s["variance"] for s in signals]) + (means - mean) ** 2)),
+        # Mean distance of each individual to its own island's best
+        "diversity": float(weights @ np.array([s["diversity"] for s in signals])),
+    }
+
+
+def _island_worker(
+    conn,
+    optimizer_kwargs: dict,
+    graph: DiscretizedGraph,
+    evaluator: FitnessEvaluator,
+    seed: int,
+    initial_population: list[Individual] | None,
+    use_local_search: bool,
+    migration_size: int,
+    n_islands: int,
+) -> None:
+    """
+    Island process loop. Each ("evolve", immigrants, n, budget) message
+    replaces the worst individuals with the immigrants and runs up to n
+    generations, stopping early once the round's budget (see
+    GeneticOptimizer._island_budget) is spent. It replies with the top
+    `migration_size` individuals, cache stats, the island's evaluations so
+    far, the generations run and its population signals (see
+    GeneticOptimizer._population_signals); ("finish",) replies with the
+    final population and the island's fitness cache entries.
+    """
+    try:
+        # The islands share the cores (NUMBA_NUM_THREADS defaults to the CPU count)
+        numba.set_num_threads(max(1, numba.config.NUMBA_NUM_THREADS // n_islands))
+        random.seed(seed)
+        np.random.seed(seed)
+        optimizer = GeneticOptimizer(**optimizer_kwargs)
+        optimizer._prepare_run(graph, evaluator, log=False)
+        pop = optimizer._seed_population(
+            [optimizer.toolbox.clone(ind) for ind in initial_population or []]
+        )
+        while True:
+            message = conn.recv()
+            if message[0] == "finish":
+                conn.send((pop, list(optimizer.fitness_cache.items())))
+                return
+            _, immigrants, n_gens, budget = message
+            if immigrants:
+                keep = max(len(pop) - len(immigrants), 0)
+                pop = pop[:keep] + immigrants[: len(pop) - keep]
+                pop.sort(key=lambda x: x.fitness.values[0])
+            round_start = optimizer._evaluations_spent(evaluator)
+            ran = 0
+            while ran < n_gens:
+                if budget["deadline"] is not None and time.time() >= budget["deadline"]:
+                    break
+                spent = optimizer._evaluations_spent(evaluator) - round_start
+                if budget["evaluations"] is not None and spent >= budget["evaluations"]:
+                    break
+                pop = optimizer._next_generation(pop, graph, evaluator, use_local_search)
+                ran += 1
+            conn.send((
+                pop[:migration_size], optimizer.fitness_cache.stats(),
+                optimizer._evaluations_spent(evaluator), ran,
+                optimizer._population_signals(pop, evaluator),
+            ))
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
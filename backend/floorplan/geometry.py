@@ -4,7 +4,7 @@ import shapely
 from scipy.spatial import cKDTree
 from shapely import MultiPolygon, Polygon, prepare, unary_union
 
-from floorplan.data_models import FloorPlan, ScalingInfo, DiscretizationResult
+from floorplan.data_models import DiscretizationResult, FloorPlan, GridPyramid, ScalingInfo
 
 class GeometryProcessor:
     """
@@ -32,6 +32,21 @@ class GeometryProcessor:
 
         return final_polygon.buffer(0)
 
+    @staticmethod
+    def grid_size(plan: FloorPlan, target_node_count: int) -> int:
+        """Grid size n at which discretize() yields roughly target_node_count nodes."""
+        temp_poly = GeometryProcessor._create_combined_polygon(plan)
+        if temp_poly.is_empty:
+            raise ValueError(f"Polygon for floor '{plan.name}' is empty.")
+
+        area_per_node = temp_poly.area / target_node_count
+        grid_spacing = np.sqrt(area_per_node)
+        minx, miny, maxx, maxy = temp_poly.bounds
+        width, height = maxx - minx, maxy - miny
+        nx = int(np.ceil(width / grid_spacing))
+        ny = int(np.ceil(height / grid_spacing))
+        return max(nx, ny, 1)
+
     @staticmethod
     def discretize(plan: FloorPlan, n: int) -> DiscretizationResult:
         """
@@ -97,6 +112,76 @@ class GeometryProcessor:
             scaling_info=scaling_info,
         )
 
+    @staticmethod
+    def link_levels(
+        coarse: DiscretizationResult, fine: DiscretizationResult
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Node maps between one floor's discretizations at grid sizes n and 2n:
+        parents (fine node -> coarse node whose cell contains it) and children
+        (coarse node -> its contained fine node nearest the coarse centre).
+        """
+        n = coarse.scaling_info.n
+        if fine.scaling_info.n != 2 * n:
+            raise ValueError(f"Grid size {fine.scaling_info.n} does not refine grid size {n}.")
+        coarse_pos, fine_pos = coarse.grid_positions, fine.grid_positions
+        if (len(coarse_pos) == 0) != (len(fine_pos) == 0):
+            raise ValueError(f"Floor has nodes at only one of grid sizes {n} and {2 * n}.")
+        if len(coarse_pos) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+
+        # Cell (x, y) of the coarse raster holds its node index, or -1
+        raster = np.full((n, n), -1, dtype=np.int32)
+        cells = np.floor(coarse_pos).astype(np.int64)
+        raster[cells[:, 1], cells[:, 0]] = np.arange(len(coarse_pos), dtype=np.int32)
+        parent_cells = np.floor(fine_pos).astype(np.int64) // 2
+        parents = raster[parent_cells[:, 1], parent_cells[:, 0]]
+        direct = parents >= 0
+        if not direct.all():
+            parents[~direct] = coarse.nearest_nodes(fine_pos[~direct] / 2)
+
+        # First contained fine node per coarse node, nearest (then lowest index) first
+        contained = np.flatnonzero(direct)
+        owners = parents[contained]
+        dists = np.linalg.norm(fine_pos[contained] / 2 - coarse_pos[owners], axis=1)
+        order = np.lexsort((contained, dists, owners))
+        owned, first = np.unique(owners[order], return_index=True)
+        children = np.full(len(coarse_pos), -1, dtype=np.int32)
+        children[owned] = contained[order[first]]
+        missing = children < 0
+        if missing.any():
+            children[missing] = fine.nearest_nodes(coarse_pos[missing] * 2)
+        return parents, children
+
+    @staticmethod
+    def build_pyramid(
+        plans: list[FloorPlan], base_sizes: list[int], n_levels: int, discretize=None
+    ) -> GridPyramid:
+        """
+        Discretizes every floor at grid sizes base_sizes * 2**level for
+        n_levels levels and links consecutive levels (see GridPyramid).
+        `discretize(plan, n)` defaults to GeometryProcessor.discretize.
+        """
+        discretize = discretize or GeometryProcessor.discretize
+        levels = [
+            [discretize(plan, n * 2**level) for plan, n in zip(plans, base_sizes)]
+            for level in range(n_levels)
+        ]
+
+        parents, children = [], []
+        for coarse_level, fine_level in zip(levels, levels[1:]):
+            level_parents, level_children = [], []
+            coarse_offset = fine_offset = 0
+            for coarse, fine in zip(coarse_level, fine_level):
+                floor_parents, floor_children = GeometryProcessor.link_levels(coarse, fine)
+                level_parents.append(floor_parents + coarse_offset)
+                level_children.append(floor_children + fine_offset)
+                coarse_offset += len(coarse.grid_positions)
+                fine_offset += len(fine.grid_positions)
+            parents.append(np.concatenate(level_parents).astype(np.int32))
+            children.append(np.concatenate(level_children).astype(np.int32))
+        return GridPyramid(list(base_sizes), levels, parents, children)
+
     @staticmethod
     def _generate_grid_positions(scaled_polygon: Polygon, n: int) -> np.ndarray:
         min_x, min_y, max_x, max_y = [int(np.floor(b)) for b in scaled_polygon.bounds]
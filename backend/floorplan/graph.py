@@ -1,9 +1,8 @@
-from collections import deque
-
 import numpy as np
-from scipy.spatial import cKDTree
+from scipy import ndimage, sparse
+from scipy.sparse import csgraph
 
-from floorplan.data_models import DiscretizationResult, DiscretizedGraph
+from floorplan.data_models import DiscretizationResult, DiscretizedGraph, LatticeGraph
 
 
 class GraphBuilder:
@@ -12,10 +11,19 @@ class GraphBuilder:
     geometric data.
     """
 
+    # Lattice neighbour offsets (dx, dy), in ascending node-index order for
+    # the row-major positions of GeometryProcessor._generate_grid_positions
+    _LATTICE_OFFSETS = ((0, -1), (-1, 0), (1, 0), (0, 1))
+
     @staticmethod
     def build_for_single_floor(
         discretization_result: DiscretizationResult,
     ) -> DiscretizedGraph:
+        """
+        4-neighbour lattice graph of a floor. Grid positions are cell
+        centres, so every node is written into a dense cell -> node raster
+        (padded with -1) and each neighbour direction is one shifted read.
+        """
         grid_positions = discretization_result.grid_positions
         n_nodes = len(grid_positions)
 
@@ -24,150 +32,226 @@ class GraphBuilder:
                 grid_positions=np.empty((0, 2)),
                 adj_indices=np.empty(0, dtype=np.int32),
                 adj_indptr=np.zeros(1, dtype=np.int32),
-                adjacency_list={},
-                adjacency_edges_np=np.empty((2, 0), dtype=int),
                 n_nodes=0,
                 floor_node_ranges=np.array([[0, 0]], dtype=int),
             )
 
-        tree = cKDTree(grid_positions)
-        adj_list_of_lists = tree.query_ball_point(grid_positions, r=1.01)
-
-        adj_dict: dict[int, list[int]] = {}
-        indices = []
-        adj_indptr = np.zeros(n_nodes + 1, dtype=np.int32)
-
-        for i, neighbors_with_self in enumerate(adj_list_of_lists):
-            neighbors = [n for n in neighbors_with_self if n != i]
-            adj_dict[i] = neighbors
-            adj_indptr[i + 1] = adj_indptr[i] + len(neighbors)
-            indices.extend(neighbors)
+        cells = GraphBuilder._raster_cells(grid_positions)
+        width, height = cells.max(axis=0) + 2
+        raster = np.full((height, width), -1, dtype=np.int32)
+        raster[cells[:, 1], cells[:, 0]] = np.arange(n_nodes, dtype=np.int32)
 
-        adj_indices_np = np.array(indices, dtype=np.int32)
+        # (n_nodes, 4) neighbour table; missing neighbours sort to the end
+        neighbors = np.stack(
+            [raster[cells[:, 1] + dy, cells[:, 0] + dx] for dx, dy in GraphBuilder._LATTICE_OFFSETS],
+            axis=1,
+        )
+        neighbors[neighbors < 0] = n_nodes
+        neighbors.sort(axis=1)
+        valid = neighbors < n_nodes
 
-        adjacency_edges = [
-            (u, v) for u, nbrs in adj_dict.items() for v in nbrs if u < v
-        ]
-        if adjacency_edges:
-            adjacency_edges_np = np.array(adjacency_edges).T
-        else:
-            adjacency_edges_np = np.empty((2, 0), dtype=int)
+        adj_indptr = np.zeros(n_nodes + 1, dtype=np.int32)
+        np.cumsum(valid.sum(axis=1), out=adj_indptr[1:])
+        adj_indices = neighbors[valid].astype(np.int32)
 
         return DiscretizedGraph(
             grid_positions=grid_positions,
-            adj_indices=adj_indices_np,
+            adj_indices=adj_indices,
             adj_indptr=adj_indptr,
-            adjacency_list=adj_dict,
-            adjacency_edges_np=adjacency_edges_np,
             n_nodes=n_nodes,
             floor_node_ranges=np.array([[0, n_nodes - 1]], dtype=int),
         )
 
+    @staticmethod
+    def _raster_cells(grid_positions: np.ndarray) -> np.ndarray:
+        """(x, y) raster cell of each node, leaving one cell of padding on every side."""
+        cells = np.floor(grid_positions).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        return cells
+
+    @staticmethod
+    def _connection_edges(
+        floor_connections: list[dict[str, int]], node_offsets: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Both directions of each connection's links between consecutive floors, as global (rows, cols)."""
+        global_connections: dict[str, list[int]] = {}
+        for offset, conn_dict in zip(node_offsets, floor_connections):
+            for conn_id, node_idx in conn_dict.items():
+                global_connections.setdefault(conn_id, []).append(node_idx + offset)
+        rows, cols = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for nodes in global_connections.values():
+            nodes = np.asarray(nodes, dtype=np.int64)
+            rows += [nodes[:-1], nodes[1:]]
+            cols += [nodes[1:], nodes[:-1]]
+        return np.concatenate(rows), np.concatenate(cols)
+
     @staticmethod
     def stitch_graphs(
         floor_graphs: list[DiscretizedGraph],
         floor_connections: list[dict[str, int]],
+        floor_names: list[str] | None = None,
     ) -> DiscretizedGraph:
+        """
+        Stacks the floor graphs into one (floor i's nodes follow floor i - 1's)
+        and links the nodes of each connection id on consecutive floors.
+        Raises ValueError naming the floors of every disconnected component.
+        """
         if not floor_graphs:
             raise ValueError("Cannot stitch an empty list of graphs.")
         if len(floor_graphs) == 1:
             return floor_graphs[0]
 
-        node_offsets = np.cumsum(
-            [0] + [g.n_nodes for g in floor_graphs[:-1]], dtype=int
-        )
-        total_nodes = sum(g.n_nodes for g in floor_graphs)
+        floor_sizes = np.array([g.n_nodes for g in floor_graphs], dtype=np.int64)
+        node_offsets = np.concatenate(([0], np.cumsum(floor_sizes)[:-1]))
+        total_nodes = int(floor_sizes.sum())
 
-        all_grid_positions = np.vstack([g.grid_positions for g in floor_graphs])
+        # Every floor's CSR entries as global (row, col) pairs ...
+        rows = [np.repeat(np.arange(total_nodes), np.concatenate([np.diff(g.adj_indptr) for g in floor_graphs]))]
+        cols = [np.concatenate([g.adj_indices + offset for g, offset in zip(floor_graphs, node_offsets)])]
 
-        all_adj_indices_list = []
-        for i, graph in enumerate(floor_graphs):
-            all_adj_indices_list.append(graph.adj_indices + node_offsets[i])
-        new_adj_indices = np.concatenate(all_adj_indices_list, dtype=np.int32)
+        # ... plus both directions of each connection's floor-to-floor links
+        link_rows, link_cols = GraphBuilder._connection_edges(floor_connections, node_offsets)
+        rows, cols = np.concatenate(rows + [link_rows]), np.concatenate(cols + [link_cols])
+        adjacency = sparse.coo_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(total_nodes, total_nodes)
+        ).tocsr()
+        adjacency.sum_duplicates()
+        adj_indices = adjacency.indices.astype(np.int32)
+        adj_indptr = adjacency.indptr.astype(np.int32)
 
-        all_neighbor_counts = []
-        for graph in floor_graphs:
-            all_neighbor_counts.append(np.diff(graph.adj_indptr))
+        floor_ranges = np.stack([node_offsets, node_offsets + floor_sizes - 1], axis=1).astype(int)
+        GraphBuilder.validate_connectivity(adj_indices, adj_indptr, floor_ranges, floor_names)
 
-        new_adj_indptr = np.concatenate(
-            ([0], np.cumsum(np.concatenate(all_neighbor_counts), dtype=np.int32))
+        return DiscretizedGraph(
+            grid_positions=np.vstack([g.grid_positions for g in floor_graphs]),
+            adj_indices=adj_indices,
+            adj_indptr=adj_indptr,
+            n_nodes=total_nodes,
+            floor_node_ranges=floor_ranges,
         )
 
-        global_connections: dict[str, list[int]] = {}
-        for i, conn_dict in enumerate(floor_connections):
-            offset = node_offsets[i]
-            for conn_id, node_idx in conn_dict.items():
-                global_connections.setdefault(conn_id, []).append(node_idx + offset)
+    @staticmethod
+    def build_lattice(
+        discretization_results: list[DiscretizationResult],
+        floor_names: list[str] | None = None,
+    ) -> LatticeGraph:
+        """
+        The implicit-lattice equivalent of stitching build_for_single_floor
+        graphs: same node order and neighbours, but only the connection links
+        are stored as edges. Each floor's padded raster is stacked below the
+        previous one's. Raises ValueError like stitch_graphs.
+        """
+        if not discretization_results:
+            raise ValueError("Cannot stitch an empty list of graphs.")
 
-        temp_adj_list: dict[int, list[int]] = {}
-        for i in range(total_nodes):
-            start, end = new_adj_indptr[i], new_adj_indptr[i + 1]
-            temp_adj_list[i] = new_adj_indices[start:end].tolist()
-
-        for conn_id, nodes in global_connections.items():
-            if len(nodes) > 1:
-                for i in range(len(nodes) - 1):
-                    u, v = nodes[i], nodes[i + 1]
-                    temp_adj_list[u].append(v)
-                    temp_adj_list[v].append(u)
-
-        final_indices = []
-        final_indptr = np.zeros(total_nodes + 1, dtype=np.int32)
-        for i in range(total_nodes):
-            neighbors = sorted(list(set(temp_adj_list.get(i, []))))
-            final_indptr[i + 1] = final_indptr[i] + len(neighbors)
-            final_indices.extend(neighbors)
-
-        final_adj_indices_np = np.array(final_indices, dtype=np.int32)
-
-        final_adj_list = {
-            i: final_adj_indices_np[final_indptr[i] : final_indptr[i + 1]].tolist()
-            for i in range(total_nodes)
-        }
-        final_edges = [
-            (u, v) for u, nbrs in final_adj_list.items() for v in nbrs if u < v
+        floor_cells = [
+            GraphBuilder._raster_cells(d.grid_positions) if len(d.grid_positions) else np.empty((0, 2), dtype=np.int64)
+            for d in discretization_results
         ]
-        final_edges_np = (
-            np.array(final_edges, dtype=int).T
-            if final_edges
-            else np.empty((2, 0), dtype=int)
+        heights = [cells[:, 1].max() + 2 if len(cells) else 0 for cells in floor_cells]
+        width = max([cells[:, 0].max() + 2 for cells in floor_cells if len(cells)], default=0)
+        row_offsets = np.concatenate(([0], np.cumsum(heights)[:-1]))
+        node_cells = np.concatenate(
+            [(cells[:, 1] + rows) * width + cells[:, 0] for cells, rows in zip(floor_cells, row_offsets)]
         )
 
-        GraphBuilder.validate_connectivity(total_nodes, final_adj_list)
+        n_nodes = len(node_cells)
+        cell_raster = np.full(int(sum(heights)) * width, -1, dtype=np.int32)
+        cell_raster[node_cells] = np.arange(n_nodes, dtype=np.int32)
 
-        floor_ranges = []
-        for i, graph in enumerate(floor_graphs):
-            offset = node_offsets[i]
-            floor_ranges.append([offset, offset + graph.n_nodes - 1])
+        floor_sizes = np.array([len(cells) for cells in floor_cells], dtype=np.int64)
+        node_offsets = np.concatenate(([0], np.cumsum(floor_sizes)[:-1]))
+        rows, cols = GraphBuilder._connection_edges(
+            [d.connection_nodes for d in discretization_results], node_offsets
+        )
+        links = sparse.coo_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n_nodes, n_nodes)
+        ).tocsr()
+        links.sum_duplicates()
 
-        return DiscretizedGraph(
-            grid_positions=all_grid_positions,
-            adj_indices=final_adj_indices_np,
-            adj_indptr=final_indptr,
-            adjacency_list=final_adj_list,
-            adjacency_edges_np=final_edges_np,
-            n_nodes=total_nodes,
-            floor_node_ranges=np.array(floor_ranges, dtype=int),
+        graph = LatticeGraph(
+            grid_positions=np.vstack([d.grid_positions for d in discretization_results]),
+            cell_raster=cell_raster,
+            raster_width=width,
+            node_cells=node_cells,
+            link_indices=links.indices,
+            link_indptr=links.indptr,
+            n_nodes=n_nodes,
+            floor_node_ranges=np.stack([node_offsets, node_offsets + floor_sizes - 1], axis=1).astype(int),
         )
+        if len(discretization_results) > 1:
+            GraphBuilder.validate_lattice_connectivity(graph, floor_names)
+        return graph
 
     @staticmethod
-    def validate_connectivity(n_nodes: int, adj_list: dict[int, list[int]]):
+    def validate_connectivity(
+        adj_indices: np.ndarray,
+        adj_indptr: np.ndarray,
+        floor_node_ranges: np.ndarray,
+        floor_names: list[str] | None = None,
+    ) -> None:
+        """Raises ValueError listing each connected component's size and floors unless there is only one."""
+        n_nodes = len(adj_indptr) - 1
         if n_nodes == 0:
             return
 
-        q = deque([next(iter(adj_list.keys()))])
-        visited = {q[0]}
-
-        while q:
-            u = q.popleft()
-            for v in adj_list.get(u, []):
-                if v not in visited:
-                    visited.add(v)
-                    q.append(v)
-
-        if len(visited) != n_nodes:
-            raise ValueError(
-                "The stitched multi-floor graph is not fully connected. "
-                "Check that all floors have geometry and that connections "
-                "form a continuous path."
-            )
+        adjacency = sparse.csr_matrix(
+            (np.ones(len(adj_indices), dtype=np.int8), adj_indices, adj_indptr), shape=(n_nodes, n_nodes)
+        )
+        n_components, labels = csgraph.connected_components(adjacency, directed=False)
+        GraphBuilder._check_components(n_components, labels, floor_node_ranges, floor_names)
+
+    @staticmethod
+    def validate_lattice_connectivity(graph: LatticeGraph, floor_names: list[str] | None = None) -> None:
+        """
+        validate_connectivity for a LatticeGraph: the raster is labelled
+        (4-connected), then the labels are merged along the links.
+        """
+        if graph.n_nodes == 0:
+            return
+
+        raster = graph.cell_raster.reshape(-1, graph.raster_width)
+        cell_labels, n_cell_labels = ndimage.label(raster >= 0)
+        node_labels = cell_labels.ravel()[graph.node_cells] - 1
+        rows = np.repeat(np.arange(graph.n_nodes), np.diff(graph.link_indptr))
+        merged = sparse.coo_matrix(
+            (np.ones(len(rows), dtype=np.int8), (node_labels[rows], node_labels[graph.link_indices])),
+            shape=(n_cell_labels, n_cell_labels),
+        )
+        n_components, label_components = csgraph.connected_components(merged, directed=False)
+        GraphBuilder._check_components(
+            n_components, label_components[node_labels], graph.floor_node_ranges, floor_names
+        )
+
+    @staticmethod
+    def _check_components(
+        n_components: int,
+        labels: np.ndarray,
+        floor_node_ranges: np.ndarray,
+        floor_names: list[str] | None = None,
+    ) -> None:
+        if n_components == 1:
+            return
+
+        if floor_names is None:
+            floor_names = [f"floor {i}" for i in range(len(floor_node_ranges))]
+        floor_sizes = floor_node_ranges[:, 1] - floor_node_ranges[:, 0] + 1
+        node_floor = np.repeat(np.arange(len(floor_sizes)), floor_sizes)
+        component_floors = np.unique(np.stack([labels, node_floor], axis=1), axis=0)
+        component_sizes = np.bincount(labels)
+
+        # Largest component first; a few lines are enough to locate the break
+        max_listed = 10
+        descriptions = []
+        for component in np.argsort(-component_sizes, kind="stable")[:max_listed]:
+            floors = component_floors[component_floors[:, 0] == component, 1]
+            names = ", ".join(f"'{floor_names[f]}'" for f in floors)
+            descriptions.append(f"{component_sizes[component]} nodes on {names}")
+        if n_components > max_listed:
+            descriptions.append(f"{n_components - max_listed} more")
+
+        raise ValueError(
+            f"The stitched multi-floor graph is not fully connected: it has {n_components} "
+            f"components ({'; '.join(descriptions)}). Check that all floors have geometry "
+            "and that connections form a continuous path."
+        )
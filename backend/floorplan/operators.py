@@ -0,0 +1,354 @@
+import os
+
+import numba
+import numpy as np
+from numba import types
+
+# Jobs run parallel kernels from FastAPI's threadpool, after which TBB's
+# worker pool can hang interpreter shutdown; prefer OpenMP unless the
+# NUMBA_THREADING_LAYER(_PRIORITY) environment variables choose.
+if "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+# Batched variation operators. A batch uses the packed layout of
+# FitnessEvaluator.pack_population: individual p owns rows
+# offsets[p]:offsets[p + 1] of an (n, 2) int32 [node, type] array, with each
+# individual's rows grouped by ascending type (the Genome layout).
+# Every variation kernel seeds Numba's generator from its `seed` argument, so a
+# batch is reproducible from the caller's RNG stream.
+
+
+@numba.jit(nopython=True, cache=True)
+def _type_counts_numba(packed, offsets, n_types):
+    n_individuals = len(offsets) - 1
+    counts = np.zeros((n_individuals, n_types), dtype=np.int64)
+    for p in range(n_individuals):
+        for r in range(offsets[p], offsets[p + 1]):
+            counts[p, packed[r, 1]] += 1
+    return counts
+
+
+@numba.jit(nopython=True, cache=True)
+def _crossover_batch_numba(packed, offsets, n_types, cxpb, seed):
+    """
+    Pairs individuals (0, 1), (2, 3), ... and, with probability cxpb, swaps
+    the tail of every type's centroid list after the first parent's midpoint.
+    Returns the children batch and a per-individual 'changed' mask.
+    """
+    np.random.seed(seed)
+    n_individuals = len(offsets) - 1
+    crossed = np.zeros(n_individuals, dtype=np.bool_)
+    for i in range(1, n_individuals, 2):
+        if np.random.random() < cxpb:
+            crossed[i - 1] = True
+            crossed[i] = True
+
+    counts = _type_counts_numba(packed, offsets, n_types)
+    starts = np.empty((n_individuals, n_types), dtype=np.int64)
+    for p in range(n_individuals):
+        row = offsets[p]
+        for t in range(n_types):
+            starts[p, t] = row
+            row += counts[p, t]
+
+    # Child p keeps own[:split] and takes partner[split:], split = len(first parent) // 2
+    new_counts = counts.copy()
+    for i in range(1, n_individuals, 2):
+        if crossed[i]:
+            a, b = i - 1, i
+            for t in range(n_types):
+                split = counts[a, t] // 2
+                new_counts[a, t] = split + max(counts[b, t] - split, 0)
+                new_counts[b, t] = min(split, counts[b, t]) + counts[a, t] - split
+
+    out_offsets = np.zeros(n_individuals + 1, dtype=np.int64)
+    for p in range(n_individuals):
+        out_offsets[p + 1] = out_offsets[p] + new_counts[p].sum()
+    out = np.empty((out_offsets[-1], 2), dtype=np.int32)
+
+    for p in range(n_individuals):
+        w = out_offsets[p]
+        if not crossed[p]:
+            for r in range(offsets[p], offsets[p + 1]):
+                out[w, 0] = packed[r, 0]
+                out[w, 1] = packed[r, 1]
+                w += 1
+            continue
+        first = p - (p % 2)
+        partner = p + 1 if p % 2 == 0 else p - 1
+        for t in range(n_types):
+            split = counts[first, t] // 2
+            for k in range(min(split, counts[p, t])):
+                out[w, 0] = packed[starts[p, t] + k, 0]
+                out[w, 1] = t
+                w += 1
+            for k in range(split, counts[partner, t]):
+                out[w, 0] = packed[starts[partner, t] + k, 0]
+                out[w, 1] = t
+                w += 1
+    return out, out_offsets, crossed
+
+
+@numba.jit(nopython=True, cache=True)
+def _random_neighbor_numba(node, adj_indices, adj_indptr, cell_raster, node_cells, raster_width):
+    """
+    A uniformly random neighbour of node, or -1 if it has none. The graph is
+    CSR (cell_raster empty) or a LatticeGraph, with adj_indices/adj_indptr
+    then holding its links; either way the k-th neighbour is taken in
+    ascending order, so both forms walk identically.
+    """
+    first = adj_indptr[node]
+    n_links = adj_indptr[node + 1] - first
+    if len(cell_raster) == 0:
+        if n_links == 0:
+            return -1
+        return adj_indices[first + np.random.randint(0, n_links)]
+
+    cell = node_cells[node]
+    steps = (-raster_width, -1, 1, raster_width)
+    n_lattice = 0
+    for d in range(4):
+        if cell_raster[cell + steps[d]] != -1:
+            n_lattice += 1
+    if n_lattice + n_links == 0:
+        return -1
+    k = np.random.randint(0, n_lattice + n_links)
+    # Links below node sort first, the lattice neighbours next, links above last
+    n_below = 0
+    while n_below < n_links and adj_indices[first + n_below] < node:
+        n_below += 1
+    if k < n_below:
+        return adj_indices[first + k]
+    k -= n_below
+    if k >= n_lattice:
+        return adj_indices[first + n_below + k - n_lattice]
+    for d in range(4):
+        neighbor = cell_raster[cell + steps[d]]
+        if neighbor != -1:
+            if k == 0:
+                return neighbor
+            k -= 1
+    return -1
+
+
+@numba.jit(nopython=True, cache=True)
+def _mutate_batch_numba(
+    packed, offsets, n_types, movable, mutpb, rw_scale, swap_pb, dup_pb, prune_pb,
+    adj_indices, adj_indptr, cell_raster, node_cells, raster_width, seed,
+):
+    """
+    With probability mutpb per individual: random-walks every movable
+    centroid an Exp(rw_scale) number of steps over the graph (see
+    _random_neighbor_numba), then
+    optionally swaps two movable types' lists, duplicates one centroid and
+    prunes one. Returns the batch, its per-individual type offsets
+    (type t of p owns rows out_offsets[p] + type_offsets[p, t] ...) and a
+    'changed' mask.
+    """
+    np.random.seed(seed)
+    n_individuals = len(offsets) - 1
+    movable_types = np.flatnonzero(movable)
+    n_movable = len(movable_types)
+
+    # Each individual grows by at most one centroid (dup)
+    out = np.empty((len(packed) + n_individuals, 2), dtype=np.int32)
+    out_offsets = np.zeros(n_individuals + 1, dtype=np.int64)
+    type_offsets = np.zeros((n_individuals, n_types + 1), dtype=np.int64)
+    mutated = np.zeros(n_individuals, dtype=np.bool_)
+
+    counts = _type_counts_numba(packed, offsets, n_types)
+    nodes = np.empty(0, dtype=np.int32)
+    starts = np.empty(n_types, dtype=np.int64)
+    source = np.empty(n_types, dtype=np.int64)
+    lengths = np.empty(n_types, dtype=np.int64)
+
+    for p in range(n_individuals):
+        lo, hi = offsets[p], offsets[p + 1]
+        if len(nodes) < hi - lo:
+            nodes = np.empty(hi - lo, dtype=np.int32)
+        row = 0
+        for t in range(n_types):
+            starts[t] = row
+            row += counts[p, t]
+        for r in range(lo, hi):
+            nodes[r - lo] = packed[r, 0]
+
+        dup_type, dup_node, prune_type, prune_idx = -1, 0, -1, -1
+        for t in range(n_types):
+            source[t] = t
+            lengths[t] = counts[p, t]
+
+        if np.random.random() < mutpb:
+            mutated[p] = True
+            # --- Random walk ---
+            for t in movable_types:
+                for k in range(starts[t], starts[t] + counts[p, t]):
+                    steps = int(np.random.exponential(rw_scale))
+                    current = nodes[k]
+                    for _ in range(steps):
+                        neighbor = _random_neighbor_numba(
+                            current, adj_indices, adj_indptr, cell_raster, node_cells, raster_width
+                        )
+                        if neighbor == -1:
+                            break
+                        current = neighbor
+                    nodes[k] = current
+
+            # --- Swap two types' lists ---
+            if n_movable >= 2 and np.random.random() < swap_pb:
+                i = np.random.randint(0, n_movable)
+                j = np.random.randint(0, n_movable - 1)
+                if j >= i:
+                    j += 1
+                t1, t2 = movable_types[i], movable_types[j]
+                source[t1], source[t2] = t2, t1
+                lengths[t1], lengths[t2] = counts[p, t2], counts[p, t1]
+
+            # --- Duplicate one centroid of a type ---
+            if n_movable > 0 and np.random.random() < dup_pb:
+                t = movable_types[np.random.randint(0, n_movable)]
+                if lengths[t] > 0:
+                    k = np.random.randint(0, lengths[t])
+                    dup_type, dup_node = t, nodes[starts[source[t]] + k]
+                    lengths[t] += 1
+
+            # --- Prune one centroid of a type with several ---
+            n_prunable = 0
+            for t in movable_types:
+                if lengths[t] > 1:
+                    n_prunable += 1
+            if n_prunable > 0 and np.random.random() < prune_pb:
+                pick = np.random.randint(0, n_prunable)
+                for t in movable_types:
+                    if lengths[t] > 1:
+                        if pick == 0:
+                            prune_type = t
+                            prune_idx = np.random.randint(0, lengths[t])
+                            break
+                        pick -= 1
+
+        w = out_offsets[p]
+        for t in range(n_types):
+            type_offsets[p, t] = w - out_offsets[p]
+            src = source[t]
+            for k in range(lengths[t]):
+                if t == prune_type and k == prune_idx:
+                    continue
+                if t == dup_type and k == lengths[t] - 1:
+                    out[w, 0] = dup_node
+                else:
+                    out[w, 0] = nodes[starts[src] + k]
+                out[w, 1] = t
+                w += 1
+        type_offsets[p, n_types] = w - out_offsets[p]
+        out_offsets[p + 1] = w
+
+    return out[: out_offsets[-1]], out_offsets, type_offsets, mutated
+
+
+@numba.jit(nopython=True, cache=True)
+def _perturb_batch_numba(
+    packed, movable, radius, adj_indices, adj_indptr, cell_raster, node_cells, raster_width, seed,
+):
+    """
+    Random-walks every movable centroid of a batch a uniform 0..radius
+    steps over the graph (as _mutate_batch_numba), so each stays within
+    `radius` hops of where it started. Rows keep their order, so the
+    batch's offsets still apply.
+    """
+    np.random.seed(seed)
+    out = packed.copy()
+    for r in range(len(packed)):
+        if not movable[packed[r, 1]]:
+            continue
+        current = packed[r, 0]
+        for _ in range(np.random.randint(0, radius + 1)):
+            neighbor = _random_neighbor_numba(
+                current, adj_indices, adj_indptr, cell_raster, node_cells, raster_width
+            )
+            if neighbor == -1:
+                break
+            current = neighbor
+        out[r, 0] = current
+    return out
+
+
+@numba.jit(nopython=True, cache=True, parallel=True)
+def _distances_to_numba(packed, offsets, n_types, positions, target):
+    """
+    Genome distance from every individual of a batch to individual `target`:
+    per type, the mean distance from each centroid of the smaller list to its
+    nearest centroid in the other (ties measure from the target), or
+    10 * |length difference| when either list is empty; averaged over types.
+    """
+    n_individuals = len(offsets) - 1
+    counts = _type_counts_numba(packed, offsets, n_types)
+    starts = np.empty((n_individuals, n_types), dtype=np.int64)
+    for p in range(n_individuals):
+        row = offsets[p]
+        for t in range(n_types):
+            starts[p, t] = row
+            row += counts[p, t]
+
+    out = np.zeros(n_individuals, dtype=np.float64)
+    if n_types == 0:
+        return out
+    for p in numba.prange(n_individuals):
+        total = 0.0
+        for t in range(n_types):
+            n_own, n_target = counts[p, t], counts[target, t]
+            if n_own == 0 or n_target == 0:
+                total += 10.0 * abs(n_own - n_target)
+                continue
+            if n_own < n_target:
+                a, n_a, b, n_b = starts[p, t], n_own, starts[target, t], n_target
+            else:
+                a, n_a, b, n_b = starts[target, t], n_target, starts[p, t], n_own
+            type_sum = 0.0
+            for i in range(a, a + n_a):
+                u = packed[i, 0]
+                nearest = np.inf
+                for j in range(b, b + n_b):
+                    v = packed[j, 0]
+                    d = 0.0
+                    for c in range(positions.shape[1]):
+                        diff = positions[u, c] - positions[v, c]
+                        d += diff * diff
+                    if d < nearest:
+                        nearest = d
+                type_sum += np.sqrt(nearest)
+            total += type_sum / n_a
+        out[p] = total / n_types
+    return out
+
+
+# --- Explicit Signatures (see evaluation.KERNEL_SIGNATURES) ---
+
+_i32 = types.int32[::1]
+_i32_2d = types.int32[:, ::1]
+_i64 = types.int64[::1]
+_i64_2d = types.int64[:, ::1]
+_b1 = types.boolean[::1]
+_f64 = types.float64[::1]
+_f64_2d = types.float64[:, ::1]
+_f32_2d = types.float32[:, ::1]
+_int = types.int64
+_float = types.float64
+
+OPERATOR_SIGNATURES = {
+    _crossover_batch_numba: [
+        types.Tuple((_i32_2d, _i64, _b1))(_i32_2d, _i64, _int, _float, _int),
+    ],
+    _mutate_batch_numba: [
+        types.Tuple((_i32_2d, _i64, _i64_2d, _b1))(
+            _i32_2d, _i64, _int, _b1, _float, _float, _float, _float, _float,
+            _i32, _i32, _i32, _i32, _int, _int,
+        ),
+    ],
+    _perturb_batch_numba: [_i32_2d(_i32_2d, _b1, _int, _i32, _i32, _i32, _i32, _int, _int)],
+    # Positions as DiscretizedGraph keeps them (float32) or float64
+    _distances_to_numba: [
+        _f64(_i32_2d, _i64, _int, _f32_2d, _int),
+        _f64(_i32_2d, _i64, _int, _f64_2d, _int),
+    ],
+}
@@ -0,0 +1,175 @@
+import multiprocessing as mp
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numba
+import numpy as np
+
+from floorplan.data_models import Individual
+from floorplan.evaluation import (
+    FitnessEvaluator,
+    _evaluate_population_lattice_numba,
+    _evaluate_population_numba,
+)
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """Picklable description of a stage's problem arrays in shared memory."""
+
+    token: str
+    shm_name: str
+    # name -> (byte offset, dtype str, shape)
+    layout: dict[str, tuple[int, str, tuple[int, ...]]]
+    scalars: dict
+    neutral: bool
+    # Arrays of a LatticeGraph evaluator (see population_kernel_args)
+    lattice: bool = False
+
+
+# --- Worker Process State ---
+
+_worker_stage: tuple[str, shared_memory.SharedMemory, dict] | None = None
+
+
+def _init_worker() -> None:
+    # Parallelism comes from the pool; each worker runs its kernels single-threaded.
+    numba.set_num_threads(1)
+
+
+def _attach(spec: SharedArraySpec) -> dict:
+    """Maps the stage's arrays into this worker, once per stage."""
+    global _worker_stage
+    if _worker_stage is not None and _worker_stage[0] == spec.token:
+        return _worker_stage[2]
+    if _worker_stage is not None:
+        _worker_stage[1].close()
+
+    shm = shared_memory.SharedMemory(name=spec.shm_name)
+    arrays = {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        for name, (offset, dtype, shape) in spec.layout.items()
+    }
+    _worker_stage = (spec.token, shm, arrays)
+    return arrays
+
+
+def _evaluate_chunk(spec: SharedArraySpec, packed: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    n_individuals = len(offsets) - 1
+    if spec.neutral:
+        return np.zeros(n_individuals, dtype=np.float64)
+    kernel = _evaluate_population_lattice_numba if spec.lattice else _evaluate_population_numba
+    return kernel(
+        packed_centroids=packed,
+        offsets=offsets,
+        n_chunks=1,
+        **_attach(spec),
+        **spec.scalars,
+    )
+
+
+# --- Parent Side ---
+
+
+class ParallelEvaluator:
+    """
+    Opt-in multi-process backend for batched fitness evaluation.
+
+    The process pool is created lazily and kept alive until shutdown(), so
+    one instance can serve every stage and branch of a multi-resolution run.
+    Each stage's problem arrays are published once via shared memory; tasks
+    only carry their slice of the packed population. Chunks are contiguous
+    and reassembled in order, so results match serial evaluation exactly.
+    """
+
+    def __init__(self, max_workers: int, min_batch: int = 16):
+        self.max_workers = max_workers
+        # Batches smaller than this are cheaper to score in-process
+        self.min_batch = min_batch
+        self._executor: ProcessPoolExecutor | None = None
+        self._shm: shared_memory.SharedMemory | None = None
+        self._spec: SharedArraySpec | None = None
+        self._evaluator: FitnessEvaluator | None = None
+
+    def __enter__(self) -> "ParallelEvaluator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 'spawn' keeps workers clear of the parent's Numba thread pool
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    def publish(self, evaluator: FitnessEvaluator) -> None:
+        """Copies a stage's problem arrays into a fresh shared-memory block."""
+        if evaluator is self._evaluator:
+            return
+        self._release_shared()
+
+        args = evaluator.population_kernel_args()
+        arrays = {k: np.ascontiguousarray(v) for k, v in args.items() if isinstance(v, np.ndarray)}
+        scalars = {k: v for k, v in args.items() if k not in arrays}
+
+        layout, size = {}, 0
+        for name, array in arrays.items():
+            size = -(-size // 8) * 8  # keep every array 8-byte aligned
+            layout[name] = (size, array.dtype.str, array.shape)
+            size += array.nbytes
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            offset, _, shape = layout[name]
+            view = np.ndarray(shape, dtype=array.dtype, buffer=self._shm.buf, offset=offset)
+            view[...] = array
+
+        self._spec = SharedArraySpec(
+            token=uuid.uuid4().hex,
+            shm_name=self._shm.name,
+            layout=layout,
+            scalars=scalars,
+            neutral=evaluator.rectangularity_rules.size == 0,
+            lattice=evaluator.lattice,
+        )
+        self._evaluator = evaluator
+
+    def evaluate_population(
+        self, evaluator: FitnessEvaluator, individuals: list[Individual]
+    ) -> np.ndarray:
+        """Drop-in for FitnessEvaluator.evaluate_population, spread over the pool."""
+        if len(individuals) < max(self.min_batch, 2):
+            return evaluator.evaluate_population(individuals)
+        self.publish(evaluator)
+        evaluator.n_evaluations += len(individuals)
+
+        packed, offsets = evaluator.pack_population(individuals)
+        bounds = np.linspace(0, len(individuals), min(self.max_workers, len(individuals)) + 1)
+        bounds = bounds.astype(np.int64)
+
+        futures = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            chunk_offsets = offsets[lo : hi + 1] - offsets[lo]
+            chunk = packed[offsets[lo] : offsets[hi]]
+            futures.append(self.executor.submit(_evaluate_chunk, self._spec, chunk, chunk_offsets))
+        return np.concatenate([f.result() for f in futures])
+
+    def _release_shared(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+        self._shm = self._spec = self._evaluator = None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._release_shared()
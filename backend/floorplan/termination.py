@@ -0,0 +1,157 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+class ConvergenceMonitor:
+    """
+    Decides when a GA stage should stop. After every update it tracks the
+    population's fitness variance, its genotype diversity (mean genome
+    distance to the best individual) and, over the last `window` updates,
+    the best-fitness slope per generation and the gain per second of compute.
+
+    Stop reasons, checked in this order:
+      - "time_budget":   the next update would end past time_budget_seconds
+                         (the last update interval is the estimate)
+      - "evaluation_budget": max_evaluations fitness evaluations spent
+      - "stagnation":    stagnation_limit generations without min_improvement
+      - "converged":     diversity at or below min_diversity
+      - "low_gain_rate": windowed gain per second below min_gain_per_second
+    plus "max_generations" when the stage simply runs out of generations.
+    Thresholds left as None are disabled.
+    """
+
+    def __init__(
+        self,
+        window: int = 10,
+        min_gain_per_second: float | None = None,
+        min_diversity: float | None = None,
+        min_improvement: float = 1e-6,
+        stagnation_limit: int | None = None,
+        time_budget_seconds: float | None = None,
+        max_evaluations: int | None = None,
+    ):
+        self.window = max(window, 2)
+        self.min_gain_per_second = min_gain_per_second
+        self.min_diversity = min_diversity
+        self.min_improvement = min_improvement
+        self.stagnation_limit = stagnation_limit
+        self.time_budget_seconds = time_budget_seconds
+        self.max_evaluations = max_evaluations
+        self.start()
+
+    def start(self) -> None:
+        self.start_time = self.last_update_time = time.perf_counter()
+        self.last_interval = 0.0
+        self.evaluations = self.evaluation_offset = 0
+        self.resumed_seconds = 0.0
+        self.history: deque[tuple[int, float, float]] = deque(maxlen=self.window)
+        self.generations = 0
+        self.stagnation_counter = 0
+        self.best_fitness = float("inf")
+        self.fitness_variance = float("nan")
+        self.diversity = float("nan")
+        self.improvement_slope = float("nan")
+        self.gain_per_second = float("nan")
+        self.reason: str | None = None
+
+    def resume(self, generations: int, evaluations: int, elapsed_seconds: float) -> None:
+        """
+        Continues the counts of a checkpointed run. The time budget only
+        covers this process, since callers size it from the time left.
+        """
+        self.generations = generations
+        self.evaluations = self.evaluation_offset = evaluations
+        self.resumed_seconds = elapsed_seconds
+
+    def elapsed_seconds(self) -> float:
+        """Compute time of the whole run, including any resumed part."""
+        return self.resumed_seconds + time.perf_counter() - self.start_time
+
+    def check_budget(self, evaluations: int | None = None) -> str | None:
+        """
+        Returns "time_budget" or "evaluation_budget" once a budget is spent,
+        given the cumulative number of fitness evaluations.
+        """
+        if evaluations is not None:
+            self.evaluations = self.evaluation_offset + evaluations
+        if self.time_budget_seconds is not None:
+            # Don't start another interval that would end past the budget
+            elapsed = time.perf_counter() - self.start_time
+            if elapsed + self.last_interval >= self.time_budget_seconds:
+                self.reason = "time_budget"
+        if (
+            self.reason is None
+            and self.max_evaluations is not None
+            and self.evaluations >= self.max_evaluations
+        ):
+            self.reason = "evaluation_budget"
+        return self.reason
+
+    def update(
+        self,
+        best_fitness: float,
+        fitnesses: np.ndarray | None,
+        diversity: float,
+        n_generations: int = 1,
+        evaluations: int | None = None,
+        fitness_variance: float | None = None,
+    ) -> str | None:
+        """
+        Records n_generations more generations (and the cumulative number of
+        fitness evaluations); returns a stop reason or None. fitness_variance,
+        if given, is used instead of the variance of `fitnesses` (for
+        populations spread over processes).
+        """
+        now = time.perf_counter()
+        self.last_interval, self.last_update_time = now - self.last_update_time, now
+        self.generations += n_generations
+        if self.best_fitness - best_fitness < self.min_improvement:
+            self.stagnation_counter += n_generations
+        else:
+            self.stagnation_counter = 0
+        self.best_fitness = best_fitness
+        if fitness_variance is None:
+            fitness_variance = float(np.var(fitnesses)) if len(fitnesses) else 0.0
+        self.fitness_variance = fitness_variance
+        self.diversity = diversity
+
+        self.history.append((self.generations, now, best_fitness))
+        if len(self.history) >= 2:
+            gens, times, bests = (np.array(col, dtype=np.float64) for col in zip(*self.history))
+            self.improvement_slope = float(np.polyfit(gens, bests, 1)[0])
+            elapsed = times[-1] - times[0]
+            self.gain_per_second = float((bests[0] - bests[-1]) / elapsed) if elapsed > 0 else float("inf")
+
+        if self.check_budget(evaluations):
+            return self.reason
+        if self.stagnation_limit is not None and self.stagnation_counter >= self.stagnation_limit:
+            self.reason = "stagnation"
+        elif self.min_diversity is not None and diversity <= self.min_diversity:
+            self.reason = "converged"
+        elif (
+            self.min_gain_per_second is not None
+            and len(self.history) == self.window
+            and self.gain_per_second < self.min_gain_per_second
+        ):
+            self.reason = "low_gain_rate"
+        return self.reason
+
+    def summary(self) -> dict:
+        """JSON-friendly record of why and when the stage stopped."""
+        metrics = {
+            "best_fitness": self.best_fitness,
+            "fitness_variance": self.fitness_variance,
+            "diversity": self.diversity,
+            "improvement_slope": self.improvement_slope,
+            "gain_per_second": self.gain_per_second,
+        }
+        return {
+            "reason": self.reason or "max_generations",
+            "generations": self.generations,
+            "evaluations": self.evaluations,
+            "elapsed_seconds": round(self.elapsed_seconds(), 3),
+            # Undefined metrics (e.g. a single update) are reported as None
+            **{k: float(v) if np.isfinite(v) else None for k, v in metrics.items()},
+        }
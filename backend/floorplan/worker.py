@@ -1,16 +1,76 @@
+import datetime
 import os
+import socket
+import threading
 import time
 import traceback
+import uuid
 
 import numpy as np  # Ensure numpy is imported
 import pandas as pd
 from sqlalchemy.orm import Session
 
 from floorplan.api import run_multi_resolution_optimization
+from floorplan.cache import SolutionStore
+from floorplan.checkpoint import JobCheckpoint
 from floorplan.data_models import OptimizationRequest, RoomData, ZoneConstraint
 from floorplan.database import Job
 from floorplan.rules import RuleEngine
 
+# Recorded as Job.owner by the jobs this process runs. The boot token tells
+# apart processes that reuse a hostname and PID (e.g. a restarted container).
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+# A running job's lease is renewed every third of this; an owner that lets it
+# lapse is presumed dead and its job may be taken over
+LEASE_SECONDS = float(os.environ.get("FLOORPLAN_JOB_LEASE_SECONDS", "60"))
+
+
+def _lease_deadline() -> datetime.datetime:
+    return datetime.datetime.now() + datetime.timedelta(seconds=LEASE_SECONDS)
+
+
+class _LeaseHeartbeat:
+    """
+    Renews this process's lease on a job from a background thread, with its
+    own session, so long stages without progress updates keep the job.
+    Stops renewing once another process has taken the job over.
+    """
+
+    def __init__(self, job_id: str, bind):
+        self.job_id = job_id
+        self.bind = bind
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(LEASE_SECONDS / 3):
+            db = Session(bind=self.bind)
+            try:
+                renewed = (
+                    db.query(Job)
+                    .filter(Job.id == self.job_id, Job.owner == PROCESS_OWNER)
+                    .update({Job.lease_expires: _lease_deadline()}, synchronize_session=False)
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Lease renewal for job {self.job_id} failed: {e}")
+                renewed = 1
+            finally:
+                db.close()
+            if renewed == 0:
+                print(f"Job {self.job_id} was taken over by another process")
+                return
+
 
 def _load_static_data() -> tuple[pd.DataFrame, pd.DataFrame]:
     """Loads rooms.csv and rules.csv."""
@@ -91,11 +151,17 @@ def process_optimization_job(job_id: str, db: Session):
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
         return
+    # Progress of an earlier, interrupted attempt at this job (if any)
+    checkpoint = JobCheckpoint.for_job(job_id)
 
+    heartbeat = _LeaseHeartbeat(job_id, db.get_bind())
     try:
         job.status = "processing"
+        job.owner = PROCESS_OWNER
+        job.lease_expires = _lease_deadline()
         job.progress = 0.0  # Reset
         db.commit()
+        heartbeat.start()
 
         request_data = OptimizationRequest(**job.input_payload)
         room_df, rules_df = _load_static_data()
@@ -145,12 +211,28 @@ def process_optimization_job(job_id: str, db: Session):
             target_node_counts=request_data.global_parameters.target_node_counts,
             generations=request_data.global_parameters.generations,
             pop_sizes=request_data.global_parameters.pop_sizes,
+            time_budget_seconds=request_data.global_parameters.time_budget_seconds,
+            max_evaluations=request_data.global_parameters.max_evaluations,
+            warm_start_size=request_data.global_parameters.warm_start_size,
+            warm_start_radius=request_data.global_parameters.warm_start_radius,
+            grid_pyramid=request_data.global_parameters.grid_pyramid,
+            lattice_graph_min_nodes=request_data.global_parameters.lattice_graph_min_nodes,
             total_gfa=request_data.global_parameters.total_gfa,
             dynamic_rules=dynamic_rules,
             interactive=request_data.global_parameters.interactive,
             show_progress=False,
             num_layouts=3,
             progress_callback=db_progress_callback,  # <-- Pass the callback here
+            solution_store=SolutionStore.from_env(),
+            parallel_workers=int(os.environ.get("FLOORPLAN_PARALLEL_WORKERS", "0")),
+            n_islands=int(os.environ.get("FLOORPLAN_ISLANDS", "1")),
+            branch_workers=int(os.environ.get("FLOORPLAN_BRANCH_WORKERS", "0")),
+            checkpoint=checkpoint,
+            min_gain_per_second=(
+                float(os.environ["FLOORPLAN_MIN_GAIN_PER_SECOND"])
+                if os.environ.get("FLOORPLAN_MIN_GAIN_PER_SECOND")
+                else None
+            ),
         )
 
         if not results_list:
@@ -165,6 +247,7 @@ def process_optimization_job(job_id: str, db: Session):
                     "fitness": float(res.fitness),
                     "area_stats": area_stats,
                     "layouts": layouts_json,
+                    "termination": res.termination,
                 }
             )
 
@@ -179,6 +262,8 @@ def process_optimization_job(job_id: str, db: Session):
         job.progress = 1.0
         job.status = "completed"
         db.commit()
+        if checkpoint is not None:
+            checkpoint.clear()
 
     except ValueError as ve:
         # NEW: Handle "Expected" errors cleanly (No Traceback)
@@ -197,6 +282,9 @@ def process_optimization_job(job_id: str, db: Session):
             )
 
         db.commit()
+        # Bad input fails the same way on a retry; only crashes keep their checkpoint
+        if checkpoint is not None:
+            checkpoint.clear()
 
     except Exception as e:
         # Catch-all for other crashes
@@ -207,3 +295,59 @@ def process_optimization_job(job_id: str, db: Session):
             f"System Error: {str(e)}\n\nDebug Trace:\n{traceback.format_exc()}"
         )
         db.commit()
+
+    finally:
+        heartbeat.stop()
+
+
+def _claim_job(db: Session, job_id: str, owner: str | None) -> bool:
+    """
+    Atomically takes over a "processing" job still owned by `owner` whose
+    lease has lapsed; False if the owner renewed it or another process
+    claimed it first.
+    """
+    owner_matches = Job.owner.is_(None) if owner is None else Job.owner == owner
+    lease_lapsed = Job.lease_expires.is_(None) | (Job.lease_expires < datetime.datetime.now())
+    claimed = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.status == "processing", owner_matches, lease_lapsed)
+        .update({Job.owner: PROCESS_OWNER, Job.lease_expires: _lease_deadline()}, synchronize_session=False)
+    )
+    db.commit()
+    return claimed == 1
+
+
+def resume_interrupted_jobs(session_factory) -> None:
+    """
+    Reruns jobs left "processing" by a worker that died or was redeployed,
+    i.e. whose lease lapsed; each picks up from its checkpoint. A job is
+    claimed by a conditional update on its owner and lease first, so
+    processes starting together don't both rerun it.
+    """
+    db = session_factory()
+    try:
+        jobs = [(job.id, job.owner) for job in db.query(Job).filter(Job.status == "processing").all()]
+        job_ids = [job_id for job_id, owner in jobs if _claim_job(db, job_id, owner)]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        print(f"Resuming interrupted job {job_id}")
+        db = session_factory()
+        try:
+            process_optimization_job(job_id, db)
+        finally:
+            db.close()
+
+
+def watch_interrupted_jobs(session_factory) -> None:
+    """
+    Runs resume_interrupted_jobs() once per lease period, so jobs of a
+    worker that dies later (or whose lease hadn't lapsed yet at startup)
+    are picked up too.
+    """
+    while True:
+        try:
+            resume_interrupted_jobs(session_factory)
+        except Exception as e:
+            print(f"Resuming interrupted jobs failed: {e}")
+        time.sleep(LEASE_SECONDS)
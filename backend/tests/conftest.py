@@ -4,6 +4,9 @@ from fastapi.testclient import TestClient
 import sys
 import os
 
+import numpy as np
+import pandas as pd
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 
@@ -12,6 +15,17 @@ if parent_dir not in sys.path:
 
 from app import app
 from floorplan.database import Base, engine
+from floorplan.data_models import Connection, FloorPlan, RoomData
+from floorplan.evaluation import FitnessEvaluator
+from floorplan.geometry import GeometryProcessor
+from floorplan.graph import GraphBuilder
+
+@pytest.fixture(autouse=True)
+def isolated_job_storage(tmp_path, monkeypatch):
+    """Keeps the cross-job solution cache and job checkpoints out of the working tree."""
+    monkeypatch.setenv("FLOORPLAN_SOLUTION_CACHE", str(tmp_path / "solution_cache.db"))
+    monkeypatch.setenv("FLOORPLAN_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+
 
 @pytest.fixture
 def sample_floorplan_payload():
@@ -47,3 +61,56 @@ def client():
     with TestClient(app) as c:
         yield c
     Base.metadata.drop_all(bind=engine)
+
+
+# --- Synthetic optimisation problem for the algorithm tests ---
+
+TYPES = ["ent", "gen", "stf", "chi"]
+
+
+def _build_evaluator(
+    n: int = 12, dynamic_rules: dict | None = None, n_floors: int = 1, lattice: bool = False
+) -> FitnessEvaluator:
+    plan = FloorPlan(
+        name="Test Level",
+        boundary=[(0, 0), (0, 10), (10, 10), (10, 0)],
+        walls=[[(4, 0), (4, 6), (5, 6), (5, 0)]],
+        connections=[Connection(coord=(1, 9), connection_id="l", type_name="lif")],
+    )
+    discs = [GeometryProcessor.discretize(plan, n=n) for _ in range(n_floors)]
+    if lattice:
+        graph = GraphBuilder.build_lattice(discs)
+    else:
+        graph = GraphBuilder.stitch_graphs(
+            [GraphBuilder.build_for_single_floor(d) for d in discs],
+            [d.connection_nodes for d in discs],
+        )
+
+    room_df = pd.DataFrame({"short": TYPES})
+    rules_df = pd.DataFrame(0.0, index=TYPES, columns=TYPES)
+    np.fill_diagonal(rules_df.values, -1.0)
+    rules_df.loc["ent", "chi"] = 3.0
+    selected = pd.DataFrame({"short": TYPES, "area": [0.1, 0.4, 0.2, 0.3]})
+
+    if dynamic_rules is None:
+        dynamic_rules = {
+            "compactness": [{"zone": "gen", "weight": 0.5}],
+            "rectangularity": [{"zone": "stf", "weight": 2.0}],
+            "count_per_floor": [{"zone": "chi", "target": 1, "weight": 1.5}],
+        }
+    return FitnessEvaluator(
+        graph=graph,
+        room_data=RoomData(room_df, rules_df, selected),
+        fixed_nodes={},
+        dynamic_rules=dynamic_rules,
+    )
+
+
+@pytest.fixture
+def make_evaluator():
+    return _build_evaluator
+
+
+@pytest.fixture
+def evaluator():
+    return _build_evaluator()
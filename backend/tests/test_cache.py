@@ -0,0 +1,144 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from floorplan.cache import FitnessCache, GeometryCache, SolutionStore, problem_fingerprint
+from floorplan.data_models import Connection, FloorPlan, Individual
+from floorplan.geometry import GeometryProcessor
+from floorplan.graph import GraphBuilder
+from floorplan.ga import GeneticOptimizer
+
+
+def test_key_ignores_centroid_order_but_not_type_or_multiplicity():
+    cache = FitnessCache(["ent", "gen"])
+    key = cache.key(Individual({"ent": [1, 5], "gen": [7]}))
+
+    assert cache.key(Individual({"gen": [7], "ent": [5, 1]})) == key
+    assert cache.key(Individual({"ent": [7], "gen": [1, 5]})) != key
+    assert cache.key(Individual({"ent": [1, 5, 5], "gen": [7]})) != key
+    # Types the evaluator does not know are ignored, as in evaluate()
+    assert cache.key(Individual({"ent": [1, 5], "gen": [7], "lif": [3]})) == key
+
+
+def test_lru_eviction_and_stats():
+    cache = FitnessCache(["ent"], max_entries=2)
+    cache.put(1, (1.0,))
+    cache.put(2, (2.0,))
+    assert cache.get(1) == (1.0,)  # 1 is now most recently used
+    cache.put(3, (3.0,))
+
+    assert cache.get(2) is None
+    assert cache.get(3) == (3.0,)
+    assert cache.stats() == {
+        "size": 2,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "hit_rate": 2 / 3,
+    }
+
+
+def test_memory_cap_bounds_entries():
+    cache = FitnessCache(["ent"], max_entries=10**9, max_memory_mb=1)
+    assert cache.max_entries < 10**5
+
+
+def test_problem_fingerprint_tracks_graph_and_rules(make_evaluator, monkeypatch):
+    base = problem_fingerprint(make_evaluator())
+
+    assert problem_fingerprint(make_evaluator()) == base
+    assert problem_fingerprint(make_evaluator(n=10)) != base
+    assert problem_fingerprint(make_evaluator(dynamic_rules={})) != base
+    monkeypatch.setattr("floorplan.cache.OBJECTIVE_VERSION", -1)
+    assert problem_fingerprint(make_evaluator()) != base
+
+
+def test_solution_store_round_trip(tmp_path):
+    store = SolutionStore(str(tmp_path / "solutions.db"), max_entries_per_problem=2)
+    store.save_fitness("fp", [(7, (2.5,)), (8, (3.5,)), (2**64 - 1, (1.5,))])
+
+    # Unsigned keys survive SQLite's signed INTEGER; only the newest entries are kept
+    assert store.load_fitness("fp", limit=10) == {8: (3.5,), 2**64 - 1: (1.5,)}
+    assert store.load_fitness("other", limit=10) == {}
+
+    ind = Individual({"ent": [np.int64(3)], "gen": [1, 2]})
+    ind.fitness.values = (4.0,)
+    store.save_elites("fp", "", [ind])
+    assert store.load_elites("fp", "") == [({"ent": [3], "gen": [1, 2]}, 4.0)]
+    assert store.load_elites("fp", "branch") == []
+
+
+def test_second_run_reuses_cached_fitness_and_elites(evaluator, tmp_path):
+    store = SolutionStore(str(tmp_path / "solutions.db"))
+    random.seed(1)
+    np.random.seed(1)
+    first = GeneticOptimizer(pop_size=6, generations=2, stagnation_limit=None)
+    hof = first.run(evaluator.graph, evaluator, num_layouts=2, solution_store=store)
+
+    second = GeneticOptimizer(pop_size=6, generations=1, stagnation_limit=None)
+    rerun = second.run(evaluator.graph, evaluator, num_layouts=2, solution_store=store)
+
+    cache = second.fitness_cache
+    assert cache.get(cache.key(hof[0])) == hof[0].fitness.values
+    assert rerun[0].fitness.values[0] <= hof[0].fitness.values[0]
+
+
+def test_island_run_persists_every_island_evaluation(evaluator, tmp_path):
+    store = SolutionStore(str(tmp_path / "solutions.db"))
+    random.seed(2)
+    optimizer = GeneticOptimizer(
+        pop_size=8, generations=2, stagnation_limit=None, n_islands=2, migration_interval=1
+    )
+    hof = optimizer.run(evaluator.graph, evaluator, num_layouts=1, solution_store=store)
+
+    saved = store.load_fitness(problem_fingerprint(evaluator), limit=10_000)
+    assert len(saved) > 8
+    assert saved[optimizer.fitness_cache.key(hof[0])] == hof[0].fitness.values
+
+
+def test_geometry_cache_shares_discretizations_and_graphs_by_plan_content():
+    def plan(name):
+        return FloorPlan(
+            name=name,
+            boundary=[(0, 0), (0, 10), (10, 10), (10, 0)],
+            walls=[[(4, 0), (4, 6), (5, 6), (5, 0)]],
+            connections=[Connection(coord=(1, 9), connection_id="l", type_name="lif")],
+        )
+
+    cache = GeometryCache(max_entries=8)
+    n = cache.grid_size(plan("L1"), 100)
+    assert n == GeometryProcessor.grid_size(plan("L1"), 100)
+
+    disc = cache.discretize(plan("L1"), n)
+    assert cache.discretize(plan("L1"), n) is disc  # equal content, new object
+    assert cache.discretize(plan("L2"), n) is not disc
+    np.testing.assert_array_equal(disc.grid_positions, GeometryProcessor.discretize(plan("L1"), n).grid_positions)
+
+    graph = cache.stitched_graph([plan("L1"), plan("L2")], [n, n])
+    assert cache.stitched_graph([plan("L1"), plan("L2")], [n, n]) is graph
+    discs = [GeometryProcessor.discretize(plan(name), n) for name in ("L1", "L2")]
+    expected = GraphBuilder.stitch_graphs(
+        [GraphBuilder.build_for_single_floor(d) for d in discs], [d.connection_nodes for d in discs]
+    )
+    np.testing.assert_array_equal(graph.adj_indices, expected.adj_indices)
+    assert cache.stats()["hits"] >= 4
+
+    uncached = GeometryCache(max_entries=0)
+    assert uncached.discretize(plan("L1"), n) is not uncached.discretize(plan("L1"), n)
+
+    # A memory cap evicts the least recently used entries first
+    size = cache.stats()["bytes"]
+    capped = GeometryCache(max_entries=8, max_memory_mb=1.5 * disc.grid_positions.nbytes / 2**20)
+    first = capped.discretize(plan("L1"), n)
+    capped.discretize(plan("L2"), n)
+    assert capped.discretize(plan("L1"), n) is not first
+    assert capped.stats()["size"] == 1 and 0 < capped.stats()["bytes"] < size
+
+    # Concurrent jobs share the cache without corrupting its bookkeeping
+    shared = GeometryCache(max_entries=3)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: shared.discretize(plan(f"L{i % 5}"), n), range(200)))
+    stats = shared.stats()
+    assert stats["size"] == 3 and stats["hits"] + stats["misses"] == 200
+    assert stats["bytes"] == sum(size for _, size in shared._entries.values())
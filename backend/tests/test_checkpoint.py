@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+from floorplan.checkpoint import JobCheckpoint
+from floorplan.data_models import Genome
+from floorplan.ga import GeneticOptimizer
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = JobCheckpoint(str(tmp_path / "job.npz"))
+    assert checkpoint.load() is None
+
+    done = Genome.from_segments(("a", "b"), [[1, 2], [3]])
+    done.fitness.values = (4.5,)
+    unscored = Genome.from_segments(("a", "b"), [[5], []])
+    random.seed(1)
+    np.random.seed(1)
+    checkpoint.save(
+        {
+            "completed": {
+                "stage1": {"genomes": [done], "termination": {"reason": "stagnation"}, "population": [done, unscored]},
+                "branch0/stage2": {"genomes": [done], "termination": {}},
+            },
+            "running": {
+                "key": "branch0/stage2",
+                "generation": 7,
+                "population": [done, unscored],
+                "random_state": random.getstate(),
+                "numpy_random_state": np.random.get_state(),
+                "evaluations": 30,
+                "elapsed_seconds": 1.5,
+            },
+            "running_branches": [
+                {
+                    "key": "branch1/stage2",
+                    "generation": 3,
+                    "population": [unscored],
+                    "random_state": random.getstate(),
+                    "numpy_random_state": np.random.get_state(),
+                    "evaluations": 12,
+                    "elapsed_seconds": 0.5,
+                }
+            ],
+            "run_elapsed_seconds": 2.0,
+            "evaluations_left": None,
+        }
+    )
+
+    state = JobCheckpoint(checkpoint.path).load()
+    [restored] = state["completed"]["stage1"]["genomes"]
+    assert restored.to_dict() == {"a": [1, 2], "b": [3]} and restored.fitness.values == (4.5,)
+    assert [g.to_dict() for g in state["completed"]["stage1"]["population"]] == [done.to_dict(), unscored.to_dict()]
+    assert "population" not in state["completed"]["branch0/stage2"]
+    running = state["running"]
+    assert running["generation"] == 7 and running["key"] == "branch0/stage2"
+    assert not running["population"][1].fitness.valid
+    [branch] = state["running_branches"]
+    assert branch["key"] == "branch1/stage2" and branch["population"][0].to_dict() == unscored.to_dict()
+    random.setstate(running["random_state"])
+    np.random.set_state(running["numpy_random_state"])
+    expected = (random.random(), np.random.random())
+    random.seed(1)
+    np.random.seed(1)
+    assert expected == (random.random(), np.random.random())
+
+    checkpoint.clear()
+    assert checkpoint.load() is None
+
+
+def test_resumed_run_matches_uninterrupted_run(evaluator, tmp_path):
+    checkpoint = JobCheckpoint(str(tmp_path / "job.npz"))
+
+    def optimizer():
+        return GeneticOptimizer(pop_size=8, generations=6, stagnation_limit=None, checkpoint_interval=3)
+
+    def save_first(ga_state):
+        if ga_state["generation"] == 3:
+            checkpoint.save({"completed": {}, "running": {"key": "stage1", **ga_state}})
+
+    random.seed(8)
+    np.random.seed(8)
+    full = optimizer().run(evaluator.graph, evaluator, num_layouts=2, checkpoint=save_first)
+
+    random.seed(123)  # The checkpoint restores the RNG state
+    resumed_optimizer = optimizer()
+    resumed = resumed_optimizer.run(
+        evaluator.graph, evaluator, num_layouts=2, resume_from=checkpoint.load()["running"]
+    )
+
+    assert [(ind.to_dict(), ind.fitness.values) for ind in resumed] == [
+        (ind.to_dict(), ind.fitness.values) for ind in full
+    ]
+    assert resumed_optimizer.termination["generations"] == 6
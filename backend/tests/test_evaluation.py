@@ -0,0 +1,272 @@
+import random
+
+import numpy as np
+import pytest
+
+from floorplan.data_models import Individual
+from floorplan.evaluation import (
+    KERNEL_SIGNATURES,
+    FitnessEvaluator,
+    PropagationWorkspace,
+    _calculate_penalties_numba,
+    _propagate_into_numba,
+    _propagate_numba,
+    warmup_kernels,
+)
+
+
+def random_individual(evaluator: FitnessEvaluator, rng: random.Random) -> Individual:
+    n_nodes = evaluator.graph.n_nodes
+    return Individual(
+        {t: [rng.randrange(n_nodes) for _ in range(rng.randint(1, 3))] for t in evaluator.type_names}
+    )
+
+
+def dense_reference_propagation(centroids, target_counts, graph, n_types):
+    """The original dense wavefront formulation, kept as an oracle."""
+    assignment = np.full(graph.n_nodes, -1, dtype=np.int32)
+    counts = np.zeros(n_types, dtype=np.int32)
+    wavefront = []
+    for node, t in centroids:
+        if assignment[node] == -1:
+            assignment[node] = t
+            counts[t] += 1
+            wavefront.append(node)
+    while wavefront:
+        best = np.full(graph.n_nodes, np.inf, dtype=np.float32)
+        winner = np.full(graph.n_nodes, -1, dtype=np.int32)
+        for src in wavefront:
+            t = assignment[src]
+            if counts[t] >= target_counts[t]:
+                priority = 1e-6
+            else:
+                priority = (target_counts[t] - counts[t]) / target_counts[t] + 1e-6
+            cost = 1.0 - priority
+            for dst in graph.adj_indices[graph.adj_indptr[src] : graph.adj_indptr[src + 1]]:
+                if assignment[dst] == -1 and cost < best[dst]:
+                    best[dst] = cost
+                    winner[dst] = t
+        wavefront = [int(i) for i in np.flatnonzero(winner != -1)]
+        for node in wavefront:
+            assignment[node] = winner[node]
+            counts[winner[node]] += 1
+    return assignment
+
+
+def test_sparse_propagation_matches_dense_reference(evaluator):
+    rng = random.Random(11)
+    graph = evaluator.graph
+    ws = PropagationWorkspace.allocate(graph.n_nodes, evaluator.n_types)
+    for _ in range(20):
+        ind = random_individual(evaluator, rng)
+        centroids = evaluator._pack_individual(ind)
+        expected = dense_reference_propagation(
+            centroids, evaluator.target_counts, graph, evaluator.n_types
+        )
+
+        _propagate_into_numba(
+            centroids, evaluator.target_counts, graph.adj_indices, graph.adj_indptr,
+            ws.node_assignments, ws.best_cost, ws.winner_type,
+            ws.wavefront, ws.next_wavefront, ws.current_counts,
+        )
+
+        np.testing.assert_array_equal(ws.node_assignments, expected)
+        # Workspace is left neutral for the next call
+        assert np.isinf(ws.best_cost).all()
+        assert (ws.winner_type == -1).all()
+
+    allocating = _propagate_numba(
+        centroids, evaluator.target_counts, graph.adj_indices, graph.adj_indptr,
+        graph.n_nodes, evaluator.n_types,
+    )
+    np.testing.assert_array_equal(allocating, expected)
+
+
+def test_evaluate_population_matches_per_individual_evaluate(evaluator):
+    rng = random.Random(7)
+    population = [random_individual(evaluator, rng) for _ in range(12)]
+
+    batched = evaluator.evaluate_population(population)
+
+    assert batched.shape == (12,)
+    expected = [evaluator.evaluate(ind)[0] for ind in population]
+    np.testing.assert_allclose(batched, expected, rtol=1e-9)
+
+
+def test_pack_population_offsets(evaluator):
+    population = [
+        Individual({"ent": [0], "gen": [1, 2]}),
+        Individual({"stf": [3]}),
+    ]
+    packed, offsets = evaluator.pack_population(population)
+
+    assert offsets.tolist() == [0, 3, 4]
+    assert packed.dtype == np.int32
+    assert packed[offsets[1]].tolist() == [3, evaluator.type_map["stf"]]
+
+
+def test_evaluate_population_neutral_without_shape_rules(make_evaluator):
+    evaluator = make_evaluator(dynamic_rules={})
+    population = [random_individual(evaluator, random.Random(1)) for _ in range(3)]
+
+    assert evaluator.evaluate_population(population).tolist() == [0.0, 0.0, 0.0]
+    assert evaluator.evaluate_population([]).shape == (0,)
+
+
+def full_penalty(evaluator, assignment):
+    graph = evaluator.graph
+    return _calculate_penalties_numba(
+        assignment, graph.adjacency_edges_np[0], graph.adjacency_edges_np[1],
+        graph.grid_positions, evaluator.node_floor, evaluator.n_floors,
+        evaluator.rules_matrix, evaluator.target_counts, evaluator.comp_weights,
+        evaluator.rect_weights, evaluator.floor_cost_present,
+        evaluator.floor_cost_absent, evaluator.w_area, evaluator.w_adj,
+    )
+
+
+def reference_penalty(evaluator, assignment):
+    """The original rule-list formulation of the objective, kept as an oracle."""
+    graph = evaluator.graph
+    counts = np.bincount(assignment[assignment >= 0], minlength=evaluator.n_types)
+    total = evaluator.w_area * float(((counts - evaluator.target_counts) ** 2).sum())
+
+    comp = {int(t): w for t, w in evaluator.compactness_rules.reshape(-1, 2)}
+    for u, v in graph.adjacency_edges_np.T:
+        tu, tv = assignment[u], assignment[v]
+        if tu == tv:
+            total -= comp.get(int(tu), 0.0)
+        else:
+            total += evaluator.w_adj * evaluator.rules_matrix[tu, tv]
+
+    for t, w in evaluator.rectangularity_rules.reshape(-1, 2):
+        xy = graph.grid_positions[assignment == int(t)].astype(int)
+        if len(xy):
+            bbox_area = np.prod(xy.max(axis=0) - xy.min(axis=0) + 1)
+            total += w * (1.0 - len(xy) / bbox_area)
+
+    for t, target, w in evaluator.per_floor_rules.reshape(-1, 3):
+        for start, end in graph.floor_node_ranges:
+            exists = int((assignment[start : end + 1] == int(t)).any())
+            total += w * (exists - int(target)) ** 2
+    return total
+
+
+def test_fused_penalty_matches_reference_on_multi_floor_plan(make_evaluator):
+    evaluator = make_evaluator(n_floors=3)
+    assert evaluator.n_floors == 3
+    assert evaluator.node_floor[-1] == 2
+
+    rng = random.Random(2)
+    for _ in range(10):
+        ind = random_individual(evaluator, rng)
+        evaluator.evaluate(ind)
+        assignment = evaluator.last_node_assignment
+        assert full_penalty(evaluator, assignment) == pytest.approx(
+            reference_penalty(evaluator, assignment)
+        )
+
+
+def random_move(evaluator, ind, rng):
+    offsets = evaluator.seed_offsets(ind)
+    t = rng.choice(list(offsets))
+    pos = rng.randrange(len(ind[t]))
+    graph = evaluator.graph
+    node = ind[t][pos]
+    neighbor = int(rng.choice(graph.adj_indices[graph.adj_indptr[node] : graph.adj_indptr[node + 1]]))
+    return t, pos, offsets[t] + pos, neighbor
+
+
+def test_delta_move_matches_full_evaluation_of_moved_individual(make_evaluator):
+    evaluator = make_evaluator(n_floors=2)
+    rng = random.Random(5)
+    ind = random_individual(evaluator, rng)
+    assert evaluator.begin_delta(ind) == evaluator.evaluate(ind)[0]
+
+    state = evaluator.delta_state
+    for _ in range(200):
+        before = state.node_assignment.copy()
+        base_fitness = evaluator._delta_fitness()
+        t, pos, seed_idx, neighbor = random_move(evaluator, ind, rng)
+        moved = Individual({k: list(v) for k, v in ind.items()})
+        moved[t][pos] = neighbor
+
+        fitness = evaluator.delta_move(seed_idx, neighbor)
+
+        assert fitness == pytest.approx(evaluator.evaluate(moved)[0])
+        np.testing.assert_array_equal(state.node_assignment, evaluator.propagate(moved))
+        if rng.random() < 0.5:
+            evaluator.accept_delta()
+            ind = moved
+        else:
+            evaluator.reject_delta()
+            np.testing.assert_array_equal(state.node_assignment, before)
+            assert evaluator._delta_fitness() == pytest.approx(base_fitness)
+        assert state.seeds[seed_idx, 0] == ind[t][pos]
+
+
+def test_warmup_compiles_explicit_signatures_used_by_evaluator(evaluator):
+    report = warmup_kernels()
+
+    assert set(report["kernels"]) == {k.py_func.__name__ for k in KERNEL_SIGNATURES}
+    assert report["cache_hits"] + report["cache_misses"] >= len(KERNEL_SIGNATURES)
+    compiled = {k: len(k.signatures) for k in KERNEL_SIGNATURES}
+
+    # Every evaluator path dispatches to the precompiled signatures
+    ind = random_individual(evaluator, random.Random(4))
+    evaluator.evaluate(ind)
+    evaluator.evaluate_population([ind, ind])
+    evaluator.begin_delta(ind)
+    evaluator.delta_move(0, int(evaluator.adj_indices[evaluator.adj_indptr[ind["ent"][0]]]))
+    evaluator.reject_delta()
+    assert {k: len(k.signatures) for k in KERNEL_SIGNATURES} == compiled
+
+
+def test_score_moves_matches_sequential_delta_moves(make_evaluator):
+    evaluator = make_evaluator(n_floors=2)
+    ind = random_individual(evaluator, random.Random(6))
+    evaluator.begin_delta(ind)
+    base = evaluator.delta_state.node_assignment.copy()
+
+    graph = evaluator.graph
+    move_seed, move_node = [], []
+    for seed_idx, node in enumerate(evaluator.delta_state.seeds[:, 0]):
+        for neighbor in graph.adj_indices[graph.adj_indptr[node] : graph.adj_indptr[node + 1]]:
+            move_seed.append(seed_idx)
+            move_node.append(neighbor)
+    # A move landing on another seed's node
+    move_seed.append(0)
+    move_node.append(evaluator.delta_state.seeds[1, 0])
+
+    scores = evaluator.score_moves(np.array(move_seed), np.array(move_node))
+
+    np.testing.assert_array_equal(evaluator.delta_state.node_assignment, base)
+    for m, (seed_idx, node) in enumerate(zip(move_seed, move_node)):
+        assert scores[m] == pytest.approx(evaluator.delta_move(seed_idx, int(node)))
+        evaluator.reject_delta()
+
+
+def test_implicit_lattice_evaluator_matches_csr_evaluator(make_evaluator):
+    csr = make_evaluator(n_floors=3)
+    lattice = make_evaluator(n_floors=3, lattice=True)
+    assert lattice.lattice and not lattice.supports_delta
+    assert len(lattice.adj_indices) == 4  # only the lift links are explicit
+
+    rng = random.Random(8)
+    population = [random_individual(csr, rng) for _ in range(12)]
+    for ind in population:
+        np.testing.assert_array_equal(lattice.propagate(ind), csr.propagate(ind))
+        assert lattice.evaluate(ind) == csr.evaluate(ind)
+    np.testing.assert_array_equal(
+        lattice.evaluate_population(population), csr.evaluate_population(population)
+    )
+
+    with pytest.raises(TypeError, match="LatticeGraph"):
+        lattice.begin_delta(population[0])
+
+
+
+def test_evaluator_shares_the_graph_arrays(evaluator):
+    graph = evaluator.graph
+    assert evaluator.grid_coords is graph.grid_coords
+    assert np.shares_memory(evaluator.edges_u, graph.adjacency_edges_np)
+    assert np.shares_memory(evaluator.edges_v, graph.adjacency_edges_np)
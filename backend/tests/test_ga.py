@@ -0,0 +1,266 @@
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from floorplan.data_models import Genome
+from floorplan.ga import GeneticOptimizer, _merge_population_signals
+
+
+def test_run_returns_scored_distinct_layouts(evaluator):
+    random.seed(3)
+    np.random.seed(3)
+    optimizer = GeneticOptimizer(pop_size=8, generations=4, stagnation_limit=None)
+
+    hof = optimizer.run(evaluator.graph, evaluator, num_layouts=2)
+
+    assert 1 <= len(hof) <= 2
+    for ind in hof:
+        assert ind.fitness.valid
+        assert ind.fitness.values[0] == pytest.approx(evaluator.evaluate(ind)[0])
+    assert hof[0].fitness.values[0] <= hof[-1].fitness.values[0]
+
+
+def test_progress_callback_reports_cache_stats(evaluator):
+    reported = []
+
+    def callback(gen, total_gen, fitness, best_ind, cache_stats=None):
+        reported.append(cache_stats)
+
+    optimizer = GeneticOptimizer(
+        pop_size=6, generations=3, stagnation_limit=None, cache_max_entries=10
+    )
+    optimizer.run(evaluator.graph, evaluator, progress_callback=callback)
+
+    assert len(reported) == 3
+    assert reported[-1]["size"] <= 10
+    assert reported[-1]["hits"] + reported[-1]["misses"] > 0
+
+
+def test_island_model_is_deterministic_and_merges_islands(evaluator):
+    reported = []
+
+    def run(topology):
+        random.seed(9)
+        np.random.seed(9)
+        optimizer = GeneticOptimizer(
+            pop_size=8, generations=5, stagnation_limit=None, n_islands=2,
+            migration_interval=2, migration_size=1, migration_topology=topology,
+        )
+        hof = optimizer.run(
+            evaluator.graph, evaluator, num_layouts=3,
+            progress_callback=lambda gen, *args, **kw: reported.append(gen),
+        )
+        return [(dict(ind), ind.fitness.values) for ind in hof]
+
+    first = run("ring")
+    assert run("ring") == first
+    # One report per migration epoch: after generations 2, 4 and the last one
+    assert reported[:3] == [1, 3, 4]
+    assert 1 <= len(first) <= 3
+    for genome, (fitness,) in first:
+        assert fitness == pytest.approx(evaluator.evaluate(genome)[0])
+    run("random")
+
+
+def test_island_signals_merge_to_the_whole_population_variance():
+    fitnesses = np.array([1.0, 2.0, 4.0, 8.0, 9.0])
+    islands = [fitnesses[:2], fitnesses[2:]]
+    signals = [
+        {"size": len(f), "mean": f.mean(), "variance": f.var(), "diversity": float(i)}
+        for i, f in enumerate(islands)
+    ]
+    merged = _merge_population_signals(signals)
+
+    assert merged["size"] == 5
+    assert merged["mean"] == pytest.approx(fitnesses.mean())
+    assert merged["variance"] == pytest.approx(fitnesses.var())
+    assert merged["diversity"] == pytest.approx(3 / 5)
+
+
+def test_unknown_migration_topology_is_rejected():
+    with pytest.raises(ValueError):
+        GeneticOptimizer(migration_topology="star")
+
+
+def test_genome_round_trips_and_clones_cheaply(evaluator):
+    genome = Genome.from_dict({"gen": [4, 2], "ent": [7], "lif": [1]}, evaluator.type_names)
+
+    assert genome.to_dict() == {"ent": [7], "gen": [4, 2], "stf": [], "chi": []}
+    assert evaluator._pack_individual(genome) is genome.centroids
+    assert evaluator.evaluate(genome) == evaluator.evaluate(genome.to_dict())
+
+    genome.fitness.values = (1.0,)
+    clone = copy.deepcopy(genome)
+    clone.centroids[0, 0] = 9
+    assert genome["ent"] == [7] and clone["ent"] == [9]
+    assert clone.fitness.values == (1.0,)
+
+
+def test_batched_variation_preserves_genome_layout(evaluator):
+    random.seed(2)
+    optimizer = GeneticOptimizer(cxpb=0.5, mutpb=0.5, swap_pb=1.0, dup_pb=1.0, prune_pb=1.0)
+    optimizer._prepare_run(evaluator.graph, evaluator)
+    parents = optimizer.toolbox.population(n=9)
+    for parent in parents:
+        parent.fitness.values = (1.0,)
+
+    offspring = optimizer.toolbox.vary(parents)
+
+    assert len(offspring) == 9
+    assert any(child.fitness.valid for child in offspring)
+    assert not all(child.fitness.valid for child in offspring)
+    for child, parent in zip(offspring, parents):
+        types = child.centroids[:, 1]
+        assert (np.diff(types) >= 0).all()
+        np.testing.assert_array_equal(
+            child.offsets, np.searchsorted(types, np.arange(evaluator.n_types + 1))
+        )
+        if child.fitness.valid:
+            np.testing.assert_array_equal(child.centroids, parent.centroids)
+
+
+def test_steepest_descent_reaches_local_optimum_with_exact_fitness(evaluator):
+    random.seed(4)
+    optimizer = GeneticOptimizer(local_search_mode="steepest", local_search_max_steps=1000)
+    optimizer._prepare_run(evaluator.graph, evaluator)
+    start = optimizer.toolbox.individual()
+
+    improved = optimizer._steepest_descent(start, evaluator.graph, evaluator)
+
+    fitness = improved.fitness.values[0]
+    assert fitness == pytest.approx(evaluator.evaluate(improved)[0])
+    assert fitness < evaluator.evaluate(start)[0]
+    # No single neighbour move improves on the result
+    adj_indices, adj_indptr = evaluator.adj_indices, evaluator.adj_indptr
+    for row, node in enumerate(improved.centroids[:, 0]):
+        for neighbor in adj_indices[adj_indptr[node] : adj_indptr[node + 1]]:
+            moved = improved.copy()
+            moved.centroids[row, 0] = neighbor
+            assert evaluator.evaluate(moved)[0] >= fitness - optimizer.MIN_IMPROVEMENT
+
+
+def test_distinct_hof_respects_min_distance_and_maxmin_strategy(evaluator):
+    graph = evaluator.graph
+    type_names = tuple(evaluator.type_names)
+
+    def genome(node, fitness):
+        ind = Genome.from_segments(type_names, [[node] for _ in type_names])
+        ind.fitness.values = (fitness,)
+        return ind
+
+    far = int(np.argmax(np.linalg.norm(graph.grid_positions - graph.grid_positions[0], axis=1)))
+    near = int(graph.adj_indices[graph.adj_indptr[0]])
+    population = [genome(0, 1.0), genome(0, 2.0), genome(near, 3.0), genome(far, 4.0)]
+
+    fittest = GeneticOptimizer()._select_distinct_hof(list(population), evaluator, k=2)
+    assert [ind.fitness.values[0] for ind in fittest] == [1.0, 3.0]  # duplicate skipped
+
+    spread = GeneticOptimizer(hof_strategy="maxmin")._select_distinct_hof(list(population), evaluator, k=2)
+    assert [ind.fitness.values[0] for ind in spread] == [1.0, 4.0]
+
+    strict = GeneticOptimizer(hof_min_distance=1.5)._select_distinct_hof(list(population), evaluator, k=3)
+    assert [ind.fitness.values[0] for ind in strict] == [1.0, 4.0]
+
+
+def test_run_records_termination_reason(evaluator):
+    random.seed(2)
+    optimizer = GeneticOptimizer(
+        pop_size=6, generations=30, stagnation_limit=None, min_gain_per_second=1e12, convergence_window=3
+    )
+    optimizer.run(evaluator.graph, evaluator, num_layouts=1)
+    assert optimizer.termination["reason"] == "low_gain_rate"
+    # The window's first entry is the seeded population
+    assert optimizer.termination["generations"] == 2
+
+    optimizer = GeneticOptimizer(pop_size=6, generations=2, stagnation_limit=None)
+    optimizer.run(evaluator.graph, evaluator, num_layouts=1)
+    assert optimizer.termination["reason"] == "max_generations"
+    assert optimizer.termination["diversity"] >= 0
+
+
+def test_run_stops_on_evaluation_budget_with_best_so_far(evaluator):
+    random.seed(6)
+    optimizer = GeneticOptimizer(pop_size=6, generations=50, stagnation_limit=None, max_evaluations=20)
+    hof = optimizer.run(evaluator.graph, evaluator, num_layouts=1)
+
+    assert optimizer.termination["reason"] == "evaluation_budget"
+    assert optimizer.termination["generations"] < 50
+    assert hof and hof[0].fitness.valid
+
+
+def test_evaluation_budget_charges_delta_evaluations(evaluator):
+    random.seed(6)
+    optimizer = GeneticOptimizer(
+        pop_size=6, generations=50, stagnation_limit=None, max_evaluations=200, local_search_mode="steepest"
+    )
+    before = evaluator.n_evaluations
+    optimizer.run(evaluator.graph, evaluator, num_layouts=1)
+
+    assert optimizer.termination["reason"] == "evaluation_budget"
+    # Delta moves count too, so the budget runs out within a few generations
+    assert optimizer.termination["evaluations"] == evaluator.n_evaluations - before
+    assert optimizer.termination["generations"] < 10
+
+
+def test_island_model_shares_the_evaluation_budget(evaluator):
+    random.seed(9)
+    optimizer = GeneticOptimizer(
+        pop_size=8, generations=40, stagnation_limit=None, n_islands=2,
+        migration_interval=20, migration_size=1, max_evaluations=60,
+    )
+    optimizer.run(evaluator.graph, evaluator, num_layouts=1)
+
+    assert optimizer.termination["reason"] == "evaluation_budget"
+    assert optimizer.termination["generations"] < 20
+
+
+def test_warm_start_pads_with_perturbations_within_radius(evaluator):
+    random.seed(8)
+    graph = evaluator.graph
+    seed = Genome.from_segments(tuple(evaluator.type_names), [[0], [5, 9], [20], [graph.n_nodes - 1]])
+    optimizer = GeneticOptimizer(pop_size=10, generations=0, warm_start_radius=1)
+    optimizer.run(graph, evaluator, initial_population=[seed], num_layouts=1)
+
+    pop = optimizer.final_population
+    assert len(pop) == 10
+    fitnesses = [ind.fitness.values[0] for ind in pop]
+    assert fitnesses == sorted(fitnesses)
+    for ind in pop:
+        np.testing.assert_array_equal(ind.offsets, seed.offsets)
+        for start, node in zip(seed.centroids[:, 0], ind.centroids[:, 0]):
+            assert node == start or node in graph.neighbors(start)
+    assert any(not np.array_equal(ind.centroids, seed.centroids) for ind in pop)
+
+
+def test_run_on_implicit_lattice_graph_scores_in_full(make_evaluator):
+    evaluator = make_evaluator(n_floors=2, lattice=True)
+    random.seed(5)
+    optimizer = GeneticOptimizer(pop_size=6, generations=3, stagnation_limit=None, local_search_mode="steepest")
+
+    hof = optimizer.run(evaluator.graph, evaluator, num_layouts=1)
+
+    assert not optimizer._use_delta and optimizer._ls_mode == "stochastic"
+    assert hof[0].fitness.values[0] == pytest.approx(evaluator.evaluate(hof[0])[0])
+
+    # The fallback is per run: the configured settings apply to the next graph
+    assert optimizer.USE_DELTA and optimizer.LS_MODE == "steepest"
+    csr_evaluator = make_evaluator(n_floors=2)
+    optimizer.run(csr_evaluator.graph, csr_evaluator, num_layouts=1)
+    assert optimizer._use_delta and optimizer._ls_mode == "steepest"
+
+
+def test_local_searches_on_lattice_graph_skip_delta_evaluation(make_evaluator):
+    evaluator = make_evaluator(n_floors=2, lattice=True)
+    random.seed(6)
+    optimizer = GeneticOptimizer(local_search_mode="steepest")
+    optimizer._prepare_run(evaluator.graph, evaluator, log=False)
+    # Even with delta evaluation switched on, neither search calls begin_delta()
+    optimizer._use_delta = True
+    start = optimizer.toolbox.individual()
+
+    for search in (optimizer._steepest_descent, optimizer._local_search):
+        improved = search(start, evaluator.graph, evaluator)
+        assert evaluator.delta_state is None
+        assert evaluator.evaluate(improved)[0] <= evaluator.evaluate(start)[0]
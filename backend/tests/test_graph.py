@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from scipy.spatial import cKDTree
+
+from floorplan.data_models import Connection, FloorPlan
+from floorplan.geometry import GeometryProcessor
+from floorplan.graph import GraphBuilder
+
+
+def test_lattice_builder_matches_unit_distance_neighbours():
+    plan = FloorPlan(
+        name="L",
+        boundary=[(0, 0), (0, 8), (12, 8), (12, 4), (6, 4), (6, 0)],
+        walls=[[(2, 0), (2, 5), (3, 5), (3, 0)]],
+    )
+    disc = GeometryProcessor.discretize(plan, n=30)
+    graph = GraphBuilder.build_for_single_floor(disc)
+
+    assert graph.adj_indices.dtype == np.int32 and graph.adj_indptr.dtype == np.int32
+    assert graph.grid_positions.dtype == np.float32
+    assert graph._adjacency_list is None  # only built for legacy callers
+
+    expected = cKDTree(disc.grid_positions).query_ball_point(disc.grid_positions, r=1.01)
+    for node, neighbours in enumerate(expected):
+        assert graph.neighbors(node).tolist() == sorted(n for n in neighbours if n != node)
+        assert graph.adjacency_list[node] == graph.neighbors(node).tolist()
+
+    u, v = graph.adjacency_edges_np
+    assert (u < v).all() and len(u) == len(graph.adj_indices) // 2
+    assert u.dtype == np.int32 and graph.adjacency_edges_np is graph.adjacency_edges_np
+    assert graph.grid_coords.dtype == np.float64
+    np.testing.assert_array_equal(graph.grid_coords, graph.grid_positions)
+
+
+def _floor(name, connections=(), walls=()):
+    return FloorPlan(
+        name=name,
+        boundary=[(0, 0), (0, 10), (10, 10), (10, 0)],
+        walls=list(walls),
+        connections=[Connection(coord=c, connection_id=i, type_name="lif") for i, c in connections],
+    )
+
+
+def _stitch(plans):
+    discs = [GeometryProcessor.discretize(plan, n=8) for plan in plans]
+    return GraphBuilder.stitch_graphs(
+        [GraphBuilder.build_for_single_floor(d) for d in discs],
+        [d.connection_nodes for d in discs],
+        [plan.name for plan in plans],
+    ), discs
+
+
+def test_stitched_graph_links_connections_on_consecutive_floors():
+    graph, discs = _stitch([_floor(name, [("l", (1, 1)), ("s", (9, 9))]) for name in "ABC"])
+    sizes = [len(d.grid_positions) for d in discs]
+    assert graph.n_nodes == sum(sizes)
+    assert graph.floor_node_ranges.tolist() == [[0, sizes[0] - 1], [sizes[0], sum(sizes[:2]) - 1], [sum(sizes[:2]), sum(sizes) - 1]]
+
+    lift = [discs[f].connection_nodes["l"] + sum(sizes[:f]) for f in range(3)]
+    neighbours = lambda node: graph.neighbors(node).tolist()
+    assert lift[1] in neighbours(lift[0]) and lift[0] in neighbours(lift[1]) and lift[2] in neighbours(lift[1])
+    assert lift[2] not in neighbours(lift[0])
+    for node in range(graph.n_nodes):
+        assert neighbours(node) == sorted(set(neighbours(node)))
+
+
+def test_disconnected_stitch_names_floors_of_each_component():
+    plans = [_floor("A", [("l", (1, 1))]), _floor("B", [("l", (1, 1))]), _floor("C", [("s", (1, 1))])]
+    with pytest.raises(ValueError, match="not fully connected: it has 2 components") as error:
+        _stitch(plans)
+    assert "on 'A', 'B'" in str(error.value) and "on 'C'" in str(error.value)
+
+
+def test_implicit_lattice_matches_stitched_csr_graph():
+    plans = [
+        _floor("A", [("l", (1, 1))], walls=[[(4, 0), (4, 7), (5, 7), (5, 0)]]),
+        FloorPlan(
+            name="B",
+            boundary=[(0, 0), (0, 8), (12, 8), (12, 4), (6, 4), (6, 0)],
+            connections=[Connection(coord=(1, 1), connection_id="l", type_name="lif")],
+        ),
+    ]
+    graph, discs = _stitch(plans)
+    lattice = GraphBuilder.build_lattice(discs, [plan.name for plan in plans])
+
+    assert lattice.n_nodes == graph.n_nodes
+    np.testing.assert_array_equal(lattice.floor_node_ranges, graph.floor_node_ranges)
+    np.testing.assert_array_equal(lattice.degrees(), graph.degrees())
+    for node in range(graph.n_nodes):
+        np.testing.assert_array_equal(lattice.neighbors(node), graph.neighbors(node))
+    # Only the connection links are stored explicitly
+    assert len(lattice.link_indices) == 2 and (lattice.cell_raster >= 0).sum() == graph.n_nodes
+
+    with pytest.raises(ValueError, match="not fully connected: it has 2 components"):
+        GraphBuilder.build_lattice(discs + [GeometryProcessor.discretize(_floor("C"), n=8)])
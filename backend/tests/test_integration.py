@@ -1,10 +1,12 @@
+import datetime
+
 import pandas as pd
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 from app import app
-from floorplan.database import Base, SessionLocal, engine
-from floorplan.worker import process_optimization_job
+from floorplan.database import Base, Job, SessionLocal, engine
+from floorplan.worker import PROCESS_OWNER, process_optimization_job, resume_interrupted_jobs
 
 @pytest.fixture
 def client():
@@ -159,3 +161,40 @@ def test_failed_optimization_flow(client, real_workload_payload):
 
         assert data["status"] == "failed"
         assert "Simulated Geometry Error" in data["error"]
+
+
+def test_resume_claims_each_interrupted_job_once(client):
+    """
+    Only jobs whose lease lapsed are rerun, whatever host owned them, and a
+    job claimed by one resume pass isn't rerun by the next.
+    """
+    now = datetime.datetime.now()
+    lapsed, live = now - datetime.timedelta(seconds=1), now + datetime.timedelta(minutes=5)
+    # A restarted container reuses its hostname and PID but not the boot token
+    restarted = PROCESS_OWNER.rsplit(":", 1)[0] + ":previous-boot"
+    leases = {
+        "orphan": (restarted, lapsed),
+        "redeployed": ("old-host:1:token", lapsed),
+        "legacy": (None, None),
+        "running-here": (PROCESS_OWNER, live),
+        "other-host": ("elsewhere:1:token", live),
+    }
+    db = SessionLocal()
+    db.add_all(
+        [
+            Job(id=job_id, status="processing", owner=owner, lease_expires=lease)
+            for job_id, (owner, lease) in leases.items()
+        ]
+    )
+    db.commit()
+    db.close()
+
+    with patch("floorplan.worker.process_optimization_job") as mock_process:
+        resume_interrupted_jobs(SessionLocal)
+        resume_interrupted_jobs(SessionLocal)
+
+    assert sorted(call.args[0] for call in mock_process.call_args_list) == ["legacy", "orphan", "redeployed"]
+    db = SessionLocal()
+    orphan = db.get(Job, "orphan")
+    assert orphan.owner == PROCESS_OWNER and orphan.lease_expires > now
+    db.close()
@@ -0,0 +1,117 @@
+import numpy as np
+
+from floorplan.data_models import Connection, FloorPlan
+from floorplan.geometry import GeometryProcessor
+from floorplan.graph import GraphBuilder
+from floorplan.operators import (
+    _crossover_batch_numba,
+    _distances_to_numba,
+    _mutate_batch_numba,
+    _perturb_batch_numba,
+)
+
+
+def batch(*individuals):
+    """Packs {type_idx: [nodes]} dicts into the (packed, offsets) batch layout."""
+    rows = [[[n, t] for t in sorted(ind) for n in ind[t]] for ind in individuals]
+    offsets = np.cumsum([0] + [len(r) for r in rows]).astype(np.int64)
+    packed = np.array([row for r in rows for row in r], dtype=np.int32).reshape(-1, 2)
+    return packed, offsets
+
+
+def unpack(packed, offsets, p, n_types):
+    rows = packed[offsets[p] : offsets[p + 1]]
+    return {t: rows[rows[:, 1] == t, 0].tolist() for t in range(n_types)}
+
+
+def path_graph(n):
+    """CSR arrays of a path 0 - 1 - ... - n-1."""
+    neighbors = [[j for j in (i - 1, i + 1) if 0 <= j < n] for i in range(n)]
+    indptr = np.cumsum([0] + [len(x) for x in neighbors]).astype(np.int32)
+    indices = np.array([j for x in neighbors for j in x], dtype=np.int32)
+    return indices, indptr
+
+
+# cell_raster, node_cells, raster_width of a CSR graph
+NO_LATTICE = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), 0)
+
+
+def test_crossover_swaps_tails_after_first_parents_midpoint():
+    packed, offsets = batch({0: [1, 2], 1: [3]}, {0: [4], 1: [5, 6, 7]}, {0: [8]})
+
+    out, out_offsets, crossed = _crossover_batch_numba(packed, offsets, 2, 1.0, 0)
+
+    assert crossed.tolist() == [True, True, False]
+    assert unpack(out, out_offsets, 0, 2) == {0: [1], 1: [5, 6, 7]}
+    assert unpack(out, out_offsets, 1, 2) == {0: [4, 2], 1: [3]}
+    assert unpack(out, out_offsets, 2, 2) == {0: [8], 1: []}
+
+
+def test_mutation_operators_and_seeded_reproducibility():
+    adj_indices, adj_indptr = path_graph(10)
+    packed, offsets = batch({0: [1, 2], 1: [3], 2: [9]})
+    movable = np.array([True, True, False])
+
+    def mutate(rw, swap, dup, prune, seed=0):
+        out, out_offsets, type_offsets, mutated = _mutate_batch_numba(
+            packed, offsets, 3, movable, 1.0, rw, swap, dup, prune, adj_indices, adj_indptr, *NO_LATTICE, seed
+        )
+        assert mutated.all()
+        genome = unpack(out, out_offsets, 0, 3)
+        assert type_offsets[0].tolist() == np.cumsum([0] + [len(genome[t]) for t in range(3)]).tolist()
+        return genome
+
+    assert mutate(0.0, 0.0, 0.0, 0.0) == {0: [1, 2], 1: [3], 2: [9]}
+    assert mutate(0.0, 1.0, 0.0, 0.0) == {0: [3], 1: [1, 2], 2: [9]}
+    duplicated = mutate(0.0, 0.0, 1.0, 0.0)
+    assert len(duplicated[0]) + len(duplicated[1]) == 4 and duplicated[2] == [9]
+    pruned = mutate(0.0, 0.0, 0.0, 1.0)
+    assert len(pruned[0]) == 1 and pruned[1] == [3]
+
+    walked = mutate(5.0, 0.0, 0.0, 0.0, seed=4)
+    assert walked[2] == [9]  # fixed types never move
+    assert walked == mutate(5.0, 0.0, 0.0, 0.0, seed=4)
+
+
+def test_random_walks_match_on_csr_and_implicit_lattice_graphs():
+    plans = [
+        FloorPlan(
+            name=name,
+            boundary=[(0, 0), (0, 10), (10, 10), (10, 0)],
+            connections=[Connection(coord=(1, 1), connection_id="l", type_name="lif")],
+        )
+        for name in "AB"
+    ]
+    discs = [GeometryProcessor.discretize(plan, n=8) for plan in plans]
+    csr = GraphBuilder.stitch_graphs(
+        [GraphBuilder.build_for_single_floor(d) for d in discs], [d.connection_nodes for d in discs]
+    )
+    lattice = GraphBuilder.build_lattice(discs)
+    lift = discs[0].connection_nodes["l"]
+    packed, offsets = batch({0: [lift, 5], 1: [csr.n_nodes - 1]}, {0: [lift], 1: [40, 70]})
+    movable = np.array([True, True])
+    graphs = [
+        (csr.adj_indices, csr.adj_indptr, *NO_LATTICE),
+        (lattice.link_indices, lattice.link_indptr, lattice.cell_raster, lattice.node_cells, lattice.raster_width),
+    ]
+
+    for seed in range(5):
+        mutated = [
+            _mutate_batch_numba(packed, offsets, 2, movable, 1.0, 8.0, 0.2, 0.2, 0.2, *graph, seed)
+            for graph in graphs
+        ]
+        for a, b in zip(*mutated):
+            np.testing.assert_array_equal(a, b)
+        perturbed = [_perturb_batch_numba(packed, movable, 6, *graph, seed) for graph in graphs]
+        np.testing.assert_array_equal(*perturbed)
+
+
+def test_distances_to_target_match_nearest_centroid_definition():
+    positions = np.array([[0.0, 0.0], [3.0, 0.0], [0.0, 4.0], [6.0, 8.0]])
+    packed, offsets = batch({0: [0], 1: [1, 2]}, {0: [3], 1: [1]}, {0: [0, 3], 1: []})
+
+    distances = _distances_to_numba(packed, offsets, 2, positions, 0)
+
+    # type 0: |0 - 3| = 10; type 1: [1] is the smaller list, nearest in [1, 2] is 0
+    # type 0: [0] vs [0, 3] -> 0; type 1: empty vs two centroids -> 10 * 2
+    np.testing.assert_allclose(distances, [0.0, 10.0 / 2, 20.0 / 2])
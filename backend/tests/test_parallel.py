@@ -0,0 +1,119 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from floorplan.api import run_multi_resolution_optimization
+from floorplan.checkpoint import JobCheckpoint
+from floorplan.data_models import FloorPlan, Individual, RoomData
+from floorplan.ga import GeneticOptimizer
+from floorplan.parallel import ParallelEvaluator
+
+
+@pytest.fixture(scope="module")
+def backend():
+    with ParallelEvaluator(max_workers=2, min_batch=2) as backend:
+        yield backend
+
+
+def random_population(evaluator, rng, size):
+    n_nodes = evaluator.graph.n_nodes
+    return [
+        Individual({t: [rng.randrange(n_nodes) for _ in range(rng.randint(1, 3))] for t in evaluator.type_names})
+        for _ in range(size)
+    ]
+
+
+def test_parallel_matches_serial_across_stages(backend, make_evaluator):
+    rng = random.Random(0)
+    for evaluator in (make_evaluator(), make_evaluator(n=16, n_floors=2), make_evaluator(n_floors=2, lattice=True)):
+        population = random_population(evaluator, rng, 9)
+        np.testing.assert_array_equal(
+            backend.evaluate_population(evaluator, population),
+            evaluator.evaluate_population(population),
+        )
+
+
+def test_ga_run_is_deterministic_with_parallel_backend(backend, evaluator):
+    def run(parallel_backend):
+        random.seed(5)
+        np.random.seed(5)
+        optimizer = GeneticOptimizer(
+            pop_size=8, generations=3, stagnation_limit=None, parallel_backend=parallel_backend
+        )
+        hof = optimizer.run(evaluator.graph, evaluator, num_layouts=2)
+        return [(dict(ind), ind.fitness.values) for ind in hof]
+
+    assert run(backend) == run(None)
+
+
+def _tiny_problem():
+    types = ["ent", "gen", "stf", "chi"]
+    plan = FloorPlan(name="L1", boundary=[(0, 0), (0, 10), (10, 10), (10, 0)])
+    rules_df = pd.DataFrame(0.0, index=types, columns=types)
+    np.fill_diagonal(rules_df.values, -1.0)
+    room_data = RoomData(
+        pd.DataFrame({"short": types}), rules_df, pd.DataFrame({"short": types, "area": [10, 40, 20, 30]})
+    )
+    return plan, room_data
+
+
+def test_parallel_branches_are_deterministic_and_report_progress():
+    plan, room_data = _tiny_problem()
+
+    def run():
+        random.seed(0)
+        np.random.seed(0)
+        progress = []
+        results = run_multi_resolution_optimization(
+            [plan], room_data, [40, 80], [2, 2], [20, 6], 100, num_layouts=2,
+            dynamic_rules={"compactness": [{"zone": "gen", "weight": 0.5}]},
+            show_progress=False, progress_callback=progress.append, branch_workers=2,
+        )
+        return [(r.individual.to_dict(), r.fitness) for r in results], progress
+
+    results, progress = run()
+    assert len(results) == 2
+    assert progress == sorted(progress) and progress[-1] == 1.0
+    assert run()[0] == results
+
+
+def test_parallel_branches_checkpoint_each_finished_stage(tmp_path):
+    plan, room_data = _tiny_problem()
+    saved = []
+
+    class RecordingCheckpoint(JobCheckpoint):
+        def save(self, state):
+            saved.append(set(state["completed"]))
+            super().save(state)
+
+    checkpoint = RecordingCheckpoint(str(tmp_path / "job.npz"))
+    run_multi_resolution_optimization(
+        [plan], room_data, [40, 60, 80], [2, 2, 2], [20, 6, 6], 100, num_layouts=2,
+        show_progress=False, branch_workers=2, checkpoint=checkpoint,
+    )
+
+    # Stage 2 of a branch is saved while its stage 3 is still to run
+    assert any("branch0/stage2" in keys and "branch0/stage3" not in keys for keys in saved)
+    assert {"branch0/stage3", "branch1/stage3"} <= saved[-1]
+
+
+def test_rerun_of_finished_job_replays_stages_without_running_the_ga(tmp_path, monkeypatch):
+    plan, room_data = _tiny_problem()
+    checkpoint = JobCheckpoint(str(tmp_path / "job.npz"))
+
+    def run():
+        results = run_multi_resolution_optimization(
+            [plan], room_data, [40, 80], [2, 2], [20, 6], 100, num_layouts=2,
+            show_progress=False, checkpoint=checkpoint,
+        )
+        return [(r.individual.to_dict(), r.fitness) for r in results]
+
+    first = run()
+
+    def no_ga(*args, **kwargs):
+        raise AssertionError("a finished stage reran the GA")
+
+    monkeypatch.setattr(GeneticOptimizer, "run", no_ga)
+    assert run() == first
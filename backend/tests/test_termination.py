@@ -0,0 +1,43 @@
+import numpy as np
+
+from floorplan.api import _StageBudget
+from floorplan.termination import ConvergenceMonitor
+
+
+def test_stop_reasons_and_summary():
+    monitor = ConvergenceMonitor(stagnation_limit=2)
+    assert monitor.update(10.0, np.array([10.0, 12.0]), 1.0) is None
+    assert monitor.update(8.0, np.array([8.0, 8.0]), 0.5) is None
+    assert monitor.update(8.0, np.array([8.0, 8.0]), 0.5) is None
+    assert monitor.update(8.0, np.array([8.0, 8.0]), 0.5) == "stagnation"
+
+    summary = monitor.summary()
+    assert summary["reason"] == "stagnation" and summary["generations"] == 4
+    assert summary["fitness_variance"] == 0.0 and summary["improvement_slope"] < 0
+
+    assert ConvergenceMonitor(min_diversity=0.0).update(1.0, np.ones(3), 0.0) == "converged"
+
+    # Any real run gains far less than 1e12 fitness per second once the window fills
+    monitor = ConvergenceMonitor(window=3, min_gain_per_second=1e12)
+    assert [monitor.update(5.0 - g, np.ones(2), 1.0) for g in range(3)] == [None, None, "low_gain_rate"]
+    assert ConvergenceMonitor().summary()["reason"] == "max_generations"
+
+
+def test_budgets_take_precedence():
+    monitor = ConvergenceMonitor(max_evaluations=10, stagnation_limit=1)
+    assert monitor.check_budget(9) is None
+    assert monitor.update(1.0, np.ones(2), 1.0, evaluations=10) == "evaluation_budget"
+    assert monitor.summary()["evaluations"] == 10
+
+    assert ConvergenceMonitor(time_budget_seconds=0.0).check_budget() == "time_budget"
+    assert ConvergenceMonitor(time_budget_seconds=60.0).check_budget() is None
+
+
+def test_stage_budget_split_fits_queued_branches_in_the_time_left():
+    budget = _StageBudget(3.0, time_budget_seconds=100.0, max_evaluations=300)
+    part = budget.split(3, 2)
+
+    # Three branches on two workers run in two waves of half the time each
+    assert 49.0 < part["time_budget_seconds"] <= 50.0
+    assert part["max_evaluations"] == 100
+    assert budget.split(2, 4)["time_budget_seconds"] > 99.0
@@ -0,0 +1,84 @@
+import numpy as np
+
+from floorplan.api import _pyramid_levels, upsample_individual, upsample_population
+from floorplan.data_models import FloorPlan, Genome, Individual
+from floorplan.geometry import GeometryProcessor
+
+
+def _discretize(n):
+    plans = [
+        FloorPlan(name="L1", boundary=[(0, 0), (0, 10), (10, 10), (10, 0)]),
+        FloorPlan(name="L2", boundary=[(0, 0), (0, 8), (12, 8), (12, 4), (6, 4), (6, 0)]),
+    ]
+    return [GeometryProcessor.discretize(plan, n=n) for plan in plans]
+
+
+def _fine_distances(node, coarse, fine):
+    """Reference: (floor, distances from the node's fine-grid target to that floor's nodes)."""
+    offset = 0
+    for floor, (coarse_disc, fine_disc) in enumerate(zip(coarse, fine)):
+        if node < offset + len(coarse_disc.grid_positions):
+            real = coarse_disc.scaling_info.to_real(coarse_disc.grid_positions[node - offset])
+            target = fine_disc.scaling_info.to_grid(real)
+            return floor, np.linalg.norm(fine_disc.grid_positions - target, axis=1)
+        offset += len(coarse_disc.grid_positions)
+
+
+def _assert_nearest(coarse_nodes, fine_nodes, coarse, fine):
+    fine_starts = np.cumsum([0] + [len(d.grid_positions) for d in fine])
+    for node, fine_node in zip(coarse_nodes, fine_nodes):
+        floor, dists = _fine_distances(node, coarse, fine)
+        local = fine_node - fine_starts[floor]
+        # Same floor, and no strictly closer fine node (ties may go either way)
+        assert 0 <= local < len(dists)
+        assert np.isclose(dists[local], dists.min())
+
+
+def test_upsampling_maps_every_node_to_its_nearest_fine_node_on_the_same_floor():
+    coarse, fine = _discretize(6), _discretize(20)
+    n_coarse = sum(len(d.grid_positions) for d in coarse)
+    rng = np.random.default_rng(0)
+    pop = [
+        Genome.from_segments(("ent", "gen"), [rng.integers(0, n_coarse, 3), rng.integers(0, n_coarse, 5)])
+        for _ in range(4)
+    ]
+
+    fine_pop = upsample_population(pop, coarse, fine)
+
+    for genome, fine_genome in zip(pop, fine_pop):
+        np.testing.assert_array_equal(fine_genome.offsets, genome.offsets)
+        _assert_nearest(genome.centroids[:, 0], fine_genome.centroids[:, 0], coarse, fine)
+        assert not fine_genome.fitness.valid
+
+    individual = upsample_individual(Individual({"ent": [0, n_coarse - 1], "gen": []}), coarse, fine)
+    assert individual["gen"] == []
+    _assert_nearest([0, n_coarse - 1], individual["ent"], coarse, fine)
+
+
+def test_grid_pyramid_links_nested_levels():
+    plans = [
+        FloorPlan(name="L1", boundary=[(0, 0), (0, 10), (10, 10), (10, 0)]),
+        FloorPlan(name="L2", boundary=[(0, 0), (0, 8), (12, 8), (12, 4), (6, 4), (6, 0)]),
+    ]
+    pyramid = GeometryProcessor.build_pyramid(plans, [5, 6], 3)
+    assert pyramid.grid_sizes(2) == [20, 24]
+    assert [d.scaling_info.n for d in pyramid.levels[1]] == [10, 12]
+
+    for level in range(2):
+        coarse = np.concatenate([d.grid_positions for d in pyramid.levels[level]])
+        fine = np.concatenate([d.grid_positions for d in pyramid.levels[level + 1]])
+        parents, children = pyramid.parents[level], pyramid.children[level]
+        assert len(parents) == len(fine) and len(children) == len(coarse)
+        # A fine node lies in its parent's cell, unless that cell has no node
+        inside = (np.floor(fine / 2) == np.floor(coarse[parents])).all(axis=1)
+        assert inside.mean() > 0.9
+        # Children lie in their coarse node's cell and map back to it
+        np.testing.assert_array_equal(parents[children], np.arange(len(coarse)))
+        n_coarse_floor0 = len(pyramid.levels[level][0].grid_positions)
+        assert (children[:n_coarse_floor0] < len(pyramid.levels[level + 1][0].grid_positions)).all()
+
+    nodes = np.arange(len(pyramid.children[0]))
+    np.testing.assert_array_equal(pyramid.map_nodes(nodes, 0, 2), pyramid.children[1][pyramid.children[0]])
+    np.testing.assert_array_equal(pyramid.map_nodes(pyramid.map_nodes(nodes, 0, 2), 2, 0), nodes)
+
+    assert _pyramid_levels([50, 300, 500, 400]) == [0, 1, 2, 2]